@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from admin_custom.modern_model_admin import ModernTemplateMixin
 from .models import UserProfile
 
 
@@ -24,7 +25,7 @@ admin.site.register(User, UserAdmin)
 
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(ModernTemplateMixin, admin.ModelAdmin):
     list_display = ['user', 'phone', 'city', 'country', 'is_premium', 'newsletter_subscribed', 'created_at']
     search_fields = ['user__username', 'user__email', 'phone', 'city', 'country']
     list_filter = ['is_premium', 'newsletter_subscribed', 'country', 'created_at']
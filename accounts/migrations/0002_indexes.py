@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-17 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['country'], name='accounts_us_country_d3e59f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['created_at'], name='accounts_us_created_70c995_idx'),
+        ),
+    ]
@@ -22,3 +22,7 @@ class UserProfile(models.Model):
     class Meta:
         verbose_name = "Profil utilisateur"
         verbose_name_plural = "Profils utilisateurs"
+        indexes = [
+            models.Index(fields=['country'], name='accounts_us_country_d3e59f_idx'),
+            models.Index(fields=['created_at'], name='accounts_us_created_70c995_idx'),
+        ]
@@ -20,6 +20,6 @@ class DashboardChartAdmin(ModernTemplateMixin, admin.ModelAdmin):
     Note: Le modèle doit être enregistré manuellement avec custom_admin_site
     dans le fichier urls.py du projet, pas via @admin.register.
     """
-    list_display = ['name', 'chart_type', 'model_name', 'field_name', 'frequency', 'created_at']
+    list_display = ['name', 'chart_type', 'model_name', 'field_name', 'date_field', 'frequency', 'created_at']
     search_fields = ['name', 'model_name', 'field_name']
     list_filter = ['chart_type', 'frequency', 'created_at']
@@ -5,27 +5,67 @@ Ce module définit un AdminSite personnalisé qui peut être utilisé
 comme package réutilisable dans d'autres projets Django.
 Supporte deux interfaces : Classique (AdminLTE) et Moderne (Design 1).
 """
+import hashlib
+import json
+
+from django.apps import apps
 from django.contrib import admin
 from django.contrib.admin import actions as admin_actions
-from django.urls import path, include
+from django.template.response import TemplateResponse
+from django.urls import get_script_prefix, path, include
+from django.utils.functional import Promise
+from django.utils.translation import get_language
 from django.shortcuts import render
 
 from . import admin_views as custom_views
 from . import auth_views
 from . import modern_views
 from .auth_views import SESSION_INTERFACE_KEY, INTERFACE_MODERN
+from .cache import result_cache
+from .instrumentation import current_metrics
 
 
 def _delete_selected_modern_aware(modeladmin, request, queryset):
     """delete_selected qui utilise le template moderne si l'interface est en mode moderne."""
-    from .modern_model_admin import _use_modern_templates
-    orig = getattr(modeladmin, 'delete_selected_confirmation_template', None)
-    if _use_modern_templates(request) and hasattr(modeladmin, 'modern_delete_selected_confirmation_template'):
-        modeladmin.delete_selected_confirmation_template = modeladmin.modern_delete_selected_confirmation_template
-    try:
-        return admin_actions.delete_selected(modeladmin, request, queryset)
-    finally:
-        modeladmin.delete_selected_confirmation_template = orig
+    response = admin_actions.delete_selected(modeladmin, request, queryset)
+    template = getattr(modeladmin, 'modern_delete_selected_confirmation_template', None)
+    if template and isinstance(response, TemplateResponse):
+        from .modern_model_admin import _use_modern_templates
+        if _use_modern_templates(request):
+            response.template_name = template
+    return response
+
+
+# Icônes Font Awesome de la sidebar moderne, par nom de modèle
+MODEL_ICONS = {
+    'userprofile': 'fa-user',
+    'group': 'fa-users',
+    'permission': 'fa-key',
+    'user': 'fa-user',
+    'category': 'fa-folder',
+    'product': 'fa-box',
+    'orderitem': 'fa-shopping-cart',
+    'order': 'fa-file-lines',
+    'invoice': 'fa-file-invoice',
+    'payment': 'fa-credit-card',
+}
+
+
+def _freeze_app_list(app_list):
+    """Copie sérialisable : textes traduits évalués (la langue fait partie de la clé), modèles par label."""
+    def freeze(entry):
+        return {
+            name: (value._meta.label if name == 'model' else str(value) if isinstance(value, Promise) else value)
+            for name, value in entry.items()
+        }
+    return [dict(freeze(app), models=[freeze(model) for model in app['models']]) for app in app_list]
+
+
+def _thaw_app_list(app_list):
+    return [
+        dict(app, models=[dict(model, model=apps.get_model(model['model'])) for model in app['models']])
+        for app in app_list
+    ]
 
 
 class CustomAdminSite(admin.AdminSite):
@@ -41,6 +81,7 @@ class CustomAdminSite(admin.AdminSite):
     index_title = "Tableau de bord"
 
     def __init__(self, *args, **kwargs):
+        self._registry_version = 0
         super().__init__(*args, **kwargs)
         self._actions = {**self._actions, "delete_selected": _delete_selected_modern_aware}
     
@@ -67,6 +108,8 @@ class CustomAdminSite(admin.AdminSite):
             context['user_display'] = request.user.get_short_name() or request.user.get_username() if request.user.is_authenticated else ''
             context['user_initial'] = (context['user_display'][0] if context['user_display'] else 'A').upper()
             context['admin_base_template'] = 'admin_custom/modern/admin_base.html'
+            # Panneau de mesures (rempli par InstrumentationMiddleware après le rendu)
+            context['perf_panel'] = request.user.is_superuser and current_metrics() is not None
         else:
             context['admin_base_template'] = 'admin_custom/base.html'
         return context
@@ -92,37 +135,71 @@ class CustomAdminSite(admin.AdminSite):
             path('grids/', self.admin_view(custom_views.grids_view), name='admin_grids'),
             path('dashboard/', self.admin_view(custom_views.dashboard_view), name='admin_dashboard'),
             path('settings/', self.admin_view(custom_views.classic_settings), name='classic_settings'),
+            path('perf/', self.admin_view(custom_views.perf_view), name='admin_perf'),
         ]
         
         return custom_urls + urls
     
+    def register(self, model_or_iterable, admin_class=None, **options):
+        super().register(model_or_iterable, admin_class, **options)
+        self._registry_version += 1
+
+    def unregister(self, model_or_iterable):
+        super().unregister(model_or_iterable)
+        self._registry_version += 1
+
     def get_app_list(self, request, app_label=None):
         """
         Retourne la liste des applications, en excluant admin_custom
         et en ajoutant les icônes pour l'interface moderne.
+
+        La liste complète est calculée au plus une fois par requête et mise en
+        cache par utilisateur (voir app_list_key) : la sidebar ne réévalue pas
+        les permissions de chaque modèle à chaque page.
         """
-        app_list = super().get_app_list(request, app_label)
-        
-        model_icons = {
-            'userprofile': 'fa-user',
-            'group': 'fa-users',
-            'permission': 'fa-key',
-            'user': 'fa-user',
-            'category': 'fa-folder',
-            'product': 'fa-box',
-            'orderitem': 'fa-shopping-cart',
-            'order': 'fa-file-lines',
-            'invoice': 'fa-file-invoice',
-            'payment': 'fa-credit-card',
+        if app_label is not None:
+            return self._build_app_list(request, app_label)
+        app_list = getattr(request, '_admin_custom_app_list', None)
+        if app_list is None:
+            app_list = request._admin_custom_app_list = self._cached_app_list(request)
+        return app_list
+
+    def app_list_key(self, request):
+        """Clé de cache : utilisateur, générations des permissions, registre, langue et préfixe d'URL."""
+        from django.contrib.auth.models import Group, Permission
+
+        user = request.user
+        payload = {
+            'site': self.name,
+            'user': [user.pk, user.is_active, user.is_staff, user.is_superuser],
+            'generations': result_cache.get_generations([Permission, Group]),
+            'registry': self._registry_version,
+            'language': get_language(),
+            'prefix': get_script_prefix(),
         }
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        return f'{result_cache.prefix}:app_list:{digest}'
 
+    def _cached_app_list(self, request):
+        if not result_cache.enabled or not request.user.is_authenticated:
+            return self._build_app_list(request)
+        key = self.app_list_key(request)
+        cached = result_cache.get('app_list', key)
+        if cached is not None:
+            return _thaw_app_list(cached)
+        app_list = self._build_app_list(request)
+        result_cache.set('app_list', key, _freeze_app_list(app_list))
+        return app_list
+
+    def _build_app_list(self, request, app_label=None):
+        app_list = super().get_app_list(request, app_label)
         filtered_app_list = []
         for app in app_list:
             if app.get('app_label') == 'admin_custom':
                 continue
             app_copy = dict(app)
             app_copy['models'] = [
-                dict(m, icon=model_icons.get(m.get('object_name', '').lower(), 'fa-circle'))
+                dict(m, icon=MODEL_ICONS.get(m.get('object_name', '').lower(), 'fa-circle'))
                 for m in app_copy.get('models', [])
             ]
             filtered_app_list.append(app_copy)
@@ -48,42 +48,13 @@ def grids_view(request):
 
 def dashboard_view(request):
     """Vue dashboard principal - utilise l'auto-découverte"""
-    from django.db.models import Sum, Count
+    from .stats import collect_stats
     
-    # Détecter automatiquement les modèles avec des montants
-    stats = {}
-    total_revenue = 0
-    
-    # Parcourir tous les modèles pour trouver ceux avec total_amount ou amount
-    for app_config in apps.get_app_configs():
-        # Ignorer les apps Django internes
-        if app_config.name.startswith('django.contrib'):
-            continue
-        
-        for model in app_config.get_models():
-            if model._meta.abstract or model._meta.proxy:
-                continue
-            
-            model_name = model.__name__.lower()
-            
-            # Chercher des champs de montant
-            if hasattr(model, 'total_amount'):
-                count = model.objects.count()
-                revenue = float(model.objects.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-                stats[f'total_{model_name}'] = count
-                total_revenue += revenue
-            elif hasattr(model, 'amount'):
-                count = model.objects.count()
-                revenue = float(model.objects.aggregate(Sum('amount'))['amount__sum'] or 0)
-                stats[f'total_{model_name}'] = count
-                total_revenue += revenue
-            else:
-                # Compter simplement le nombre d'objets
-                count = model.objects.count()
-                if count > 0:  # Ne garder que les modèles avec des données
-                    stats[f'total_{model_name}'] = count
-    
-    stats['total_revenue'] = total_revenue
+    # Une requête par modèle du projet (nombre + somme du champ montant)
+    dashboard_stats = collect_stats()
+    stats = dashboard_stats.per_model(prefix='total_')
+    stats['total_revenue'] = dashboard_stats.total_revenue
+    stats['approximate'] = dashboard_stats.approximate_models(prefix='total_')
     
     custom_admin_site = get_custom_admin_site()
     context = custom_admin_site.each_context(request)
@@ -106,3 +77,26 @@ def classic_settings(request):
         'switch_to_modern_url': '/admin/switch-interface/?to=modern',
     })
     return render(request, 'admin_custom/settings.html', context)
+
+
+def perf_view(request):
+    """Percentiles de temps et requêtes SQL par page (InstrumentationMiddleware), superutilisateurs."""
+    from django.core.exceptions import PermissionDenied
+    from django.shortcuts import redirect
+    from .instrumentation import get_instrumentation_config, performance_log
+
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    if request.method == 'POST':
+        performance_log.reset()
+        return redirect('admin:admin_perf')
+
+    custom_admin_site = get_custom_admin_site()
+    context = custom_admin_site.each_context(request)
+    context.update({
+        'title': 'Performances',
+        'rows': performance_log.report(),
+        'instrumentation_enabled': get_instrumentation_config().get('ENABLED', True),
+        'history': performance_log.history,
+    })
+    return render(request, 'admin_custom/perf.html', context)
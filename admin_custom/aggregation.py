@@ -0,0 +1,316 @@
+"""
+Moteur d'agrégation par tranches de temps pour les graphiques
+
+Calcule toutes les tranches (jour, semaine, mois, trimestre, année) d'un
+graphique en une seule requête groupée (GROUP BY sur une troncature de date),
+puis complète en Python les tranches vides avec des zéros. Les variantes
+préfixées par `a` (achart_series...) lisent les tranches avec l'ORM asynchrone.
+
+L'axe temporel est n'importe quel champ date/datetime du modèle (date_field,
+created_at par défaut) et la fenêtre est soit les `periods` dernières
+tranches, soit une plage explicite [start, end] (dates incluses). La plage
+est filtrée sur le champ lui-même (index utilisable) ; un champ DateField
+en fréquence journalière est groupé directement, sans troncature.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count, DateTimeField, F, Sum
+from django.db.models.functions import (
+    TruncDay, TruncMonth, TruncQuarter, TruncWeek, TruncYear,
+)
+from django.utils import timezone
+
+
+# Nombre de tranches affichées par défaut selon la fréquence
+FREQUENCY_PERIODS = {
+    'day': 30,
+    'week': 12,
+    'month': 12,
+    'quarter': 8,
+    'year': 5,
+}
+DEFAULT_PERIODS = 12
+
+# Nombre maximal de tranches d'une plage explicite (10 ans de jours)
+MAX_BUCKETS = 3660
+
+TRUNC_FUNCTIONS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+    'year': TruncYear,
+}
+
+OPERATIONS = ('sum', 'avg', 'count')
+
+
+def truncate(value, frequency):
+    """
+    Ramène une date/datetime locale (naïve) au début de sa tranche.
+    Même découpage que les fonctions Trunc* de Django (semaine ISO = lundi).
+    """
+    day = value.date() if isinstance(value, datetime) else value
+    if frequency == 'day':
+        start = day
+    elif frequency == 'week':
+        start = day - timedelta(days=day.weekday())
+    elif frequency == 'month':
+        start = day.replace(day=1)
+    elif frequency == 'quarter':
+        start = date(day.year, ((day.month - 1) // 3) * 3 + 1, 1)
+    else:  # year
+        start = date(day.year, 1, 1)
+    return datetime.combine(start, time.min)
+
+
+def shift(start, frequency, count):
+    """Décale un début de tranche de `count` tranches (négatif = passé)."""
+    if frequency == 'day':
+        return start + timedelta(days=count)
+    if frequency == 'week':
+        return start + timedelta(weeks=count)
+    months = {'month': 1, 'quarter': 3}.get(frequency, 12) * count
+    month_index = start.year * 12 + (start.month - 1) + months
+    return start.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+
+
+def bucket_starts(frequency, periods=None, now=None):
+    """
+    Retourne les débuts (datetimes locaux naïfs) des `periods` dernières
+    tranches, la tranche courante incluse, du plus ancien au plus récent.
+    """
+    periods = periods or FREQUENCY_PERIODS.get(frequency, DEFAULT_PERIODS)
+    now = now or timezone.now()
+    if timezone.is_aware(now):
+        now = timezone.localtime(now)
+    current = truncate(now, frequency)
+    return [shift(current, frequency, -i) for i in range(periods - 1, -1, -1)]
+
+
+def bucket_window(frequency, periods=None, now=None, start=None, end=None):
+    """
+    Tranches et bornes d'un graphique.
+
+    Sans plage : les `periods` dernières tranches (voir bucket_starts). Avec
+    `end` seul : les `periods` tranches se terminant à `end`. Avec `start` :
+    toutes les tranches de `start` à `end` (aujourd'hui par défaut).
+
+    Args:
+        start, end: Dates (incluses) ou None
+
+    Returns:
+        Tuple (débuts de tranches, borne basse, borne haute exclue), en
+        datetimes locaux naïfs
+
+    Raises:
+        ValueError: start postérieur à end, ou plus de MAX_BUCKETS tranches
+    """
+    if start is None and end is None:
+        starts = bucket_starts(frequency, periods, now)
+        return starts, starts[0], shift(starts[-1], frequency, 1)
+
+    if end is None:
+        end = timezone.localdate(now)
+    upper = datetime.combine(end, time.min) + timedelta(days=1)
+    if start is None:
+        starts = bucket_starts(frequency, periods, datetime.combine(end, time.min))
+        return starts, starts[0], upper
+
+    if start > end:
+        raise ValueError('La date de début est postérieure à la date de fin')
+    lower = datetime.combine(start, time.min)
+    starts = [truncate(lower, frequency)]
+    while shift(starts[-1], frequency, 1) < upper:
+        if len(starts) >= MAX_BUCKETS:
+            raise ValueError(f'Plage trop longue : {MAX_BUCKETS} tranches au plus')
+        starts.append(shift(starts[-1], frequency, 1))
+    return starts, lower, upper
+
+
+def bucket_label(start, frequency):
+    """Libellé affiché sous chaque tranche (identique à l'ancienne API)."""
+    if frequency == 'day':
+        return start.strftime('%d/%m')
+    if frequency == 'week':
+        return f"Sem {start.isocalendar()[1]}"
+    if frequency == 'month':
+        return start.strftime('%m/%Y')
+    if frequency == 'quarter':
+        return f"T{(start.month - 1) // 3 + 1} {start.year}"
+    return str(start.year)
+
+
+def bucket_key(value):
+    """Normalise une valeur renvoyée par Trunc* en datetime local naïf."""
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.replace(tzinfo=None)
+    return datetime.combine(value, time.min)
+
+
+def build_aggregate(operation, field_name):
+    """Expression d'agrégat Django pour une opération sum/avg/count."""
+    if operation == 'sum':
+        return Sum(field_name)
+    if operation == 'avg':
+        return Avg(field_name)
+    # count (et opérations inconnues) : nombre de lignes de la tranche
+    return Count('pk')
+
+
+def _make_bound(value, field):
+    """Convertit une borne locale naïve pour la comparer au champ en base."""
+    if not isinstance(field, DateTimeField):
+        return value.date()
+    if settings.USE_TZ:
+        return timezone.make_aware(value)
+    return value
+
+
+def bucket_queryset(queryset, date_field, frequency, aggregates, start, end):
+    """
+    Construit la requête groupée par tranche sur [start, end[.
+
+    Args:
+        queryset: QuerySet de base (filtres éventuels déjà appliqués)
+        date_field: Champ date/datetime servant d'axe temporel
+        frequency: day, week, month, quarter ou year
+        aggregates: Dict {alias: expression d'agrégat}
+        start, end: Bornes (datetimes locaux naïfs)
+    """
+    field = queryset.model._meta.get_field(date_field)
+    if frequency == 'day' and not isinstance(field, DateTimeField):
+        # Un DateField est déjà au jour : GROUP BY sur la colonne indexée
+        bucket = F(date_field)
+    else:
+        bucket = TRUNC_FUNCTIONS.get(frequency, TruncYear)(date_field)
+    return (
+        queryset
+        .filter(**{
+            f'{date_field}__gte': _make_bound(start, field),
+            f'{date_field}__lt': _make_bound(end, field),
+        })
+        .annotate(_bucket=bucket)
+        .order_by()  # Neutralise Meta.ordering qui casserait le GROUP BY
+        .values('_bucket')
+        .annotate(**aggregates)
+    )
+
+
+def _collect_buckets(rows):
+    """Dict {début de tranche (datetime naïf): {alias: valeur}} depuis les lignes groupées."""
+    results = {}
+    for row in rows:
+        bucket = row.pop('_bucket')
+        if bucket is None:
+            continue
+        results[bucket_key(bucket)] = row
+    return results
+
+
+def aggregate_by_bucket(queryset, date_field, frequency, aggregates, start, end):
+    """
+    Exécute UNE requête groupée par tranche sur [start, end[ (voir bucket_queryset).
+
+    Returns:
+        Dict {début de tranche (datetime naïf): {alias: valeur}}
+    """
+    return _collect_buckets(bucket_queryset(queryset, date_field, frequency, aggregates, start, end))
+
+
+async def aaggregate_by_bucket(queryset, date_field, frequency, aggregates, start, end):
+    """Version asynchrone de aggregate_by_bucket (ORM asynchrone)."""
+    rows = bucket_queryset(queryset, date_field, frequency, aggregates, start, end)
+    return _collect_buckets([row async for row in rows])
+
+
+def _metric_key(field_name, operation):
+    # Un seul COUNT par requête, quel que soit le champ demandé
+    return ('count', None) if operation not in ('sum', 'avg') else (operation, field_name)
+
+
+def _series_aggregates(metrics):
+    """Alias et expressions d'agrégat partagés par les séries de `metrics`."""
+    aliases = {}
+    aggregates = {}
+    for field_name, operation in metrics:
+        key = _metric_key(field_name, operation)
+        if key not in aliases:
+            aliases[key] = f'value_{len(aliases)}'
+            aggregates[aliases[key]] = build_aggregate(operation, field_name)
+    return aliases, aggregates
+
+
+def _build_series(metrics, aliases, buckets, starts, frequency):
+    labels = [bucket_label(start, frequency) for start in starts]
+    series = []
+    for field_name, operation in metrics:
+        key = _metric_key(field_name, operation)
+        cast = int if operation not in ('sum', 'avg') else float
+        series.append({
+            'labels': list(labels),
+            'data': [cast((buckets.get(start) or {}).get(aliases[key]) or 0) for start in starts],
+        })
+    return series
+
+
+def chart_series_many(queryset, metrics, frequency='month', date_field='created_at',
+                      periods=None, now=None, start=None, end=None):
+    """
+    Calcule plusieurs séries sur la même fenêtre en UNE requête groupée
+    (ex: somme et nombre de Order.total_amount dans le même GROUP BY).
+
+    Args:
+        metrics: Liste de tuples (champ, opération)
+        start, end: Plage explicite (dates incluses), voir bucket_window
+
+    Returns:
+        Liste de dicts {'labels': [...], 'data': [...]}, dans l'ordre de `metrics`
+    """
+    starts, lower, upper = bucket_window(frequency, periods, now, start, end)
+    aliases, aggregates = _series_aggregates(metrics)
+    buckets = aggregate_by_bucket(queryset, date_field, frequency, aggregates, lower, upper)
+    return _build_series(metrics, aliases, buckets, starts, frequency)
+
+
+async def achart_series_many(queryset, metrics, frequency='month', date_field='created_at',
+                             periods=None, now=None, start=None, end=None):
+    """Version asynchrone de chart_series_many (ORM asynchrone)."""
+    starts, lower, upper = bucket_window(frequency, periods, now, start, end)
+    aliases, aggregates = _series_aggregates(metrics)
+    buckets = await aaggregate_by_bucket(queryset, date_field, frequency, aggregates, lower, upper)
+    return _build_series(metrics, aliases, buckets, starts, frequency)
+
+
+def chart_series(queryset, field_name, frequency='month', operation='sum',
+                 date_field='created_at', periods=None, now=None, start=None, end=None):
+    """
+    Calcule la série complète d'un graphique en une seule requête.
+
+    Returns:
+        Dict {'labels': [...], 'data': [...]} avec une valeur par tranche,
+        les tranches sans données valant 0.
+    """
+    return chart_series_many(
+        queryset, [(field_name, operation)], frequency, date_field, periods, now, start, end,
+    )[0]
+
+
+async def achart_series(queryset, field_name, frequency='month', operation='sum',
+                        date_field='created_at', periods=None, now=None, start=None, end=None):
+    """Version asynchrone de chart_series (ORM asynchrone)."""
+    return (await achart_series_many(
+        queryset, [(field_name, operation)], frequency, date_field, periods, now, start, end,
+    ))[0]
+
+
+def empty_series(frequency='month', periods=None, now=None, start=None, end=None):
+    """Série à zéro sur la fenêtre demandée (champ non agrégeable)."""
+    starts = bucket_window(frequency, periods, now, start, end)[0]
+    return {
+        'labels': [bucket_label(start, frequency) for start in starts],
+        'data': [0] * len(starts),
+    }
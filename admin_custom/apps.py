@@ -26,6 +26,31 @@ class AdminCustomConfig(AppConfig):
         """
         from django.conf import settings
         
+        # Catalogue des modèles et de leurs champs (index utilisé par les APIs)
+        from .model_catalog import model_catalog
+        model_catalog.build()
+        
+        # Maintenance incrémentale des agrégats journaliers (ADMIN_CUSTOM['ROLLUPS'])
+        from .rollups import connect_signals as connect_rollup_signals
+        connect_rollup_signals()
+        
+        # Index de recherche des listes admin (ADMIN_CUSTOM['SEARCH'])
+        from .search import connect_signals as connect_search_signals
+        connect_search_signals()
+        
+        # Invalidation du cache des APIs à chaque écriture
+        from .cache import connect_signals as connect_cache_signals
+        connect_cache_signals()
+        
+        # Index de préfixes de l'autocomplétion (après le cache : génération à jour)
+        from .autocomplete import connect_signals as connect_autocomplete_signals
+        connect_autocomplete_signals()
+        
+        # Temps de rendu des templates pour InstrumentationMiddleware
+        from .instrumentation import get_instrumentation_config, instrument_templates
+        if get_instrumentation_config().get('ENABLED', True):
+            instrument_templates()
+        
         # Vérifier si l'auto-découverte est activée
         admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
         auto_discover = admin_custom_config.get('AUTO_DISCOVER', False)
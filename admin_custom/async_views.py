@@ -0,0 +1,179 @@
+"""
+Variantes asynchrones (ASGI) des APIs graphiques, grilles et statistiques
+
+Sous ASGI, une vue synchrone occupe un thread pendant toutes ses requêtes
+SQL. Ces vues utilisent l'ORM asynchrone (itération asynchrone du QuerySet)
+pour les lectures uniques et lancent les agrégations indépendantes (groupes
+de graphiques, modèles des statistiques) en parallèle avec asyncio.gather,
+chacune dans un thread de travail avec sa propre connexion (voir workers.py).
+
+Mêmes paramètres, mêmes réponses et même cache que les vues de views.py.
+Les routes de urls.py servent automatiquement la variante asynchrone quand
+la requête est traitée par le gestionnaire ASGI (boucle d'événements active
+pendant la résolution de l'URL) :
+
+    # settings.py
+    ADMIN_CUSTOM = {
+        'ASYNC_VIEWS': True,  # défaut ; False force les vues synchrones
+    }
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldError
+from django.db import DatabaseError
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.urls import URLPattern
+from django.urls.resolvers import RoutePattern
+from django.utils.log import log_response
+
+from . import views
+from .aggregation import achart_series, empty_series
+from .cache import cache_response
+from .grid_query import DEFAULT_PAGE_SIZE, GridQueryError, apaginate
+from .rollups import rollup_chart_series
+from .stats import DEFAULT_MAX_WORKERS, acollect_stats, get_stats_config
+from .workers import gather_in_workers
+
+
+def require_GET(view):
+    """require_http_methods(["GET"]) pour une vue asynchrone (non gérée par Django 4.2)."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            response = HttpResponseNotAllowed(['GET'])
+            log_response('Method Not Allowed (%s): %s', request.method, request.path,
+                         response=response, request=request)
+            return response
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@require_GET
+@cache_response('chart_data', views._requested_model)
+async def chart_data(request):
+    """Variante asynchrone de views.chart_data"""
+    params, error = views._chart_request(request)
+    if error:
+        return error
+    model_class = params['model_class']
+    frequency = params['frequency']
+    window = {'date_field': params['date_field'], 'start': params['start'], 'end': params['end']}
+
+    try:
+        series = await sync_to_async(rollup_chart_series)(
+            model_class, params['field_name'], frequency=frequency, operation=params['operation'], **window,
+        ) or await achart_series(
+            model_class.objects.all(), params['field_name'],
+            frequency=frequency, operation=params['operation'], **window,
+        )
+    except (FieldError, DatabaseError, TypeError, ValueError):
+        series = empty_series(frequency, start=params['start'], end=params['end'])
+
+    return views._chart_response(params, series)
+
+
+def _group_series(group):
+    key, specs = group
+    return views._batch_series(*key, specs)
+
+
+@require_GET
+@cache_response('chart_batch', views._batch_models)
+async def chart_batch(request):
+    """
+    Variante asynchrone de views.chart_batch : les groupes (modèle, fréquence,
+    axe temporel) et les statistiques sont calculés en parallèle.
+    """
+    try:
+        specs = await sync_to_async(views._batch_specs)(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    charts, groups = views._batch_groups(specs)
+    limit = get_stats_config().get('MAX_WORKERS', DEFAULT_MAX_WORKERS)
+    tasks = [gather_in_workers(_group_series, list(groups.items()), limit)]
+    if request.GET.get('stats'):
+        tasks.append(acollect_stats())
+    results = await asyncio.gather(*tasks)
+
+    for group, series in zip(groups.values(), results[0]):
+        views._add_batch_series(charts, group, series)
+
+    payload = {'charts': charts}
+    if request.GET.get('stats'):
+        payload['stats'] = results[1].legacy()
+    return JsonResponse(payload)
+
+
+@views.grid_access_required
+@require_GET
+@cache_response('grid_data', views._requested_model_and_relations)
+async def grid_data(request):
+    """Variante asynchrone de views.grid_data (page lue par itération asynchrone)"""
+    model_class, columns, grid, error = await sync_to_async(views._grid_request)(request)
+    if error:
+        return error
+
+    sort = request.GET.get('sort', '')
+    try:
+        queryset, plan = views._grid_queryset(request, model_class, columns, grid)
+        rows, next_cursor = await apaginate(
+            queryset, sort, request.GET.get('cursor'), request.GET.get('page_size') or DEFAULT_PAGE_SIZE,
+        )
+    except (GridQueryError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if plan.use_values:
+        data = [plan.render_row(row) for row in rows]
+    else:
+        # Les propriétés Python des instances peuvent lancer des requêtes
+        data = await sync_to_async(lambda: [plan.render_row(row) for row in rows])()
+    return views._grid_response(columns, sort, data, next_cursor)
+
+
+@require_GET
+@cache_response('stats_data', views._stats_models)
+async def stats_data(request):
+    """Variante asynchrone de views.stats_data (une requête par modèle, en parallèle)"""
+    return JsonResponse((await acollect_stats()).legacy())
+
+
+# ---------------------------------------------------------------------------
+# Routage : variante synchrone sous WSGI, asynchrone sous ASGI
+# ---------------------------------------------------------------------------
+
+def async_views_enabled():
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    return admin_custom_config.get('ASYNC_VIEWS', True)
+
+
+def _serving_asgi():
+    """Vrai pendant la résolution d'URL du gestionnaire ASGI (boucle d'événements active)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class DualURLPattern(URLPattern):
+    """
+    URLPattern dont la vue résolue dépend du gestionnaire : la vue synchrone
+    sous WSGI, sa variante asynchrone sous ASGI. reverse() est inchangé.
+    """
+    def __init__(self, pattern, callback, async_callback, default_args=None, name=None):
+        super().__init__(pattern, callback, default_args, name)
+        self.async_pattern = URLPattern(pattern, async_callback, default_args, name)
+
+    def resolve(self, path):
+        if async_views_enabled() and _serving_asgi():
+            return self.async_pattern.resolve(path)
+        return super().resolve(path)
+
+
+def dual_path(route, view, async_view, name=None):
+    """path() servant `view` sous WSGI et `async_view` sous ASGI."""
+    return DualURLPattern(RoutePattern(route, name=name, is_endpoint=True), view, async_view, name=name)
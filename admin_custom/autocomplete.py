@@ -0,0 +1,287 @@
+"""
+Autocomplétion des clés étrangères par index de préfixes en mémoire
+
+Un <select> de clé étrangère embarque une <option> par objet lié : des
+milliers d'utilisateurs, de produits ou de factures dans chaque formulaire
+(et dans chaque ligne d'inline). Pour les modèles configurés, une liste
+triée (valeur normalisée, clé primaire) est construite en mémoire à la
+première lecture ; une recherche par préfixe est une bisection suivie
+d'une lecture des `limit` entrées suivantes.
+
+    - API : /admin_custom/api/autocomplete/?model=sales.Order&q=CMD-00&limit=20
+    - widget : AutocompleteWidget, choisi automatiquement par les admins
+      modernes (ModernTemplateMixin, ModernInlineMixin) pour les clés
+      étrangères vers un modèle configuré de plus de THRESHOLD objets
+      (estimation de la base ou requête bornée : l'index n'est construit
+      qu'à la première recherche de l'API)
+
+Configuration :
+
+    # settings.py
+    ADMIN_CUSTOM = {
+        'AUTOCOMPLETE': {
+            'THRESHOLD': 100,   # défaut : widget au-delà de ce nombre d'objets
+            'LIMIT': 20,        # suggestions par défaut (50 au plus)
+            'MODELS': {
+                'auth.User': 'username',
+                'catalog.Product': 'sku',
+                'sales.Order': 'order_number',
+            },
+        },
+    }
+
+L'index est maintenu par les signaux post_save/post_delete (après le
+commit de la transaction). Il est propre à chaque processus : une écriture
+d'un autre processus change la génération du modèle dans le cache des APIs
+(voir cache.py) et l'index est reconstruit à la lecture suivante. Les
+écritures en masse sans signaux ne sont vues qu'à cette reconstruction.
+"""
+import logging
+import threading
+from bisect import bisect_left, insort
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+
+from .cache import result_cache
+from .counts import estimated_count
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 100
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+_config = None
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_autocomplete_config():
+    """
+    Retourne la configuration normalisée :
+    {'threshold', 'limit', 'models': {label_lower: (modèle, champ)}}
+    """
+    global _config
+    if _config is not None:
+        return _config
+
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    raw = admin_custom_config.get('AUTOCOMPLETE', {})
+    models = {}
+    for label, field_name in raw.get('MODELS', {}).items():
+        try:
+            model = apps.get_model(label)
+            model._meta.get_field(field_name)
+        except (LookupError, ValueError):
+            logger.warning(f"Autocomplétion : '{label}.{field_name}' inconnu, ignoré")
+            continue
+        models[model._meta.label_lower] = (model, field_name)
+    _config = {
+        'threshold': raw.get('THRESHOLD', DEFAULT_THRESHOLD),
+        'limit': min(raw.get('LIMIT', DEFAULT_LIMIT), MAX_LIMIT),
+        'models': models,
+    }
+    return _config
+
+
+def reset_autocomplete_config():
+    """Force la relecture de settings.ADMIN_CUSTOM['AUTOCOMPLETE'] et vide les index (tests)."""
+    global _config
+    _config = None
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def _normalize(value):
+    return str(value).casefold()
+
+
+class PrefixIndex:
+    """Valeurs d'un champ triées pour la recherche par préfixe (un index par modèle et par processus)."""
+
+    def __init__(self, model, field_name):
+        self.model = model
+        self.field_name = field_name
+        self._lock = threading.Lock()
+        self._keys = None       # [(valeur normalisée, pk)] triée
+        self._values = {}       # pk -> valeur affichée
+        self._generation = None
+
+    def _current_generation(self):
+        if not result_cache.enabled:
+            return None
+        return result_cache.get_generations([self.model])[self.model._meta.label_lower]
+
+    def _ensure(self):
+        """Construit l'index, ou le reconstruit si un autre processus a écrit depuis."""
+        generation = self._current_generation()
+        if self._keys is not None and generation == self._generation:
+            return
+        rows = self.model._default_manager.exclude(**{f'{self.field_name}__isnull': True}).values_list(
+            'pk', self.field_name,
+        ).iterator(chunk_size=5000)
+        values = {pk: str(value) for pk, value in rows}
+        self._keys = sorted((_normalize(value), pk) for pk, value in values.items())
+        self._values = values
+        self._generation = generation
+
+    def __len__(self):
+        with self._lock:
+            self._ensure()
+            return len(self._keys)
+
+    def lookup(self, prefix, limit=DEFAULT_LIMIT):
+        """[(pk, valeur)] des valeurs commençant par `prefix` (sans casse), dans l'ordre alphabétique."""
+        prefix = _normalize(prefix)
+        with self._lock:
+            self._ensure()
+            keys = self._keys
+            results = []
+            for position in range(bisect_left(keys, (prefix,)), len(keys)):
+                key, pk = keys[position]
+                if not key.startswith(prefix) or len(results) >= limit:
+                    break
+                results.append((pk, self._values[pk]))
+            return results
+
+    def label(self, pk, build=True):
+        """
+        Valeur affichée de l'objet `pk`, ou None. build=False : seulement si
+        l'index est déjà construit et à jour (sinon None, sans le construire).
+        """
+        with self._lock:
+            if build:
+                self._ensure()
+            elif self._keys is None or self._current_generation() != self._generation:
+                return None
+            return self._values.get(pk)
+
+    def _discard(self, pk):
+        value = self._values.pop(pk, None)
+        if value is None:
+            return
+        key = (_normalize(value), pk)
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def update(self, pk, value):
+        """Applique l'écriture d'un objet (value None : supprimé) à un index déjà construit."""
+        with self._lock:
+            if self._keys is None:
+                return
+            self._discard(pk)
+            if value is not None:
+                value = str(value)
+                self._values[pk] = value
+                insort(self._keys, (_normalize(value), pk))
+            # Écriture de ce processus : la génération qu'elle a produite est prise en compte
+            self._generation = self._current_generation()
+
+
+def get_index(model):
+    """Index de préfixes du modèle, ou None s'il n'est pas configuré."""
+    label = model._meta.label_lower
+    entry = get_autocomplete_config()['models'].get(label)
+    if entry is None:
+        return None
+    with _indexes_lock:
+        if label not in _indexes:
+            _indexes[label] = PrefixIndex(*entry)
+        return _indexes[label]
+
+
+def _on_post_save(sender, instance, raw=False, **kwargs):
+    index = None if raw else get_index(sender)
+    if index is not None:
+        pk, value = instance.pk, getattr(instance, index.field_name)
+        transaction.on_commit(lambda: index.update(pk, value))
+
+
+def _on_post_delete(sender, instance, **kwargs):
+    index = get_index(sender)
+    if index is not None:
+        pk = instance.pk
+        transaction.on_commit(lambda: index.update(pk, None))
+
+
+def connect_signals():
+    """Maintient les index des modèles configurés (à brancher après le cache : génération déjà incrémentée)."""
+    for label, (model, field_name) in get_autocomplete_config()['models'].items():
+        uid = f'admin_custom_autocomplete_{label}'
+        post_save.connect(_on_post_save, sender=model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(_on_post_delete, sender=model, dispatch_uid=f'{uid}_post_delete')
+
+
+# ---------------------------------------------------------------------------
+# Widget
+# ---------------------------------------------------------------------------
+
+class AutocompleteWidget(forms.Widget):
+    """
+    Champ texte à suggestions (API autocomplete) et champ caché portant la
+    clé primaire : aucune <option> n'est rendue.
+    """
+    template_name = 'admin_custom/widgets/autocomplete.html'
+    choices = ()  # Renseigné par ModelChoiceField, jamais parcouru
+
+    class Media:
+        js = ['admin_custom/js/autocomplete.js']
+
+    def __init__(self, model, attrs=None):
+        super().__init__(attrs)
+        self.model = model
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value not in (None, ''):
+            try:
+                pk = self.model._meta.pk.to_python(value)
+            except ValidationError:
+                pk = None
+            if pk is not None:
+                index = get_index(self.model)
+                # Index pas encore construit : une ligne lue plutôt que toute la table
+                label = index.label(pk, build=False) or self.model._default_manager.filter(pk=pk).values_list(
+                    index.field_name, flat=True,
+                ).first() or ''
+        context['widget'].update({
+            'url': reverse('admin_custom:autocomplete'),
+            'model': self.model._meta.label_lower,
+            'label': label,
+        })
+        return context
+
+
+def has_at_least(model, count):
+    """
+    Au moins `count` objets ? Estimation de l'optimiseur si la base en
+    fournit une (voir counts.py), sinon requête bornée (LIMIT 1 OFFSET
+    count - 1) : jamais de parcours ni de chargement de toute la table.
+    """
+    if count <= 0:
+        return True
+    estimate = estimated_count(model)
+    if estimate is not None:
+        return estimate >= count
+    return model._default_manager.order_by()[count - 1:count].exists()
+
+
+def autocomplete_widget(db_field):
+    """
+    AutocompleteWidget pour la clé étrangère `db_field` si son modèle est
+    configuré et compte plus de THRESHOLD objets, sinon None.
+    """
+    remote = db_field.remote_field
+    if remote.limit_choices_to or remote.field_name != remote.model._meta.pk.name:
+        return None
+    if get_index(remote.model) is None or not has_at_least(remote.model, get_autocomplete_config()['threshold']):
+        return None
+    return AutocompleteWidget(remote.model)
@@ -10,6 +10,8 @@ from django.contrib import admin
 from django.conf import settings
 from django.utils.module_loading import autodiscover_modules
 
+from .model_catalog import model_catalog
+
 
 def autodiscover_models(custom_admin_site=None, exclude_apps=None, exclude_models=None):
     """
@@ -152,6 +154,9 @@ def autodiscover_models(custom_admin_site=None, exclude_apps=None, exclude_model
                 # Ignorer les erreurs silencieusement
                 pass
     
+    # Reconstruire le catalogue de modèles (index nom → modèle, champs par type)
+    model_catalog.build()
+    
     return custom_admin_site, registered_count
 
 
@@ -159,61 +164,13 @@ def get_all_models_for_charts():
     """
     Retourne tous les modèles disponibles pour les graphiques.
     Utile pour l'auto-complétion dans l'interface.
+    Les listes sont pré-calculées par le catalogue de modèles.
     """
-    models_list = []
-    
-    for app_config in apps.get_app_configs():
-        if app_config.name.startswith('django.contrib'):
-            continue
-        
-        for model in app_config.get_models():
-            if model._meta.abstract or model._meta.proxy:
-                continue
-            
-            # Détecter les champs numériques
-            numeric_fields = []
-            for field in model._meta.get_fields():
-                if hasattr(field, 'name'):
-                    try:
-                        field_obj = model._meta.get_field(field.name)
-                        if hasattr(field_obj, 'get_internal_type'):
-                            field_type = field_obj.get_internal_type()
-                            if field_type in ['DecimalField', 'FloatField', 'IntegerField', 
-                                             'PositiveIntegerField', 'BigIntegerField', 'SmallIntegerField']:
-                                numeric_fields.append(field.name)
-                    except Exception:
-                        # Ignorer les champs qui ne peuvent pas être inspectés
-                        continue
-            
-            if numeric_fields:
-                models_list.append({
-                    'name': model.__name__,
-                    'label': model._meta.verbose_name.title(),
-                    'app': model._meta.app_label,
-                    'fields': numeric_fields,
-                })
-    
-    return models_list
+    return model_catalog.chart_models()
 
 
 def get_all_models_for_grids():
     """
     Retourne tous les modèles disponibles pour les grilles.
     """
-    models_list = []
-    
-    for app_config in apps.get_app_configs():
-        if app_config.name.startswith('django.contrib'):
-            continue
-        
-        for model in app_config.get_models():
-            if model._meta.abstract or model._meta.proxy:
-                continue
-            
-            models_list.append({
-                'name': model.__name__,
-                'label': model._meta.verbose_name.title(),
-                'app': model._meta.app_label,
-            })
-    
-    return models_list
+    return model_catalog.grid_models()
@@ -0,0 +1,310 @@
+"""
+Cache des résultats des APIs JSON (graphiques, grilles, statistiques, champs)
+
+Les réponses sont stockées dans le framework de cache Django sous une clé
+construite à partir des paramètres normalisés de la requête et des
+compteurs de génération des modèles interrogés. Chaque post_save/post_delete
+incrémente la génération du modèle concerné au commit de la transaction
+(après le rafraîchissement des rollups) : les entrées qui en dépendent ne
+sont plus jamais relues et expirent d'elles-mêmes.
+
+Configuration :
+
+    # settings.py
+    ADMIN_CUSTOM = {
+        'CACHE': {
+            'ENABLED': True,
+            'ALIAS': 'default',          # entrée de settings.CACHES
+            'KEY_PREFIX': 'admin_custom',
+            'TTL': {                     # secondes, par API
+                'chart_data': 300,
+                'chart_batch': 300,
+                'grid_data': 60,
+                'stats_data': 120,
+                'model_fields': 3600,
+                'app_list': 300,         # sidebar / liste des applications
+            },
+        },
+    }
+
+La liste des applications de l'admin (sidebar) est mise en cache par
+utilisateur ; les changements de groupes et de permissions (m2m compris)
+l'invalident.
+
+Limite : QuerySet.update(), bulk_create() et le SQL brut n'envoient pas de
+signaux ; les entrées concernées restent servies jusqu'à leur TTL.
+"""
+import hashlib
+import json
+import threading
+import time
+from functools import partial, wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .instrumentation import current_metrics
+from .model_catalog import INTERNAL_MODELS
+
+
+DEFAULT_TTL = {
+    'chart_data': 300,
+    'chart_batch': 300,
+    'grid_data': 60,
+    'stats_data': 120,
+    'model_fields': 3600,
+    'app_list': 300,
+}
+DEFAULT_TIMEOUT = 300
+
+# Applications dont les écritures n'invalident rien (sessions, journal admin...)
+IGNORED_APP_LABELS = {'admin', 'sessions', 'contenttypes'}
+
+# Valeurs par défaut des paramètres : ?frequency=month et rien sont la même requête
+PARAM_DEFAULTS = {
+    'chart_data': {'type': 'line', 'frequency': 'month', 'operation': 'sum'},
+}
+
+
+class ResultCache:
+    """
+    Cache des réponses des APIs avec invalidation par génération de modèle
+    et compteurs de succès/échecs par API (par processus).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    # Configuration -----------------------------------------------------
+
+    @property
+    def config(self):
+        admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+        return admin_custom_config.get('CACHE', {})
+
+    @property
+    def enabled(self):
+        return self.config.get('ENABLED', True)
+
+    @property
+    def backend(self):
+        return caches[self.config.get('ALIAS', 'default')]
+
+    @property
+    def prefix(self):
+        return self.config.get('KEY_PREFIX', 'admin_custom')
+
+    def get_ttl(self, endpoint):
+        ttl = {**DEFAULT_TTL, **self.config.get('TTL', {})}
+        return ttl.get(endpoint, DEFAULT_TIMEOUT)
+
+    # Générations -------------------------------------------------------
+
+    def _generation_key(self, model):
+        return f'{self.prefix}:gen:{model._meta.label_lower}'
+
+    def get_generations(self, models):
+        """
+        Retourne {label: génération}. Une génération absente (jamais écrite ou
+        évincée) est initialisée à l'horodatage courant pour ne jamais
+        retomber sur une ancienne valeur.
+        """
+        keys = {self._generation_key(model): model._meta.label_lower for model in models}
+        found = self.backend.get_many(list(keys))
+        for key in keys:
+            if key not in found:
+                self.backend.add(key, time.time_ns(), timeout=None)
+                found[key] = self.backend.get(key)
+        return {label: found[key] for key, label in keys.items()}
+
+    def bump(self, model):
+        """Invalide toutes les entrées dépendant du modèle."""
+        key = self._generation_key(model)
+        try:
+            self.backend.incr(key)
+        except ValueError:
+            self.backend.set(key, time.time_ns(), timeout=None)
+
+    # Clés et lecture/écriture -----------------------------------------
+
+    def normalize_params(self, endpoint, params):
+        """
+        Normalise les paramètres GET : valeurs par défaut retirées, modèle
+        résolu vers son label, filtres JSON triés, clés triées.
+        """
+        from .views import get_model_class
+
+        defaults = PARAM_DEFAULTS.get(endpoint, {})
+        normalized = {}
+        for name in sorted(params):
+            values = [value for value in params.getlist(name) if value != '']
+            if not values:
+                continue
+            if name == 'model':
+                model = get_model_class(values[0])
+                values = [model._meta.label_lower if model else values[0].lower()]
+            elif name == 'filters':
+                try:
+                    values = [json.dumps(json.loads(values[0]), sort_keys=True)]
+                except ValueError:
+                    pass
+            if len(values) == 1 and defaults.get(name) == values[0]:
+                continue
+            normalized[name] = values if len(values) > 1 or name == 'columns' else values[0]
+        return normalized
+
+    def make_key(self, endpoint, params, models=()):
+        payload = {
+            'endpoint': endpoint,
+            'params': self.normalize_params(endpoint, params),
+            'generations': self.get_generations(models),
+            # Les fenêtres des graphiques glissent chaque jour
+            'today': timezone.localdate().isoformat(),
+        }
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        return f'{self.prefix}:result:{endpoint}:{digest}'
+
+    def _count(self, endpoint, outcome):
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counters[outcome] += 1
+
+    def get(self, endpoint, key):
+        value = self.backend.get(key)
+        self._count(endpoint, 'misses' if value is None else 'hits')
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.note_cache(value is not None)
+        return value
+
+    def set(self, endpoint, key, value):
+        self.backend.set(key, value, timeout=self.get_ttl(endpoint))
+
+    # Statistiques ------------------------------------------------------
+
+    def stats(self):
+        """Compteurs par API : {'chart_data': {'hits', 'misses', 'hit_rate'}, ...}"""
+        with self._lock:
+            report = {}
+            for endpoint, counters in self._counters.items():
+                total = counters['hits'] + counters['misses']
+                report[endpoint] = {
+                    **counters,
+                    'hit_rate': round(counters['hits'] / total, 4) if total else 0.0,
+                }
+            return report
+
+    def reset_stats(self):
+        with self._lock:
+            self._counters.clear()
+
+
+# Instance globale du cache de résultats
+result_cache = ResultCache()
+
+
+def cache_response(endpoint, dependencies):
+    """
+    Décorateur de vue JSON : sert la réponse depuis le cache si possible.
+
+    Args:
+        endpoint: Nom de l'API (clé de TTL et de statistiques)
+        dependencies: Fonction request -> liste des modèles dont dépend la réponse
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return _async_cache_wrapper(view, endpoint, dependencies)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not result_cache.enabled:
+                return view(request, *args, **kwargs)
+
+            key = result_cache.make_key(endpoint, request.GET, dependencies(request))
+            content = result_cache.get(endpoint, key)
+            if content is not None:
+                response = HttpResponse(content, content_type='application/json')
+                response['X-Admin-Custom-Cache'] = 'HIT'
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                result_cache.set(endpoint, key, response.content)
+            response['X-Admin-Custom-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def _async_cache_wrapper(view, endpoint, dependencies):
+    """cache_response pour une vue asynchrone : lecture/écriture du cache hors de la boucle."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not result_cache.enabled:
+            return await view(request, *args, **kwargs)
+
+        key = await sync_to_async(
+            lambda: result_cache.make_key(endpoint, request.GET, dependencies(request))
+        )()
+        content = await sync_to_async(result_cache.get)(endpoint, key)
+        if content is not None:
+            response = HttpResponse(content, content_type='application/json')
+            response['X-Admin-Custom-Cache'] = 'HIT'
+            return response
+
+        response = await view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            await sync_to_async(result_cache.set)(endpoint, key, response.content)
+        response['X-Admin-Custom-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+
+def _on_model_change(sender, using='default', **kwargs):
+    # Au commit : incrémentée avant, la génération laisserait une requête
+    # concurrente mettre en cache les anciennes lignes sous la nouvelle
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(partial(result_cache.bump, sender), using=using)
+
+
+def _on_permissions_change(sender, action, using='default', **kwargs):
+    from django.contrib.auth.models import Permission
+
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(partial(result_cache.bump, Permission), using=using)
+
+
+def connect_signals():
+    """
+    Invalide les entrées du cache à chaque écriture d'un modèle. À brancher
+    après les rollups : leurs callbacks on_commit passent avant l'incrément.
+    Branché modèle par modèle : un récepteur global désactiverait les
+    suppressions rapides (fast delete) de Django pour toutes les tables.
+    """
+    for model in apps.get_models():
+        if model._meta.app_label in IGNORED_APP_LABELS or model._meta.label_lower in INTERNAL_MODELS:
+            continue
+        uid = f'admin_custom_cache_{model._meta.label_lower}'
+        post_save.connect(_on_model_change, sender=model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(_on_model_change, sender=model, dispatch_uid=f'{uid}_post_delete')
+
+    # Groupes et permissions des utilisateurs : listes d'applications en cache
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import Group
+
+    user_model = get_user_model()
+    relations = [Group.permissions]
+    relations += [getattr(user_model, name) for name in ('groups', 'user_permissions') if hasattr(user_model, name)]
+    for relation in relations:
+        through = relation.through
+        m2m_changed.connect(
+            _on_permissions_change, sender=through,
+            dispatch_uid=f'admin_custom_cache_{through._meta.label_lower}_m2m',
+        )
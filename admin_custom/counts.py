@@ -0,0 +1,134 @@
+"""
+Nombres de lignes approximatifs pour les grandes tables
+
+Un COUNT(*) exact parcourt toute la table. Pour les modèles configurés, le
+nombre de lignes est lu dans les statistiques de l'optimiseur :
+
+    - PostgreSQL : pg_class.reltuples (mis à jour par VACUUM / ANALYZE)
+    - SQLite : sqlite_stat1 (mis à jour par ANALYZE)
+
+Sous le seuil, ou quand la base ne fournit pas d'estimation (autre moteur,
+table jamais analysée), le comptage exact est conservé.
+
+Configuration (désactivé par défaut) :
+
+    # settings.py
+    ADMIN_CUSTOM = {
+        'APPROXIMATE_COUNTS': {
+            'THRESHOLD': 100000,  # estimation utilisée au-delà de ce nombre de lignes
+            'MODELS': {
+                'sales.Order': {},
+                'sales.Payment': {'threshold': 500000},
+            },
+        },
+    }
+
+Une simple liste de labels (['sales.Order', ...]) est aussi acceptée.
+"""
+import logging
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, router
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 100000
+
+
+def get_count_config():
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    return admin_custom_config.get('APPROXIMATE_COUNTS', {})
+
+
+def get_count_options(model):
+    """Options du modèle ({'threshold': ...}) ou None s'il n'est pas configuré."""
+    config = get_count_config()
+    models = config.get('MODELS', {})
+    if isinstance(models, (list, tuple)):
+        models = {label: {} for label in models}
+    models = {label.lower(): options for label, options in models.items()}
+
+    label = model._meta.label_lower
+    if label not in models:
+        return None
+    options = models[label] or {}
+    return {'threshold': options.get('threshold', config.get('THRESHOLD', DEFAULT_THRESHOLD))}
+
+
+def estimated_count(model):
+    """
+    Nombre de lignes estimé par l'optimiseur de la base, ou None si
+    aucune estimation n'est disponible.
+    """
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)'
+        params = [connection.ops.quote_name(table)]
+    elif connection.vendor == 'sqlite':
+        # La première valeur de `stat` est le nombre de lignes de la table
+        sql = "SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s LIMIT 1"
+        params = [table]
+    else:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        # sqlite_stat1 n'existe qu'après un premier ANALYZE
+        logger.debug(f"Pas d'estimation du nombre de lignes pour {table}")
+        return None
+    if row is None or row[0] is None or row[0] < 0:
+        # reltuples vaut -1 tant que la table n'a jamais été analysée
+        return None
+    return int(row[0])
+
+
+def approximate_count(model, exact=None):
+    """
+    Retourne (nombre de lignes, approximatif?) pour un modèle.
+
+    Args:
+        model: Classe du modèle
+        exact: Fonction de comptage exact (défaut : model.objects.count)
+    """
+    exact = exact or model._default_manager.count
+    options = get_count_options(model)
+    if options is None:
+        return exact(), False
+    estimate = estimated_count(model)
+    if estimate is None or estimate < options['threshold']:
+        return exact(), False
+    return estimate, True
+
+
+def is_unfiltered(queryset):
+    """Vrai si le QuerySet compte toute la table (ni filtre, ni DISTINCT, ni LIMIT)."""
+    query = queryset.query
+    return (
+        not query.where
+        and not query.distinct
+        and not query.combinator
+        and query.low_mark == 0
+        and query.high_mark is None
+    )
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator dont le nombre total vient de approximate_count() quand la
+    liste n'est pas filtrée. `approximate` indique si le total est estimé.
+    """
+    approximate = False
+
+    @cached_property
+    def count(self):
+        object_list = self.object_list
+        if hasattr(object_list, 'query') and is_unfiltered(object_list):
+            count, self.approximate = approximate_count(object_list.model, object_list.count)
+            return count
+        return super().count
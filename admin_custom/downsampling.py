@@ -0,0 +1,170 @@
+"""
+Réduction des séries denses côté serveur (graphiques line et area)
+
+Une série journalière sur plusieurs années compte des milliers de points :
+autant de valeurs à transférer et à dessiner par Chart.js pour quelques
+centaines de pixels. Avec ?max_points=N, chart_data (et chart_batch, champ
+max_points de chaque graphique) renvoie au plus N points choisis pour
+conserver la forme de la courbe :
+
+    - lttb (défaut) : Largest-Triangle-Three-Buckets, un point par
+      intervalle, celui qui forme le plus grand triangle avec le point
+      retenu précédent et la moyenne de l'intervalle suivant
+      (premier et dernier points conservés)
+    - minmax : minimum et maximum de chaque intervalle (pics et creux
+      conservés exactement)
+
+    /admin_custom/api/chart-data/?model=Order&field=total_amount&frequency=day&max_points=200
+    /admin_custom/api/chart-data/?...&max_points=200&downsample=minmax
+
+La réponse réduite contient `positions` : rang de chaque point dans la
+série complète (pour un axe linéaire). Les autres types de graphiques
+(bar, pie, doughnut) ne sont pas réduits.
+
+NumPy est utilisé s'il est installé (pip install django-admin-custom[data]),
+sinon Python pur ; les points retenus sont les mêmes. min/max est vectorisé ;
+LTTB parcourt les intervalles un à un (le point retenu sert d'ancre à
+l'intervalle suivant), NumPy ne calculant d'un coup que les aires d'un
+intervalle.
+"""
+import math
+from itertools import accumulate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+METHODS = ('lttb', 'minmax')
+DEFAULT_METHOD = 'lttb'
+DOWNSAMPLED_CHART_TYPES = ('line', 'area')
+MIN_POINTS = 3
+
+
+def _lttb_buckets(count, max_points):
+    """Bornes [début, fin[ des max_points - 2 intervalles intérieurs (premier et dernier points à part)."""
+    every = (count - 2) / (max_points - 2)
+    bounds = [int(math.floor(index * every)) + 1 for index in range(max_points - 1)]
+    bounds[-1] = count - 1
+    return list(zip(bounds, bounds[1:]))
+
+
+def _lttb_python(values, max_points):
+    values = [float(value) for value in values]
+    sums = [0.0, *accumulate(values)]
+    buckets = _lttb_buckets(len(values), max_points)
+    selected = [0]
+    for index, (start, end) in enumerate(buckets):
+        # Moyenne de l'intervalle suivant (le dernier point pour le dernier intervalle)
+        next_start, next_end = buckets[index + 1] if index + 1 < len(buckets) else (len(values) - 1, len(values))
+        average_x = (next_start + next_end - 1) / 2
+        average_y = (sums[next_end] - sums[next_start]) / (next_end - next_start)
+        anchor_x, anchor_y = float(selected[-1]), values[selected[-1]]
+        selected.append(max(range(start, end), key=lambda position: abs(
+            (anchor_x - average_x) * (values[position] - anchor_y)
+            - (anchor_x - position) * (average_y - anchor_y)
+        )))
+    selected.append(len(values) - 1)
+    return selected
+
+
+def _lttb_numpy(values, max_points):
+    # Boucle Python par intervalle : l'ancre dépend du choix précédent
+    values = numpy.asarray(values, dtype=float)
+    positions = numpy.arange(len(values), dtype=float)
+    sums = numpy.concatenate(([0.0], numpy.cumsum(values)))
+    buckets = _lttb_buckets(len(values), max_points)
+    selected = [0]
+    for index, (start, end) in enumerate(buckets):
+        next_start, next_end = buckets[index + 1] if index + 1 < len(buckets) else (len(values) - 1, len(values))
+        average_x = (next_start + next_end - 1) / 2
+        average_y = (sums[next_end] - sums[next_start]) / (next_end - next_start)
+        anchor_x, anchor_y = float(selected[-1]), values[selected[-1]]
+        areas = numpy.abs(
+            (anchor_x - average_x) * (values[start:end] - anchor_y)
+            - (anchor_x - positions[start:end]) * (average_y - anchor_y)
+        )
+        selected.append(start + int(numpy.argmax(areas)))
+    selected.append(len(values) - 1)
+    return selected
+
+
+def lttb_indices(values, max_points):
+    """Rangs des points retenus par LTTB (croissants, au plus max_points)."""
+    if len(values) <= max_points:
+        return list(range(len(values)))
+    if numpy is not None:
+        return _lttb_numpy(values, max_points)
+    return _lttb_python(values, max_points)
+
+
+def _minmax_bins(count, max_points):
+    bins = max_points // 2
+    return [count * index // bins for index in range(bins + 1)]
+
+
+def minmax_indices(values, max_points):
+    """
+    Rangs du minimum et du maximum de max_points // 2 intervalles égaux
+    (croissants). À égalité : premier minimum, dernier maximum.
+    """
+    if len(values) <= max_points:
+        return list(range(len(values)))
+    bounds = _minmax_bins(len(values), max_points)
+    if numpy is not None:
+        array = numpy.asarray(values, dtype=float)
+        starts, sizes = numpy.asarray(bounds[:-1]), numpy.diff(bounds)
+        # Positions égales au minimum (maximum) de leur intervalle : la première (dernière) par intervalle
+        is_low = numpy.flatnonzero(array == numpy.repeat(numpy.minimum.reduceat(array, starts), sizes))
+        is_high = numpy.flatnonzero(array == numpy.repeat(numpy.maximum.reduceat(array, starts), sizes))
+        lows = is_low[numpy.searchsorted(is_low, starts)].tolist()
+        highs = is_high[numpy.searchsorted(is_high, starts + sizes) - 1].tolist()
+    else:
+        values = [float(value) for value in values]
+        lows, highs = [], []
+        for start, end in zip(bounds, bounds[1:]):
+            lows.append(min(range(start, end), key=values.__getitem__))
+            highs.append(max(range(end - 1, start - 1, -1), key=values.__getitem__))
+    return sorted(set(lows) | set(highs))
+
+
+def downsample(series, max_points, method=DEFAULT_METHOD):
+    """
+    Série {'labels', 'data'} réduite à au plus max_points points, avec
+    'positions' (rangs dans la série complète). Inchangée si elle est déjà
+    assez courte.
+    """
+    data = series['data']
+    if not max_points or len(data) <= max_points:
+        return series
+    indices = (minmax_indices if method == 'minmax' else lttb_indices)(data, max_points)
+    return {
+        **series,
+        'labels': [series['labels'][index] for index in indices],
+        'data': [data[index] for index in indices],
+        'positions': indices,
+    }
+
+
+def downsample_options(max_points, method):
+    """
+    Valide les paramètres max_points et downsample.
+
+    Returns:
+        Tuple (max_points ou None, méthode)
+
+    Raises:
+        ValueError: max_points n'est pas un entier >= MIN_POINTS, ou méthode inconnue
+    """
+    method = method or DEFAULT_METHOD
+    if method not in METHODS:
+        raise ValueError(f'Paramètre downsample : {" ou ".join(METHODS)} attendu')
+    if max_points in (None, ''):
+        return None, method
+    try:
+        max_points = int(max_points)
+    except (TypeError, ValueError):
+        max_points = 0
+    if max_points < MIN_POINTS:
+        raise ValueError(f'Paramètre max_points : entier supérieur ou égal à {MIN_POINTS} attendu')
+    return max_points, method
@@ -0,0 +1,570 @@
+"""
+Requêtes des grilles de données : projection des colonnes, filtres, tri et
+pagination par curseur
+
+La pagination est de type keyset : le curseur encode la valeur de tri et la
+clé primaire de la dernière ligne servie, et la page suivante est obtenue par
+un filtre `(tri, pk) > (valeur, pk)` sur un index au lieu d'un OFFSET. La
+page N coûte donc autant que la page 1, quelle que soit la taille de la table.
+
+Le planificateur (GridPlan) traduit les colonnes demandées ('quantity',
+'user__email', 'order'...) en une seule requête : values() quand toutes les
+colonnes sont des valeurs simples, sinon instances avec only() et les
+select_related nécessaires, y compris les relations traversées par les
+__str__ des objets affichés.
+"""
+import ast
+import base64
+import binascii
+import inspect
+import json
+import textwrap
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist, ValidationError
+from django.conf import settings
+from django.db.models import DateField, DateTimeField, F, IntegerField, Q
+from django.utils import timezone
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Lookups autorisés dans les filtres (suffixe après le chemin du champ)
+ALLOWED_LOOKUPS = {
+    'exact', 'iexact', 'contains', 'icontains', 'startswith', 'istartswith',
+    'endswith', 'iendswith', 'gt', 'gte', 'lt', 'lte', 'in', 'isnull', 'range',
+    'date', 'year', 'month', 'day',
+}
+
+# Lookups texte : la valeur est comparée telle quelle, sans conversion
+TEXT_LOOKUPS = {
+    'contains', 'icontains', 'startswith', 'istartswith', 'endswith', 'iendswith', 'iexact',
+}
+# Lookups de date : la valeur est une date ou un entier, quel que soit le champ
+LOOKUP_FIELDS = {'date': DateField(), 'year': IntegerField(), 'month': IntegerField(), 'day': IntegerField()}
+
+# Champs jamais exposés ni filtrables via les grilles
+SENSITIVE_FIELDS = {'password'}
+
+SORT_ALIAS = '_grid_sort_key'
+
+
+class GridQueryError(ValueError):
+    """Paramètre de grille invalide (colonne, filtre, tri ou curseur)."""
+
+
+def resolve_path(model, path):
+    """
+    Résout un chemin de champ 'user__email' depuis `model`.
+
+    Returns:
+        Liste des champs traversés (le dernier est le champ final)
+
+    Raises:
+        GridQueryError si un segment n'existe pas ou est sensible
+    """
+    fields = []
+    current = model
+    for part in path.split('__'):
+        if current is None:
+            raise GridQueryError(f'Chemin invalide : {path}')
+        if part in SENSITIVE_FIELDS:
+            raise GridQueryError(f'Champ non autorisé : {path}')
+        try:
+            field = current._meta.get_field(part)
+        except FieldDoesNotExist:
+            raise GridQueryError(f'Champ inconnu : {path}')
+        fields.append(field)
+        current = field.related_model if field.is_relation else None
+    return fields
+
+
+def _split_lookup(model, key):
+    """Sépare 'order__status__in' en ('order__status', 'in')."""
+    parts = key.split('__')
+    if len(parts) > 1 and parts[-1] in ALLOWED_LOOKUPS:
+        try:
+            resolve_path(model, '__'.join(parts))
+        except GridQueryError:
+            return '__'.join(parts[:-1]), parts[-1]
+    return key, 'exact'
+
+
+def _coerce_filter_value(lookup, value):
+    """Convertit les valeurs texte des paramètres GET selon le lookup."""
+    if not isinstance(value, str):
+        return value
+    if lookup == 'isnull':
+        return value.lower() in ('1', 'true', 'yes', 'oui')
+    if lookup in ('in', 'range'):
+        return [item for item in value.split(',') if item != '']
+    return value
+
+
+def _target_field(field):
+    """Champ dont le type s'applique aux valeurs comparées (clé primaire visée pour une relation)."""
+    return field.target_field if field.is_relation else field
+
+
+def to_field_value(field, value, name):
+    """
+    Convertit `value` avec field.to_python().
+
+    Raises:
+        GridQueryError si la valeur est invalide pour le champ
+    """
+    try:
+        converted = _target_field(field).to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        converted = None
+    if converted is None:
+        raise GridQueryError(f'Valeur invalide pour {name} : {value}')
+    if isinstance(_target_field(field), DateTimeField) and settings.USE_TZ and timezone.is_naive(converted):
+        # '2024-01-01' : minuit dans le fuseau courant
+        converted = timezone.make_aware(converted)
+    return converted
+
+
+def _filter_value(field, lookup, value, key):
+    """Valeur d'un filtre convertie au type du champ (ou du lookup de date)."""
+    value = _coerce_filter_value(lookup, value)
+    if lookup == 'isnull' or lookup in TEXT_LOOKUPS or (lookup == 'exact' and value is None):
+        return value
+    field = LOOKUP_FIELDS.get(lookup, field)
+    if lookup in ('in', 'range'):
+        if not isinstance(value, (list, tuple)):
+            raise GridQueryError(f'Le filtre {key} attend une liste de valeurs')
+        return [to_field_value(field, item, key) for item in value]
+    return to_field_value(field, value, key)
+
+
+def build_filters(model, filters):
+    """
+    Valide un dict de filtres {lookup: valeur} et retourne un Q.
+    Seuls les chemins de champs existants et les lookups autorisés passent ;
+    les valeurs sont converties au type du champ (GridQueryError sinon).
+    """
+    condition = Q()
+    for key, value in (filters or {}).items():
+        path, lookup = _split_lookup(model, key)
+        fields = resolve_path(model, path)
+        if lookup == 'range' and len(_coerce_filter_value(lookup, value)) != 2:
+            raise GridQueryError(f'Le filtre {key} attend deux valeurs')
+        if fields[-1].many_to_many or fields[-1].one_to_many:
+            raise GridQueryError(f'Filtre non supporté sur une relation multiple : {key}')
+        condition &= Q(**{f'{path}__{lookup}': _filter_value(fields[-1], lookup, value, key)})
+    return condition
+
+
+def parse_sort(model, sort):
+    """
+    Valide le paramètre de tri ('-total_amount', 'user__username'...).
+
+    Returns:
+        Tuple (chemin, descendant, nullable)
+    """
+    if not sort or sort.lstrip('-') in ('pk', 'id'):
+        return 'pk', sort.startswith('-') if sort else False, False
+    descending = sort.startswith('-')
+    path = sort.lstrip('-')
+    fields = resolve_path(model, path)
+    last = fields[-1]
+    if last.many_to_many or last.one_to_many:
+        raise GridQueryError(f'Tri impossible sur une relation multiple : {path}')
+    nullable = any(getattr(field, 'null', False) for field in fields)
+    return path, descending, nullable
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort, sort_value, pk):
+    """Curseur opaque : base64 d'un JSON {tri, valeur, pk} de la dernière ligne."""
+    payload = json.dumps({'s': sort, 'v': _json_value(sort_value), 'pk': _json_value(pk)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort, model):
+    """
+    Lit un curseur de encode_cursor pour le tri `sort` de `model`.
+
+    Returns:
+        Tuple (valeur de tri, pk) convertis au type de leurs champs
+
+    Raises:
+        GridQueryError si le curseur est illisible, d'un autre tri ou altéré
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        raise GridQueryError('Curseur invalide')
+    if not isinstance(payload, dict) or payload.get('s') != sort or 'pk' not in payload:
+        raise GridQueryError('Curseur invalide pour ce tri')
+    pk_field = model._meta.pk
+    last_pk = to_field_value(pk_field, payload['pk'], 'cursor')
+    path = sort.lstrip('-')
+    if path == 'pk' or payload.get('v') is None:
+        return (last_pk if path == 'pk' else None), last_pk
+    return to_field_value(resolve_path(model, path)[-1], payload['v'], 'cursor'), last_pk
+
+
+def keyset_condition(path, descending, nullable, last_value, last_pk):
+    """
+    Condition "après la dernière ligne" pour l'ordre (path, pk), NULLs en dernier.
+    """
+    after = 'lt' if descending else 'gt'
+    if path == 'pk':
+        return Q(**{f'pk__{after}': last_pk})
+    if last_value is None:
+        return Q(**{f'{path}__isnull': True, f'pk__{after}': last_pk})
+    condition = Q(**{f'{path}__{after}': last_value}) | Q(**{path: last_value, f'pk__{after}': last_pk})
+    if nullable:
+        condition |= Q(**{f'{path}__isnull': True})
+    return condition
+
+
+def apply_sort(queryset, sort=''):
+    """
+    Trie un QuerySet selon `sort` avec la clé primaire comme départage
+    (ordre total, NULLs en dernier).
+
+    Returns:
+        Tuple (QuerySet trié, chemin, descendant, nullable)
+    """
+    path, descending, nullable = parse_sort(queryset.model, sort)
+    if path == 'pk':
+        return queryset.order_by('-pk' if descending else 'pk'), path, descending, nullable
+    expression = F(path).desc(nulls_last=True) if descending else F(path).asc(nulls_last=True)
+    queryset = queryset.annotate(**{SORT_ALIAS: F(path)}).order_by(
+        expression, '-pk' if descending else 'pk'
+    )
+    return queryset, path, descending, nullable
+
+
+def page_queryset(queryset, sort='', cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Trie et restreint un QuerySet à la page demandée (une ligne de plus
+    que page_size pour savoir s'il reste des lignes).
+
+    Returns:
+        Tuple (QuerySet de la page, Page) ; Page.finish(lignes) termine la pagination
+    """
+    queryset, path, descending, nullable = apply_sort(queryset, sort)
+    sort_key = f"{'-' if descending else ''}{path}"
+
+    if cursor:
+        last_value, last_pk = decode_cursor(cursor, sort_key, queryset.model)
+        queryset = queryset.filter(keyset_condition(path, descending, nullable, last_value, last_pk))
+
+    page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    return queryset[:page_size + 1], Page(path, sort_key, page_size)
+
+
+class Page:
+    """Paramètres d'une page en cours de lecture (voir page_queryset)."""
+    def __init__(self, path, sort_key, page_size):
+        self.path = path
+        self.sort_key = sort_key
+        self.page_size = page_size
+
+    def finish(self, rows):
+        """
+        Returns:
+            Tuple (lignes de la page, curseur suivant ou None)
+        """
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            if isinstance(last, dict):  # QuerySet.values()
+                last_pk = last['pk']
+                last_value = last_pk if self.path == 'pk' else last[SORT_ALIAS]
+            else:
+                last_pk = last.pk
+                last_value = last_pk if self.path == 'pk' else getattr(last, SORT_ALIAS)
+            next_cursor = encode_cursor(self.sort_key, last_value, last_pk)
+        return rows, next_cursor
+
+
+def paginate(queryset, sort='', cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Trie et pagine un QuerySet par curseur.
+
+    Returns:
+        Tuple (liste des objets de la page, curseur suivant ou None)
+    """
+    queryset, page = page_queryset(queryset, sort, cursor, page_size)
+    return page.finish(list(queryset))
+
+
+async def apaginate(queryset, sort='', cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Version asynchrone de paginate (itération asynchrone du QuerySet)."""
+    queryset, page = page_queryset(queryset, sort, cursor, page_size)
+    return page.finish([row async for row in queryset])
+
+
+# ---------------------------------------------------------------------------
+# Planification des colonnes
+# ---------------------------------------------------------------------------
+
+def _is_single_relation(field):
+    """Relation vers un seul objet (FK, OneToOne direct ou inverse) : joignable par select_related."""
+    return field.is_relation and (field.many_to_one or field.one_to_one)
+
+
+def _self_attribute_chains(function, name='self'):
+    """
+    Analyse statique d'une fonction : chaînes d'attributs partant de la
+    variable `name` (ex: self.order.user.username → ['order', 'user', 'username']).
+    """
+    try:
+        source = textwrap.dedent(inspect.getsource(function))
+        tree = ast.parse(source)
+    except (OSError, TypeError, SyntaxError):
+        return []
+
+    inner = set()
+    attributes = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute):
+            attributes.append(node)
+            if isinstance(node.value, ast.Attribute):
+                inner.add(id(node.value))
+
+    chains = []
+    for node in attributes:
+        if id(node) in inner:
+            continue  # Seules les chaînes complètes nous intéressent
+        chain = []
+        current = node
+        while isinstance(current, ast.Attribute):
+            chain.append(current.attr)
+            current = current.value
+        if isinstance(current, ast.Name) and current.id == name:
+            chains.append(list(reversed(chain)))
+    return chains
+
+
+@lru_cache(maxsize=None)
+def str_relations(model, depth=3):
+    """
+    Chemins select_related nécessaires pour évaluer str(instance) sans
+    requête supplémentaire (ex: OrderItem → ('order', 'order__user', 'product')).
+    """
+    return _chain_relations(model, _self_attribute_chains(model.__str__), depth)
+
+
+def _chain_relations(model, chains, depth=3):
+    """Chemins select_related des chaînes d'attributs lues sur une instance de `model`."""
+    if depth <= 0:
+        return ()
+    paths = set()
+    for chain in chains:
+        current = model
+        prefix = []
+        for name in chain:
+            try:
+                field = current._meta.get_field(name)
+            except FieldDoesNotExist:
+                break
+            if not _is_single_relation(field):
+                break
+            prefix.append(name)
+            current = field.related_model
+            paths.add('__'.join(prefix))
+        else:
+            # La chaîne se termine sur un objet lié : formaté par son propre __str__
+            if prefix:
+                for sub_path in str_relations(current, depth - 1):
+                    paths.add('__'.join(prefix + [sub_path]))
+    return tuple(sorted(paths))
+
+
+@lru_cache(maxsize=None)
+def callable_relations(model, function):
+    """
+    Chemins select_related lus par une fonction d'affichage appelée avec
+    l'instance (méthode de ModelAdmin `def client(self, obj)`, fonction
+    `def client(obj)`) ou par une méthode/propriété du modèle (`self`).
+    """
+    if isinstance(function, property):
+        function = function.fget
+    try:
+        parameters = list(inspect.signature(function).parameters)
+    except (TypeError, ValueError):
+        return ()
+    if not parameters:
+        return ()
+    # Premier paramètre : `self` d'une méthode du modèle, l'instance sinon
+    # (le `self` d'une méthode de ModelAdmin est déjà lié)
+    return _chain_relations(model, _self_attribute_chains(function, parameters[0]))
+
+
+def display_relations(model, names, model_admin=None):
+    """
+    Chemins select_related d'une liste de colonnes d'affichage (list_display) :
+    relations traversées, __str__ des objets liés affichés, et relations lues
+    par les méthodes et propriétés (analyse statique de leur code).
+    """
+    paths = set()
+    for name in names:
+        if callable(name):
+            paths.update(callable_relations(model, name))
+        elif name == '__str__':
+            paths.update(str_relations(model))
+        elif model_admin is not None and hasattr(model_admin, name):
+            paths.update(callable_relations(model, getattr(model_admin, name)))
+        else:
+            try:
+                fields = resolve_path(model, name)
+            except GridQueryError:
+                attribute = getattr(model, name, None)
+                if attribute is not None and (callable(attribute) or isinstance(attribute, property)):
+                    paths.update(callable_relations(model, attribute))
+                continue
+            *hops, last = fields
+            if not all(_is_single_relation(field) for field in hops):
+                continue
+            parts = name.split('__')
+            paths.update('__'.join(parts[:index + 1]) for index in range(len(hops)))
+            if _is_single_relation(last):
+                paths.add(name)
+                paths.update(f'{name}__{path}' for path in str_relations(last.related_model))
+    return sorted(paths)
+
+
+def path_models(model, paths):
+    """
+    Modèles atteints par des chemins de champs depuis `model`
+    ('order__user__email' → [Order, User]) ; les segments inconnus et les
+    lookups terminent le chemin.
+    """
+    models = []
+    for path in paths:
+        current = model
+        for part in path.lstrip('-').split('__'):
+            try:
+                field = current._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not field.is_relation or field.related_model is None:
+                break
+            current = field.related_model
+            if current not in models:
+                models.append(current)
+    return models
+
+
+class GridColumn:
+    """
+    Colonne planifiée :
+    - 'value'     : champ simple (éventuellement via des FK), lisible par values()
+    - 'object'    : objet lié affiché via son __str__
+    - 'attribute' : propriété/méthode Python du modèle (nécessite l'instance)
+    - 'missing'   : colonne inconnue ou non autorisée, affichée '-'
+    """
+    def __init__(self, name, kind, relations=()):
+        self.name = name
+        self.kind = kind
+        self.attrs = name.split('__')
+        self.relations = list(relations)  # Chemins select_related requis
+
+
+class GridPlan:
+    """
+    Plan de requête d'une grille : une seule requête quel que soit le nombre
+    de colonnes, sans requête N+1 pour les clés étrangères.
+    """
+    def __init__(self, model, columns):
+        self.model = model
+        self.columns = [self._plan_column(name) for name in columns]
+        self.use_values = all(column.kind in ('value', 'missing') for column in self.columns)
+
+        relations = set()
+        for column in self.columns:
+            relations.update(column.relations)
+        self.select_related = sorted(relations)
+
+    def _plan_column(self, name):
+        if name.split('__')[0] in SENSITIVE_FIELDS:
+            return GridColumn(name, 'missing')
+        try:
+            fields = resolve_path(self.model, name)
+        except GridQueryError:
+            if '__' not in name and hasattr(self.model, name):
+                return GridColumn(name, 'attribute')
+            return GridColumn(name, 'missing')
+
+        *hops, last = fields
+        if not all(_is_single_relation(field) for field in hops):
+            return GridColumn(name, 'missing')
+        parts = name.split('__')
+        relations = ['__'.join(parts[:index + 1]) for index in range(len(hops))]
+
+        if not last.is_relation:
+            return GridColumn(name, 'value', relations)
+        if not _is_single_relation(last):
+            return GridColumn(name, 'missing')  # Relation multiple : non affichable en cellule
+        relations.append(name)
+        relations.extend(f'{name}__{path}' for path in str_relations(last.related_model))
+        return GridColumn(name, 'object', relations)
+
+    def only_fields(self):
+        """
+        Champs du modèle principal à charger avec only(), ou None si une colonne
+        est un attribut Python (qui peut lire n'importe quel champ).
+        """
+        if any(column.kind == 'attribute' for column in self.columns):
+            return None
+        names = {'pk'}
+        for column in self.columns:
+            if column.kind in ('value', 'object'):
+                names.add(column.attrs[0])
+        return sorted(names)
+
+    def apply(self, queryset):
+        """Applique la projection au QuerySet (values() ou only() + select_related)."""
+        if self.use_values:
+            paths = [column.name for column in self.columns if column.kind == 'value']
+            return queryset.values('pk', *dict.fromkeys(paths))
+        queryset = queryset.select_related(*self.select_related)
+        only = self.only_fields()
+        if only is not None:
+            queryset = queryset.only(*only)
+        return queryset
+
+    def _resolve(self, obj, column):
+        value = obj
+        for attr in column.attrs:
+            if value is None:
+                return None
+            try:
+                value = getattr(value, attr)
+            except ObjectDoesNotExist:
+                return None  # OneToOne inverse absent
+        return value
+
+    def render_row(self, row, formatter=str):
+        """Convertit une ligne (dict values() ou instance) en {colonne: texte}."""
+        rendered = {}
+        for column in self.columns:
+            if column.kind == 'missing':
+                rendered[column.name] = '-'
+                continue
+            if isinstance(row, dict):
+                value = row[column.name]
+            else:
+                value = self._resolve(row, column)
+            rendered[column.name] = formatter(value)
+        return rendered
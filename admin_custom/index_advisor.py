@@ -0,0 +1,258 @@
+"""
+Conseiller d'index : chemins d'accès des graphiques, grilles et listes admin
+
+Recense les requêtes que l'admin envoie réellement à la base :
+
+    - DashboardChart : filtre de plage sur son axe temporel (date_field, created_at par défaut)
+    - DashboardGrid : filtres d'égalité puis de plage enregistrés sur la grille
+    - ModelAdmin enregistrés : list_filter et date_hierarchy combinés avec
+      l'ordre de la liste (ordering de l'admin ou Meta.ordering), ordering seul,
+      et search_fields préfixés par ^ ou = (seuls utilisables par un index B-tree)
+
+et propose un index composite (colonnes d'égalité, puis colonne de plage ou
+de tri) pour chaque chemin qu'aucun index existant ne couvre. Un index couvre
+un chemin quand ses premières colonnes sont celles du chemin. Seuls les
+modèles du projet sont analysés (pas ceux de django.contrib) ; un booléen
+seul n'est jamais proposé, trop peu sélectif.
+
+Utilisé par la commande `index_advisor`.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.contrib.admin.sites import all_sites
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+
+from .model_catalog import model_catalog
+from .models import DashboardChart, DashboardGrid
+
+
+# Lookups servis par un parcours de plage (colonne à placer en dernier)
+RANGE_LOOKUPS = {'gt', 'gte', 'lt', 'lte', 'range', 'date', 'year', 'month', 'day', 'startswith'}
+
+# Lookups d'égalité (colonne à placer en tête)
+EQUALITY_LOOKUPS = {'exact', 'in', 'isnull'}
+
+# Un chemin d'accès : colonnes (noms de champs) dans l'ordre de l'index
+AccessPath = namedtuple('AccessPath', ['model', 'fields', 'source'])
+
+IndexSuggestion = namedtuple('IndexSuggestion', ['model', 'fields', 'sources'])
+
+
+def _local_field(model, name):
+    """Champ concret local (pas de traversée de relation), sinon None."""
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if not field.concrete or field.many_to_many:
+        return None
+    return field
+
+
+def _is_date_field(field):
+    return isinstance(field, (models.DateField, models.DateTimeField))
+
+
+def _ordering_field(model, ordering):
+    """Premier champ local de l'ordre de tri ('-created_at' → 'created_at')."""
+    for item in ordering or ():
+        if not isinstance(item, str):
+            continue
+        name = item.lstrip('-')
+        if name in ('pk', '?'):
+            return None
+        if _local_field(model, name):
+            return name
+        return None
+    return None
+
+
+def _path(model, fields, source):
+    """AccessPath sans doublons de colonnes, ou None s'il est vide."""
+    unique = []
+    for name in fields:
+        if name and name not in unique:
+            unique.append(name)
+    return AccessPath(model, tuple(unique), source) if unique else None
+
+
+def chart_paths():
+    """Plage de dates lue par chaque DashboardChart enregistré."""
+    paths = []
+    for chart in DashboardChart.objects.all():
+        model = model_catalog.get_model(chart.model_name)
+        if model is None:
+            continue
+        date_field = chart.date_field or model_catalog.get_info(model).default_date_field
+        if not date_field or not _local_field(model, date_field):
+            continue
+        paths.append(_path(model, [date_field], f'graphique « {chart.name} »'))
+    return paths
+
+
+def grid_paths():
+    """Filtres enregistrés sur chaque DashboardGrid : égalités puis plage."""
+    paths = []
+    for grid in DashboardGrid.objects.all():
+        model = model_catalog.get_model(grid.model_name)
+        if model is None or not isinstance(grid.filters, dict):
+            continue
+        equality, ranges = [], []
+        for key in grid.filters:
+            parts = key.split('__')
+            lookup = parts[-1] if len(parts) > 1 else 'exact'
+            if len(parts) > 2 or not _local_field(model, parts[0]):
+                continue  # Filtre sur une table jointe : hors de cette table
+            if lookup in EQUALITY_LOOKUPS:
+                equality.append(parts[0])
+            elif lookup in RANGE_LOOKUPS:
+                ranges.append(parts[0])
+        path = _path(model, equality + ranges[:1], f'grille « {grid.name} »')
+        if path:
+            paths.append(path)
+    return paths
+
+
+def _registered_admins(sites=None):
+    for site in sites if sites is not None else list(all_sites):
+        yield from site._registry.items()
+
+
+def admin_paths(sites=None):
+    """
+    list_filter, date_hierarchy, ordering et search_fields des ModelAdmin
+    enregistrés (défaut : tous les AdminSite instanciés).
+    """
+    paths = []
+    project_models = set(model_catalog.project_models())
+    for model, model_admin in _registered_admins(sites):
+        if model not in project_models:
+            continue
+        ordering = model_admin.ordering or model._meta.ordering
+        order_field = _ordering_field(model, ordering)
+        source = type(model_admin).__name__
+
+        if order_field:
+            paths.append(_path(model, [order_field], f'{source}.ordering'))
+
+        for item in model_admin.list_filter:
+            name = item[0] if isinstance(item, (list, tuple)) else item
+            if not isinstance(name, str):
+                continue  # Filtre personnalisé (SimpleListFilter)
+            field = _local_field(model, name)
+            if field is None:
+                continue
+            if _is_date_field(field):
+                # Plage de dates : la colonne seule suffit
+                paths.append(_path(model, [name], f'{source}.list_filter'))
+            elif isinstance(field, models.BooleanField) and not order_field:
+                continue
+            else:
+                paths.append(_path(model, [name, order_field], f'{source}.list_filter'))
+
+        if model_admin.date_hierarchy and _local_field(model, model_admin.date_hierarchy):
+            paths.append(_path(model, [model_admin.date_hierarchy], f'{source}.date_hierarchy'))
+
+        for name in model_admin.search_fields:
+            # icontains (défaut) ne peut pas utiliser un index B-tree
+            if name[:1] in ('^', '=') and _local_field(model, name[1:]):
+                paths.append(_path(model, [name[1:]], f'{source}.search_fields'))
+    return paths
+
+
+def collect_access_paths(sites=None):
+    return chart_paths() + grid_paths() + admin_paths(sites)
+
+
+def existing_indexes(model):
+    """Colonnes (noms de champs) de chaque index existant du modèle."""
+    opts = model._meta
+    indexes = [(opts.pk.name,)]
+    for field in opts.local_fields:
+        if field.db_index or field.unique:
+            indexes.append((field.name,))
+    for index in opts.indexes:
+        if index.fields and not index.condition:
+            indexes.append(tuple(name.lstrip('-') for name in index.fields))
+    for constraint in opts.constraints:
+        if isinstance(constraint, models.UniqueConstraint) and constraint.fields and not constraint.condition:
+            indexes.append(tuple(constraint.fields))
+    for fields in opts.unique_together:
+        indexes.append(tuple(fields))
+    return indexes
+
+
+def is_covered(fields, indexes):
+    return any(index[:len(fields)] == tuple(fields) for index in indexes)
+
+
+def suggest_indexes(paths=None, sites=None):
+    """
+    Index manquants pour les chemins d'accès donnés (défaut : tous).
+    Un chemin préfixe d'un autre chemin du même modèle est servi par le même index.
+    """
+    if paths is None:
+        paths = collect_access_paths(sites)
+
+    by_model = {}
+    for path in paths:
+        if path is None:
+            continue
+        sources = by_model.setdefault(path.model, {}).setdefault(path.fields, [])
+        if path.source not in sources:
+            sources.append(path.source)
+
+    suggestions = []
+    for model, candidates in by_model.items():
+        indexes = existing_indexes(model)
+        missing = [fields for fields in candidates if not is_covered(fields, indexes)]
+        for fields in missing:
+            wider = [other for other in missing if other != fields and other[:len(fields)] == fields]
+            if wider:
+                candidates[wider[0]].extend(candidates[fields])
+                continue
+            suggestions.append(IndexSuggestion(model, fields, candidates[fields]))
+    return suggestions
+
+
+def build_index(suggestion):
+    """models.Index nommé comme le ferait Meta.indexes (nom court et stable)."""
+    index = models.Index(fields=list(suggestion.fields), name='')
+    index.set_name_with_model(suggestion.model)
+    return index
+
+
+def sample_queryset(suggestion):
+    """
+    Requête représentative du chemin d'accès, pour EXPLAIN : égalité sur les
+    premières colonnes, plage (30 derniers jours) ou tri sur la dernière.
+    """
+    model = suggestion.model
+    queryset = model._default_manager.all()
+    *leading, last = suggestion.fields
+    for name in leading:
+        queryset = queryset.filter(**{name: _sample_value(model, name)})
+
+    field = model._meta.get_field(last)
+    if _is_date_field(field):
+        since = timezone.now() - timedelta(days=30)
+        if not isinstance(field, models.DateTimeField):
+            since = since.date()
+        return queryset.filter(**{f'{last}__gte': since}).order_by(last)
+    if leading:
+        return queryset.order_by(last)
+    return queryset.filter(**{last: _sample_value(model, last)})
+
+
+def _sample_value(model, name):
+    field = model._meta.get_field(name)
+    if field.choices:
+        return field.choices[0][0]
+    value = model._default_manager.values_list(field.attname, flat=True).first()
+    if value is None and isinstance(field, models.BooleanField):
+        return True
+    return value
+
@@ -0,0 +1,272 @@
+"""
+Instrumentation des pages admin : requêtes SQL, temps base/templates, cache
+
+Le middleware mesure chaque requête HTTP de l'admin et des APIs :
+    - nombre de requêtes SQL et temps passé en base (execute_wrapper)
+    - requêtes répétées à l'identique (signature SQL sans paramètres :
+      symptôme d'un N+1)
+    - temps de rendu des templates et succès/échecs du cache des APIs
+
+Les mesures sont renvoyées dans l'en-tête Server-Timing (utilisateurs staff,
+visibles dans l'onglet Réseau du navigateur), affichées dans un panneau
+repliable de l'interface moderne pour les superutilisateurs, et agrégées en
+mémoire par route (percentiles) pour la page /admin/perf/.
+
+    # settings.py
+    MIDDLEWARE = [
+        ...,
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'admin_custom.instrumentation.InstrumentationMiddleware',
+    ]
+    ADMIN_CUSTOM = {
+        'INSTRUMENTATION': {
+            'ENABLED': True,                               # défaut
+            'PATH_PREFIXES': ['/admin/', '/admin_custom/'],  # défaut
+            'HISTORY': 500,        # mesures conservées par route (défaut)
+        },
+    }
+
+Les agrégats sont propres à chaque processus et remis à zéro au redémarrage.
+Les requêtes des threads de travail (statistiques et graphiques en parallèle,
+vues asynchrones : voir workers.py) sont comptées avec celles de la requête ;
+le temps base est alors cumulé et peut dépasser le temps total.
+"""
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import render_to_string
+
+PANEL_MARKER = '<!-- admin-custom-perf-panel -->'
+DEFAULT_HISTORY = 500
+DEFAULT_PATH_PREFIXES = ('/admin/', '/admin_custom/')
+DUPLICATES_SHOWN = 5
+# Route commune des requêtes sans vue résolue (404...) : une entrée au plus
+UNRESOLVED_ROUTE = '(non résolue)'
+
+_current = ContextVar('admin_custom_request_metrics', default=None)
+
+
+def get_instrumentation_config():
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    return admin_custom_config.get('INSTRUMENTATION', {})
+
+
+def current_metrics():
+    """Mesures de la requête HTTP en cours, ou None hors instrumentation."""
+    return _current.get()
+
+
+def _signature(sql):
+    """SQL sans littéraux : deux requêtes de même forme ont la même signature."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql.replace('%s', '?'))
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    return re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', sql)
+
+
+class RequestMetrics:
+    """Mesures d'une requête HTTP."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Threads de travail en parallèle
+        self.started = time.perf_counter()
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.signatures = Counter()
+        self.signature_ms = Counter()
+        self._template_depth = 0
+
+    # Accroches ---------------------------------------------------------
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            signature = _signature(sql)
+            with self._lock:
+                self.queries += 1
+                self.db_ms += duration
+                self.signatures[signature] += 1
+                self.signature_ms[signature] += duration
+
+    def measure_connections(self, stack):
+        """Compte les requêtes des connexions du thread courant jusqu'à la fermeture de `stack`."""
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self.execute_wrapper))
+
+    def note_cache(self, hit):
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    # Résultats ---------------------------------------------------------
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    @property
+    def duplicates(self):
+        """[(signature, exécutions, ms)] des requêtes répétées, les plus fréquentes d'abord."""
+        return [
+            (signature, count, round(self.signature_ms[signature], 2))
+            for signature, count in self.signatures.most_common()
+            if count > 1
+        ]
+
+    @property
+    def duplicate_queries(self):
+        return sum(count - 1 for _, count, _ in self.duplicates)
+
+    def server_timing(self):
+        entries = [
+            f'db;dur={self.db_ms:.2f};desc="{self.queries} requêtes SQL"',
+            f'tpl;dur={self.template_ms:.2f};desc="Templates"',
+            f'total;dur={self.total_ms:.2f};desc="Total"',
+        ]
+        if self.duplicate_queries:
+            entries.append(f'dup;desc="{self.duplicate_queries} requêtes répétées"')
+        if self.cache_hits or self.cache_misses:
+            entries.append(f'cache;desc="{self.cache_hits} succès, {self.cache_misses} échecs"')
+        return ', '.join(entries)
+
+
+class PerformanceLog:
+    """Dernières mesures par route, pour les percentiles de /admin/perf/ (par processus)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    @property
+    def history(self):
+        return get_instrumentation_config().get('HISTORY', DEFAULT_HISTORY)
+
+    def record(self, route, metrics):
+        sample = (metrics.total_ms, metrics.db_ms, metrics.template_ms, metrics.queries, metrics.duplicate_queries)
+        with self._lock:
+            samples = self._samples.get(route)
+            if samples is None or samples.maxlen != self.history:
+                samples = self._samples[route] = deque(samples or (), maxlen=self.history)
+            samples.append(sample)
+
+    @staticmethod
+    def _percentile(sorted_values, percent):
+        index = max(0, int(round(len(sorted_values) * percent / 100)) - 1)
+        return sorted_values[index]
+
+    def report(self):
+        """[{route, count, p50, p95, p99, db_ms, template_ms, queries, duplicates}] triés par p95 décroissant."""
+        with self._lock:
+            samples = {route: list(values) for route, values in self._samples.items()}
+        rows = []
+        for route, values in samples.items():
+            totals = sorted(value[0] for value in values)
+            count = len(values)
+            rows.append({
+                'route': route,
+                'count': count,
+                'p50': round(self._percentile(totals, 50), 2),
+                'p95': round(self._percentile(totals, 95), 2),
+                'p99': round(self._percentile(totals, 99), 2),
+                'db_ms': round(sum(value[1] for value in values) / count, 2),
+                'template_ms': round(sum(value[2] for value in values) / count, 2),
+                'queries': round(sum(value[3] for value in values) / count, 1),
+                'max_queries': max(value[3] for value in values),
+                'duplicates': round(sum(value[4] for value in values) / count, 1),
+            })
+        return sorted(rows, key=lambda row: row['p95'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+performance_log = PerformanceLog()
+
+
+def instrument_templates():
+    """
+    Mesure le rendu des templates Django (temps du template de premier niveau :
+    les {% include %} sont comptés dans leur parent). Sans effet hors requête
+    instrumentée.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, '_admin_custom_instrumented', False):
+        return
+    original_render = Template.render
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return original_render(self, context, request)
+        metrics._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            metrics._template_depth -= 1
+            if not metrics._template_depth:
+                metrics.template_ms += (time.perf_counter() - start) * 1000
+
+    render._admin_custom_instrumented = True
+    Template.render = render
+
+
+class InstrumentationMiddleware:
+    """Mesure les requêtes de l'admin et des APIs (à placer après AuthenticationMiddleware)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_instrumentation_config()
+        prefixes = tuple(config.get('PATH_PREFIXES', DEFAULT_PATH_PREFIXES))
+        if not config.get('ENABLED', True) or not request.path.startswith(prefixes):
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                metrics.measure_connections(stack)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics.finish()
+
+        match = getattr(request, 'resolver_match', None)
+        performance_log.record(match.view_name if match and match.view_name else UNRESOLVED_ROUTE, metrics)
+
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_active and user.is_staff:
+            response['Server-Timing'] = metrics.server_timing()
+            if user.is_superuser:
+                self.inject_panel(response, metrics)
+        return response
+
+    @staticmethod
+    def inject_panel(response, metrics):
+        """Remplace le marqueur de admin_base.html par le panneau de mesures."""
+        if response.streaming or 'text/html' not in response.get('Content-Type', ''):
+            return
+        content = response.content.decode(response.charset)
+        if PANEL_MARKER not in content:
+            return
+        panel = render_to_string('admin_custom/modern/perf_panel.html', {
+            'metrics': metrics,
+            'duplicates': metrics.duplicates[:DUPLICATES_SHOWN],
+        })
+        response.content = content.replace(PANEL_MARKER, panel, 1).encode(response.charset)
@@ -0,0 +1,124 @@
+"""
+Commande de comparaison du débit WSGI (vues synchrones) / ASGI (vues asynchrones)
+Usage:
+    python manage.py bench_asgi                          # 200 requêtes, 8 en parallèle
+    python manage.py bench_asgi --requests 1000 --concurrency 32
+
+Rejoue le mélange de requêtes d'un dashboard (statistiques, batch de graphiques,
+graphique seul, page de grille) sur la base configurée, cache des APIs désactivé :
+    - WSGI : un client synchrone par thread, `concurrency` threads (serveur threadé)
+    - ASGI : `concurrency` requêtes simultanées sur une boucle d'événements
+Les requêtes passent par les gestionnaires de Django, sans serveur HTTP.
+"""
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+
+def dashboard_requests():
+    """Mélange de requêtes d'un affichage de dashboard : [(url, paramètres)]."""
+    charts = [
+        {'id': 'revenue', 'model': 'Order', 'field': 'total_amount', 'operation': 'sum'},
+        {'id': 'orders', 'model': 'Order', 'field': 'total_amount', 'operation': 'count'},
+        {'id': 'payments', 'model': 'Payment', 'field': 'amount', 'operation': 'sum'},
+        {'id': 'products', 'model': 'Product', 'field': 'price', 'operation': 'avg'},
+    ]
+    return [
+        (reverse('admin_custom:stats_data'), {}),
+        (reverse('admin_custom:chart_batch'), {'stats': 1, 'charts': json.dumps(charts)}),
+        (reverse('admin_custom:chart_data'), {'model': 'Order', 'field': 'total_amount', 'frequency': 'day'}),
+        (reverse('admin_custom:grid_data'), {'model': 'Order', 'columns': ['order_number', 'user', 'status'],
+                                             'sort': '-created_at', 'page_size': 50}),
+    ]
+
+
+def _summary(durations, elapsed):
+    durations = sorted(durations)
+    return {
+        'requests': len(durations),
+        'throughput': len(durations) / elapsed if elapsed else 0.0,
+        'p50': statistics.median(durations) * 1000,
+        'p95': durations[int(len(durations) * 0.95) - 1] * 1000,
+    }
+
+
+def run_wsgi(mix, total, concurrency):
+    def worker(indexes):
+        client = Client()
+        durations = []
+        try:
+            for index in indexes:
+                url, params = mix[index % len(mix)]
+                start = time.perf_counter()
+                response = client.get(url, params)
+                durations.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(f'{url} : HTTP {response.status_code}')
+        finally:
+            connections.close_all()
+        return durations
+
+    batches = [range(offset, total, concurrency) for offset in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        durations = [duration for batch in pool.map(worker, batches) for duration in batch]
+    return _summary(durations, time.perf_counter() - start)
+
+
+async def run_asgi(mix, total, concurrency):
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        url, params = mix[index % len(mix)]
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url, params)
+            if response.status_code != 200:
+                raise CommandError(f'{url} : HTTP {response.status_code}')
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    durations = await asyncio.gather(*(one(index) for index in range(total)))
+    return _summary(durations, time.perf_counter() - start)
+
+
+class Command(BaseCommand):
+    help = 'Compare le débit des APIs du dashboard en WSGI (synchrone) et en ASGI (asynchrone)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Nombre de requêtes par mode')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requêtes simultanées')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        concurrency = options['concurrency']
+        if total < 1 or concurrency < 1:
+            raise CommandError('--requests et --concurrency doivent être positifs')
+
+        admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+        bench_settings = override_settings(
+            ALLOWED_HOSTS=['*'],
+            ADMIN_CUSTOM={**admin_custom_config, 'CACHE': {'ENABLED': False}},
+        )
+        with bench_settings:
+            mix = dashboard_requests()
+            results = {
+                'WSGI (synchrone)': run_wsgi(mix, total, concurrency),
+                'ASGI (asynchrone)': asyncio.run(run_asgi(mix, total, concurrency)),
+            }
+
+        self.stdout.write(f'{total} requêtes, {concurrency} simultanées, cache désactivé')
+        for mode, result in results.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{mode:<18} {result["throughput"]:8.1f} req/s   '
+                f'p50 {result["p50"]:7.1f} ms   p95 {result["p95"]:7.1f} ms'
+            ))
@@ -0,0 +1,140 @@
+"""
+Commande pour repérer les index manquants sur les chemins d'accès de l'admin
+Usage:
+    python manage.py index_advisor                       # rapport + Meta.indexes à ajouter
+    python manage.py index_advisor --app sales           # une seule application
+    python manage.py index_advisor --explain             # plans EXPLAIN avant/après
+    python manage.py index_advisor --write-migrations    # migrations AddIndex
+"""
+import os
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.migrations import AddIndex, Migration
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.urls import get_resolver
+
+from admin_custom.index_advisor import build_index, sample_queryset, suggest_indexes
+
+
+class Command(BaseCommand):
+    help = ('Propose les index manquants pour les graphiques, grilles et listes admin '
+            '(list_filter, ordering, search_fields)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--app',
+            action='append',
+            dest='app_labels',
+            help='Application à analyser (ex: sales), répétable. Défaut : toutes',
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Affiche le plan EXPLAIN d\'une requête représentative avant/après création '
+                 'de l\'index (créé puis annulé dans une transaction)',
+        )
+        parser.add_argument(
+            '--write-migrations',
+            action='store_true',
+            help='Écrit une migration AddIndex par application',
+        )
+
+    def handle(self, *args, **options):
+        # Charger l'URLconf : les AdminSite personnalisés s'y enregistrent
+        get_resolver().url_patterns
+
+        app_labels = options['app_labels']
+        for label in app_labels or ():
+            try:
+                apps.get_app_config(label)
+            except LookupError:
+                raise CommandError(f'Application inconnue : {label}')
+
+        suggestions = [
+            suggestion for suggestion in suggest_indexes()
+            if not app_labels or suggestion.model._meta.app_label in app_labels
+        ]
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS('✓ Aucun index manquant'))
+            return
+
+        by_app = {}
+        for suggestion in suggestions:
+            by_app.setdefault(suggestion.model._meta.app_label, []).append(suggestion)
+
+        for app_label, app_suggestions in by_app.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{app_label}'))
+            for suggestion in app_suggestions:
+                self.report(suggestion, options['explain'])
+            if options['write_migrations']:
+                self.write_migration(app_label, app_suggestions)
+
+        if not options['write_migrations']:
+            self.stdout.write(
+                '\nAjoutez ces index à Meta.indexes puis lancez makemigrations, '
+                'ou utilisez --write-migrations.'
+            )
+
+    def report(self, suggestion, explain):
+        index = build_index(suggestion)
+        model = suggestion.model
+        self.stdout.write(f'  {model.__name__} ({", ".join(suggestion.fields)})')
+        self.stdout.write(f'    utilisé par : {", ".join(suggestion.sources)}')
+        self.stdout.write(f'    Meta.indexes : models.Index(fields={list(suggestion.fields)!r}, name={index.name!r})')
+        if explain:
+            before, after = self.explain(suggestion, index)
+            self.stdout.write('    EXPLAIN avant :')
+            self.stdout.write(self._indent(before))
+            self.stdout.write('    EXPLAIN après :')
+            self.stdout.write(self._indent(after))
+
+    def explain(self, suggestion, index):
+        """Plans de la requête représentative sans puis avec l'index."""
+        model = suggestion.model
+        alias = router.db_for_read(model) or DEFAULT_DB_ALIAS
+        connection = connections[alias]
+        queryset = sample_queryset(suggestion).using(alias)
+        before = queryset.explain()
+
+        if not connection.features.can_rollback_ddl:
+            return before, '(base sans DDL transactionnel : index non simulé)'
+        create_sql = str(index.create_sql(model, connection.schema_editor()))
+        with transaction.atomic(using=alias):
+            with connection.cursor() as cursor:
+                cursor.execute(create_sql)
+            after = queryset.explain()
+            transaction.set_rollback(True, using=alias)
+        return before, after
+
+    def write_migration(self, app_label, suggestions):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        leaf_nodes = loader.graph.leaf_nodes(app_label)
+        if len(leaf_nodes) > 1:
+            raise CommandError(f'{app_label} : plusieurs migrations feuilles, lancez makemigrations --merge')
+
+        number = 1
+        if leaf_nodes:
+            number = (MigrationAutodetector.parse_number(leaf_nodes[0][1]) or 0) + 1
+        migration = Migration(f'{number:04d}_admin_custom_indexes', app_label)
+        migration.dependencies = list(leaf_nodes)
+        migration.operations = [
+            AddIndex(model_name=suggestion.model._meta.model_name, index=build_index(suggestion))
+            for suggestion in suggestions
+        ]
+
+        writer = MigrationWriter(migration)
+        os.makedirs(os.path.dirname(writer.path), exist_ok=True)
+        with open(writer.path, 'w', encoding='utf-8') as migration_file:
+            migration_file.write(writer.as_string())
+        self.stdout.write(self.style.SUCCESS(f'  ✓ {writer.path}'))
+        self.stdout.write(self.style.WARNING(
+            '    Ajoutez aussi ces index à Meta.indexes, sinon makemigrations les supprimera.'
+        ))
+
+    @staticmethod
+    def _indent(plan):
+        return '\n'.join(f'      {line}' for line in plan.splitlines())
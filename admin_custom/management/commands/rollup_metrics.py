@@ -0,0 +1,74 @@
+"""
+Commande pour construire ou réparer les agrégats journaliers (rollups)
+Usage:
+    python manage.py rollup_metrics                      # backfill complet
+    python manage.py rollup_metrics --model sales.Order  # un seul modèle
+    python manage.py rollup_metrics --start 2026-01-01 --end 2026-02-01  # réparation d'une plage
+"""
+from datetime import date
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_custom.rollups import get_rollup_config, rebuild_rollups
+
+
+def _parse_day(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Date invalide : {value} (format attendu : AAAA-MM-JJ)')
+
+
+class Command(BaseCommand):
+    help = 'Construit ou répare les agrégats journaliers configurés dans ADMIN_CUSTOM["ROLLUPS"]'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            dest='models',
+            help='Modèle à traiter (ex: sales.Order), répétable. Défaut : tous les modèles configurés',
+        )
+        parser.add_argument(
+            '--start',
+            help='Premier jour à recalculer (AAAA-MM-JJ, inclus)',
+        )
+        parser.add_argument(
+            '--end',
+            help='Dernier jour à recalculer (AAAA-MM-JJ, exclu)',
+        )
+
+    def handle(self, *args, **options):
+        config = get_rollup_config()
+        if not config:
+            raise CommandError('Aucun modèle configuré dans ADMIN_CUSTOM["ROLLUPS"]')
+
+        start_day = _parse_day(options['start']) if options['start'] else None
+        end_day = _parse_day(options['end']) if options['end'] else None
+        if start_day and end_day and start_day >= end_day:
+            raise CommandError('--start doit être antérieur à --end')
+
+        if options['models']:
+            models = []
+            for label in options['models']:
+                try:
+                    model = apps.get_model(label)
+                except (LookupError, ValueError):
+                    raise CommandError(f'Modèle inconnu : {label}')
+                if model._meta.label_lower not in config:
+                    raise CommandError(f'{label} n\'est pas configuré dans ADMIN_CUSTOM["ROLLUPS"]')
+                models.append(model)
+        else:
+            models = [entry['model'] for entry in config.values()]
+
+        for model in models:
+            days = rebuild_rollups(model, start_day, end_day)
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {model._meta.label} : {days} jour(s) agrégé(s)'
+            ))
+
+        if start_day or end_day:
+            self.stdout.write(self.style.WARNING(
+                'Réparation partielle : les rollups ne sont activés qu\'après un backfill complet.'
+            ))
@@ -0,0 +1,58 @@
+"""
+Commande pour construire ou reconstruire les index de recherche des listes admin
+Usage:
+    python manage.py search_index                      # tous les modèles configurés
+    python manage.py search_index --model sales.Order  # un seul modèle
+"""
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_custom.search import DEFAULT_BATCH_SIZE, get_backend, get_search_config, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Construit les index de recherche configurés dans ADMIN_CUSTOM["SEARCH"]'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            dest='models',
+            help='Modèle à indexer (ex: sales.Order), répétable. Défaut : tous les modèles configurés',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Objets indexés par transaction (défaut: {DEFAULT_BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        config = get_search_config()
+        if not config:
+            raise CommandError('Aucun modèle configuré dans ADMIN_CUSTOM["SEARCH"]')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size doit être au moins 1')
+
+        if options['models']:
+            models = []
+            for label in options['models']:
+                try:
+                    model = apps.get_model(label)
+                except (LookupError, ValueError):
+                    raise CommandError(f'Modèle inconnu : {label}')
+                if model._meta.label_lower not in config:
+                    raise CommandError(f'{label} n\'est pas configuré dans ADMIN_CUSTOM["SEARCH"]')
+                models.append(model)
+        else:
+            models = [entry['model'] for entry in config.values()]
+
+        for model in models:
+            started = time.perf_counter()
+            count = rebuild_index(model, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {model._meta.label} : {count} objet(s) indexé(s) [{get_backend(model).name}] '
+                f'en {time.perf_counter() - started:.1f} s'
+            ))
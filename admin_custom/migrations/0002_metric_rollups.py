@@ -0,0 +1,47 @@
+# Generated by Django 5.2.10 on 2026-10-17 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_custom', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=200, unique=True)),
+                ('date_field', models.CharField(default='created_at', max_length=200)),
+                ('is_ready', models.BooleanField(default=False)),
+                ('last_backfill_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'État des agrégats',
+                'verbose_name_plural': 'États des agrégats',
+            },
+        ),
+        migrations.CreateModel(
+            name='MetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=200)),
+                ('field_name', models.CharField(blank=True, default='', max_length=200)),
+                ('day', models.DateField()),
+                ('row_count', models.BigIntegerField(default=0)),
+                ('total', models.DecimalField(blank=True, decimal_places=6, max_digits=30, null=True)),
+                ('minimum', models.DecimalField(blank=True, decimal_places=6, max_digits=30, null=True)),
+                ('maximum', models.DecimalField(blank=True, decimal_places=6, max_digits=30, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Agrégat journalier',
+                'verbose_name_plural': 'Agrégats journaliers',
+                'constraints': [models.UniqueConstraint(fields=('model_label', 'field_name', 'day'), name='admin_custom_rollup_unique_day')],
+            },
+        ),
+    ]
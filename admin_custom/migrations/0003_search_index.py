@@ -0,0 +1,42 @@
+# Generated by Django 5.2.10 on 2026-10-17 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_custom', '0002_metric_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=200, unique=True)),
+                ('backend', models.CharField(max_length=20)),
+                ('is_ready', models.BooleanField(default=False)),
+                ('last_build_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': "État de l'index de recherche",
+                'verbose_name_plural': 'États des index de recherche',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=200)),
+                ('object_id', models.BigIntegerField()),
+                ('trigram', models.CharField(max_length=3)),
+            ],
+            options={
+                'verbose_name': 'Trigramme de recherche',
+                'verbose_name_plural': 'Trigrammes de recherche',
+                'indexes': [models.Index(fields=['model_label', 'trigram', 'object_id'], name='admin_custom_trigram_lookup'), models.Index(fields=['model_label', 'object_id'], name='admin_custom_trigram_object')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_custom', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboardchart',
+            name='date_field',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+    ]
@@ -0,0 +1,175 @@
+"""
+Catalogue des modèles et de leurs champs, construit une seule fois
+
+Les APIs (graphiques, grilles, champs) résolvaient le modèle demandé en
+parcourant toutes les AppConfig, puis ré-inspectaient _meta à chaque requête.
+Le catalogue est construit dans AdminCustomConfig.ready() (et reconstruit par
+autodiscover_models) et offre :
+- un index nom → modèle en O(1) ('Order', 'order', 'sales.Order'...)
+- les listes de champs numériques, dates, texte et clés étrangères par modèle
+- les listes de modèles proposées pour les graphiques et les grilles
+"""
+import threading
+
+from django.apps import apps
+
+
+NUMERIC_FIELD_TYPES = [
+    'DecimalField', 'FloatField', 'IntegerField', 'PositiveIntegerField',
+    'BigIntegerField', 'SmallIntegerField', 'PositiveSmallIntegerField',
+    'PositiveBigIntegerField',
+]
+DATE_FIELD_TYPES = ['DateField', 'DateTimeField']
+TEXT_FIELD_TYPES = [
+    'CharField', 'TextField', 'SlugField', 'EmailField', 'URLField', 'UUIDField',
+]
+
+# Tables techniques d'admin_custom, jamais proposées dans les graphiques/grilles/statistiques
+INTERNAL_MODELS = {
+    'admin_custom.metricrollup', 'admin_custom.rollupstate',
+    'admin_custom.searchindexstate', 'admin_custom.searchtrigram',
+}
+
+
+class ModelInfo:
+    """Métadonnées pré-calculées d'un modèle"""
+    def __init__(self, model):
+        opts = model._meta
+        self.model = model
+        self.name = model.__name__
+        self.app_label = opts.app_label
+        self.label = opts.label  # 'sales.Order'
+        self.label_lower = opts.label_lower  # 'sales.order'
+        self.verbose_name = opts.verbose_name.title()
+        self.is_project_model = (
+            not apps.get_app_config(opts.app_label).name.startswith('django.contrib')
+            and not opts.abstract
+            and not opts.proxy
+            and opts.label_lower not in INTERNAL_MODELS
+        )
+
+        self.fields = {}
+        self.numeric_fields = []
+        self.date_fields = []
+        self.text_fields = []
+        self.fk_fields = []
+        self.related_models = []
+        for field in opts.get_fields():
+            if not hasattr(field, 'name'):
+                continue
+            self.fields[field.name] = field
+            if field.is_relation:
+                if field.concrete and (field.many_to_one or field.one_to_one):
+                    self.fk_fields.append(field.name)
+                    if field.related_model not in self.related_models:
+                        self.related_models.append(field.related_model)
+                continue
+            field_type = field.get_internal_type()
+            if field_type in NUMERIC_FIELD_TYPES:
+                self.numeric_fields.append(field.name)
+            elif field_type in DATE_FIELD_TYPES:
+                self.date_fields.append(field.name)
+            elif field_type in TEXT_FIELD_TYPES:
+                self.text_fields.append(field.name)
+
+    @property
+    def default_date_field(self):
+        """Axe temporel par défaut des graphiques : created_at, sinon le premier champ date, sinon None."""
+        if 'created_at' in self.date_fields:
+            return 'created_at'
+        return self.date_fields[0] if self.date_fields else None
+
+    def has_attribute(self, name):
+        """Vrai si `name` est un champ ou un attribut (propriété, méthode) du modèle."""
+        return name in self.fields or hasattr(self.model, name)
+
+    def as_chart_entry(self):
+        return {
+            'name': self.name,
+            'label': self.verbose_name,
+            'app': self.app_label,
+            'fields': list(self.numeric_fields),
+            'date_fields': list(self.date_fields),
+        }
+
+    def as_grid_entry(self):
+        return {
+            'name': self.name,
+            'label': self.verbose_name,
+            'app': self.app_label,
+        }
+
+
+class ModelCatalog:
+    """
+    Index des modèles installés. Les structures sont reconstruites en entier
+    puis remplacées d'un bloc : les lectures concurrentes restent cohérentes.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._infos = None
+        self._index = {}
+        self._chart_models = []
+        self._grid_models = []
+
+    def build(self):
+        """(Re)construit le catalogue à partir du registre d'applications Django."""
+        infos = {}
+        index = {}
+        for app_config in apps.get_app_configs():
+            for model in app_config.get_models():
+                info = ModelInfo(model)
+                infos[model] = info
+                # Le premier modèle rencontré garde le nom court (ordre de INSTALLED_APPS)
+                index.setdefault(info.name.lower(), model)
+                index[info.label_lower] = model
+
+        project_infos = [info for info in infos.values() if info.is_project_model]
+        with self._lock:
+            self._infos = infos
+            self._index = index
+            self._chart_models = [info.as_chart_entry() for info in project_infos if info.numeric_fields]
+            self._grid_models = [info.as_grid_entry() for info in project_infos]
+
+    def _ensure_built(self):
+        if self._infos is None:
+            self.build()
+
+    def get_model(self, name):
+        """Retourne le modèle pour 'Order', 'order' ou 'sales.Order', sinon None."""
+        if not name:
+            return None
+        self._ensure_built()
+        return self._index.get(name.lower())
+
+    def get_info(self, model):
+        """Retourne le ModelInfo d'une classe de modèle (ou d'un nom)."""
+        self._ensure_built()
+        if isinstance(model, str):
+            model = self.get_model(model)
+        if model is None:
+            return None
+        info = self._infos.get(model)
+        if info is None:
+            # Modèle créé après la construction (tests, modèles dynamiques)
+            info = self._infos[model] = ModelInfo(model)
+        return info
+
+    def project_models(self):
+        """Modèles du projet (hors apps django.contrib, abstraits et proxy)."""
+        self._ensure_built()
+        return [info.model for info in self._infos.values() if info.is_project_model]
+
+    def chart_models(self):
+        """Modèles ayant au moins un champ numérique (pour les graphiques)."""
+        self._ensure_built()
+        return [dict(entry, fields=list(entry['fields'])) for entry in self._chart_models]
+
+    def grid_models(self):
+        """Modèles disponibles pour les grilles."""
+        self._ensure_built()
+        return [dict(entry) for entry in self._grid_models]
+
+
+# Instance globale du catalogue
+model_catalog = ModelCatalog()
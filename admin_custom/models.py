@@ -42,6 +42,7 @@ class DashboardChart(models.Model):
     chart_type = models.CharField(max_length=20, choices=CHART_TYPES, default='line')
     model_name = models.CharField(max_length=200)  # Nom du modèle principal
     field_name = models.CharField(max_length=200)  # Champ à analyser
+    date_field = models.CharField(max_length=200, blank=True, default='')  # Axe temporel ; vide = created_at ou premier champ date
     frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, default='month')
     operation = models.CharField(max_length=20, default='sum', blank=True)  # sum, avg, count, etc.
     created_at = models.DateTimeField(auto_now_add=True)
@@ -53,3 +54,81 @@ class DashboardChart(models.Model):
     class Meta:
         verbose_name = "Graphique"
         verbose_name_plural = "Graphiques"
+
+
+class MetricRollup(models.Model):
+    """
+    Agrégats journaliers pré-calculés (rollup) d'un modèle.
+    Une ligne par (modèle, champ numérique, jour) ; field_name vide = comptage des lignes.
+    """
+    model_label = models.CharField(max_length=200)  # ex: 'sales.order'
+    field_name = models.CharField(max_length=200, blank=True, default='')
+    day = models.DateField()
+    row_count = models.BigIntegerField(default=0)  # Lignes (ou valeurs non nulles du champ)
+    total = models.DecimalField(max_digits=30, decimal_places=6, null=True, blank=True)
+    minimum = models.DecimalField(max_digits=30, decimal_places=6, null=True, blank=True)
+    maximum = models.DecimalField(max_digits=30, decimal_places=6, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.model_label}.{self.field_name or '*'} {self.day}"
+
+    class Meta:
+        verbose_name = "Agrégat journalier"
+        verbose_name_plural = "Agrégats journaliers"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model_label', 'field_name', 'day'],
+                name='admin_custom_rollup_unique_day',
+            ),
+        ]
+
+
+class RollupState(models.Model):
+    """État des rollups d'un modèle : ils ne sont lus qu'une fois le backfill complet effectué."""
+    model_label = models.CharField(max_length=200, unique=True)
+    date_field = models.CharField(max_length=200, default='created_at')
+    is_ready = models.BooleanField(default=False)
+    last_backfill_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.model_label} ({'prêt' if self.is_ready else 'en attente'})"
+
+    class Meta:
+        verbose_name = "État des agrégats"
+        verbose_name_plural = "États des agrégats"
+
+
+class SearchIndexState(models.Model):
+    """État de l'index de recherche d'un modèle : utilisé par l'admin une fois construit."""
+    model_label = models.CharField(max_length=200, unique=True)
+    backend = models.CharField(max_length=20)
+    is_ready = models.BooleanField(default=False)
+    last_build_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.model_label} [{self.backend}] ({'prêt' if self.is_ready else 'en attente'})"
+
+    class Meta:
+        verbose_name = "État de l'index de recherche"
+        verbose_name_plural = "États des index de recherche"
+
+
+class SearchTrigram(models.Model):
+    """
+    Index inversé du moteur de recherche par trigrammes (bases sans
+    recherche plein texte) : une ligne par (objet, trigramme distinct).
+    """
+    model_label = models.CharField(max_length=200)
+    object_id = models.BigIntegerField()
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        verbose_name = "Trigramme de recherche"
+        verbose_name_plural = "Trigrammes de recherche"
+        indexes = [
+            models.Index(fields=['model_label', 'trigram', 'object_id'], name='admin_custom_trigram_lookup'),
+            models.Index(fields=['model_label', 'object_id'], name='admin_custom_trigram_object'),
+        ]
@@ -1,16 +1,80 @@
 """
 Mixin pour utiliser les templates Design 1 (moderne) lorsque l'interface moderne est active.
 """
-from django.utils.html import format_html
-from django.urls import reverse
+from contextvars import ContextVar
+from urllib.parse import quote
 
+from django.conf import settings
+from django.contrib.admin.utils import quote as admin_quote, unquote
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.paginator import Paginator
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.utils.html import escape, format_html
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.safestring import mark_safe
+from django.urls import path, reverse
+
+from . import search as search_index
+from .autocomplete import autocomplete_widget
 from .auth_views import SESSION_INTERFACE_KEY, INTERFACE_MODERN
+from .counts import ApproximateCountPaginator, get_count_options
+from .grid_query import display_relations
+
+
+# Colonne Actions précompilée pour la page de liste en cours : (admin, fragment HTML)
+_row_actions = ContextVar('admin_custom_row_actions', default=None)
+PK_PLACEHOLDER = '__pk__'
+DEFAULT_INLINE_PAGE_SIZE = 50
+
+
+def get_inline_config():
+    """
+    Inlines chargés à la demande sur le formulaire moderne :
+    ADMIN_CUSTOM['LAZY_INLINES'] = {'ENABLED': True, 'PAGE_SIZE': 50}
+    """
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    return admin_custom_config.get('LAZY_INLINES', {})
 
 
 def _use_modern_templates(request):
     return request.session.get(SESSION_INTERFACE_KEY) == INTERFACE_MODERN
 
 
+def _autocomplete_formfield_kwargs(model_admin, db_field, request, kwargs):
+    """Widget d'autocomplétion pour les grandes clés étrangères (voir autocomplete.py)."""
+    if 'widget' in kwargs or db_field.name in (
+        *model_admin.get_autocomplete_fields(request), *model_admin.raw_id_fields, *model_admin.radio_fields,
+    ):
+        return kwargs
+    widget = autocomplete_widget(db_field)
+    return {**kwargs, 'widget': widget} if widget else kwargs
+
+
+class RankedChangeList(ChangeList):
+    """
+    Liste classée par pertinence quand la recherche passe par l'index. Django
+    4.2 trie la liste après get_search_results (5.0 : avant), ce qui remplace
+    l'order_by posé par la recherche : le rang est donc aussi ajouté ici.
+    """
+    def get_ordering(self, request, queryset):
+        ordering = super().get_ordering(request, queryset)
+        query = queryset.query
+        ranked = 'search_rank' in query.annotations or 'search_rank' in query.extra
+        if ranked and ORDER_VAR not in self.params and ordering[:1] != ['-search_rank']:
+            return ['-search_rank', *ordering]
+        return ordering
+
+
+class ModernInlineMixin:
+    """Mixin des inlines : clés étrangères vers les grands modèles en autocomplétion."""
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        kwargs = _autocomplete_formfield_kwargs(self, db_field, request, kwargs)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
 class ModernTemplateMixin:
     """
     Mixin à hériter pour les ModelAdmin. Bascule automatiquement vers
@@ -18,6 +82,58 @@ class ModernTemplateMixin:
     lorsque admin_interface=modern dans la session.
     """
     change_list_template = 'admin_custom/change_list.html'
+    # Total estimé pour les grandes tables (ADMIN_CUSTOM['APPROXIMATE_COUNTS'])
+    paginator = ApproximateCountPaginator
+
+    @property
+    def show_full_result_count(self):
+        """Pas de second COUNT(*) sur la table entière quand son nombre de lignes est estimé."""
+        return get_count_options(self.model) is None
+
+    def get_list_select_related(self, request):
+        """
+        select_related déduit de list_display (voir grid_query.display_relations) :
+        colonnes relations et relations lues par leurs __str__ et par les
+        méthodes d'affichage. Une page de liste coûte alors un nombre constant
+        de requêtes. list_select_related = True ou une liste explicite reste
+        prioritaire (la liste est complétée).
+        """
+        configured = super().get_list_select_related(request)
+        if configured is True:
+            return True
+        derived = display_relations(self.model, self.get_list_display(request), self)
+        if configured:
+            return sorted(set(configured) | set(derived))
+        return derived or False
+
+    def get_changelist(self, request, **kwargs):
+        return RankedChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Recherche par l'index plein texte (voir search.py) quand il est construit
+        pour le modèle, sinon recherche de Django (icontains sur search_fields).
+        Sans tri choisi dans la liste, les résultats sont classés par pertinence.
+        """
+        result = search_index.search(queryset, search_term) if search_term else None
+        if result is None:
+            return super().get_search_results(request, queryset, search_term)
+        queryset, exact = result
+        if ORDER_VAR not in request.GET:
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        if not exact:
+            # Candidats du moteur à trigrammes : vérifiés par la recherche de Django
+            return super().get_search_results(request, queryset, search_term)
+        return queryset, False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """
+        Clés étrangères vers un modèle configuré dans ADMIN_CUSTOM['AUTOCOMPLETE']
+        et plus grand que son seuil : champ à suggestions au lieu d'un <select>
+        listant tous les objets.
+        """
+        kwargs = _autocomplete_formfield_kwargs(self, db_field, request, kwargs)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
     def get_list_display(self, request):
         """En mode moderne, ajoute une colonne Actions (voir, modifier) avec icônes."""
@@ -26,31 +142,39 @@ class ModernTemplateMixin:
             list_display.append('modern_actions')
         return list_display
 
-    def modern_actions(self, obj):
-        """Colonne Actions : icône œil (voir) et crayon (modifier) pour chaque enregistrement."""
-        if obj is None:
-            return ''
+    def modern_actions_html(self):
+        """
+        Fragment HTML de la colonne Actions avec PK_PLACEHOLDER à la place de la
+        clé primaire : reverse() et format_html une seule fois par page de liste.
+        """
         opts = self.model._meta
         change_url = reverse(
             'admin:%s_%s_change' % (opts.app_label, opts.model_name),
-            args=[obj.pk],
+            args=[PK_PLACEHOLDER],
             current_app=self.admin_site.name
         )
-        view_link = format_html(
-            '<a href="{}" title="Voir" class="action-icon view-icon">'
-            '<i class="fa-solid fa-eye"></i></a>',
-            change_url
-        )
-        edit_link = format_html(
-            '<a href="{}" title="Modifier" class="action-icon edit-icon">'
-            '<i class="fa-solid fa-pen"></i></a>',
-            change_url
-        )
         return format_html(
-            '<span class="modern-row-actions">{} {}</span>',
-            view_link, edit_link
+            '<span class="modern-row-actions">'
+            '<a href="{0}" title="Voir" class="action-icon view-icon">'
+            '<i class="fa-solid fa-eye"></i></a> '
+            '<a href="{0}" title="Modifier" class="action-icon edit-icon">'
+            '<i class="fa-solid fa-pen"></i></a>'
+            '</span>',
+            change_url
         )
 
+    def modern_actions(self, obj):
+        """Colonne Actions : icône œil (voir) et crayon (modifier) pour chaque enregistrement."""
+        if obj is None:
+            return ''
+        current = _row_actions.get()
+        html = current[1] if current and current[0] is self else self.modern_actions_html()
+        pk = str(obj.pk)
+        if not pk.isdigit():
+            # Même encodage que reverse(), puis échappement HTML
+            pk = escape(quote(pk, safe=RFC3986_SUBDELIMS + '/~:@'))
+        return mark_safe(html.replace(PK_PLACEHOLDER, pk))
+
     modern_actions.short_description = 'Actions'
     change_form_template = 'admin_custom/change_form.html'
     object_history_template = 'admin_custom/object_history.html'
@@ -67,42 +191,171 @@ class ModernTemplateMixin:
     def _use_modern_templates(self, request):
         return _use_modern_templates(request)
 
+    def _modern_response(self, request, response, template):
+        """Template moderne appliqué à la réponse de cette requête (l'admin partagé n'est pas modifié)."""
+        if template and isinstance(response, TemplateResponse) and self._use_modern_templates(request):
+            response.template_name = template
+        return response
+
     def changelist_view(self, request, extra_context=None):
-        orig = self.change_list_template
+        token = None
         if self._use_modern_templates(request):
-            self.change_list_template = self.modern_change_list_template
+            token = _row_actions.set((self, self.modern_actions_html()))
         try:
-            return super().changelist_view(request, extra_context)
+            response = super().changelist_view(request, extra_context)
+            # Seule la liste (pas les pages de confirmation des actions)
+            if 'cl' in (getattr(response, 'context_data', None) or {}):
+                self._modern_response(request, response, self.modern_change_list_template)
+            if token is not None and hasattr(response, 'render'):
+                # Rendu ici, tant que la colonne précompilée est disponible
+                response.render()
+            return response
         finally:
-            self.change_list_template = orig
+            if token is not None:
+                _row_actions.reset(token)
 
-    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
-        orig_form = self.change_form_template
-        orig_add = self.add_form_template
-        if self._use_modern_templates(request):
-            self.change_form_template = self.modern_change_form_template
-            if object_id is None and getattr(self, 'modern_add_form_template', None):
-                self.add_form_template = self.modern_add_form_template
-        try:
-            return super().changeform_view(request, object_id, form_url, extra_context)
-        finally:
-            self.change_form_template = orig_form
-            self.add_form_template = orig_add
+    def render_change_form(self, request, context, add=False, change=False, form_url='', obj=None):
+        if self._lazy_inlines(request, obj):
+            context['lazy_inlines'] = self._lazy_inline_placeholders(request, obj, context)
+        response = super().render_change_form(request, context, add, change, form_url, obj)
+        if add and self.modern_add_form_template:
+            template = self.modern_add_form_template
+        elif add and self.add_form_template is not None:
+            template = self.add_form_template
+        else:
+            template = self.modern_change_form_template
+        return self._modern_response(request, response, template)
 
     def history_view(self, request, object_id, extra_context=None):
-        orig = self.object_history_template
-        if self._use_modern_templates(request):
-            self.object_history_template = self.modern_object_history_template
-        try:
-            return super().history_view(request, object_id, extra_context)
-        finally:
-            self.object_history_template = orig
+        response = super().history_view(request, object_id, extra_context)
+        return self._modern_response(request, response, self.modern_object_history_template)
 
-    def delete_view(self, request, object_id, extra_context=None):
-        orig = self.delete_confirmation_template
-        if self._use_modern_templates(request):
-            self.delete_confirmation_template = self.modern_delete_confirmation_template
-        try:
-            return super().delete_view(request, object_id, extra_context)
-        finally:
-            self.delete_confirmation_template = orig
+    def render_delete_form(self, request, context):
+        response = super().render_delete_form(request, context)
+        return self._modern_response(request, response, self.modern_delete_confirmation_template)
+
+    # Inlines à la demande ------------------------------------------------
+
+    modern_inline_fragment_template = 'admin_custom/modern/inline_fragment.html'
+
+    def _lazy_inlines(self, request, obj):
+        """Inlines chargés par fragments : formulaire moderne d'un objet existant."""
+        return (
+            obj is not None and obj.pk is not None
+            and get_inline_config().get('ENABLED', True)
+            and self._use_modern_templates(request)
+        )
+
+    def _inline_prefixes(self, request, obj):
+        """[(préfixe, FormSet, inline)] de tous les inlines, préfixes numérotés comme par l'admin."""
+        counts = {}
+        inlines = []
+        for FormSet, inline in super().get_formsets_with_inlines(request, obj):
+            prefix = FormSet.get_default_prefix()
+            counts[prefix] = counts.get(prefix, 0) + 1
+            if counts[prefix] != 1 or not prefix:
+                prefix = f'{prefix}-{counts[prefix]}'
+            inlines.append((prefix, FormSet, inline))
+        return inlines
+
+    def get_formsets_with_inlines(self, request, obj=None):
+        """
+        Formulaire moderne : aucun formset construit à l'affichage (chargés par
+        inline_view) ; à l'enregistrement, seuls ceux dont le formulaire de
+        gestion a été envoyé (inlines effectivement chargés).
+        """
+        if not self._lazy_inlines(request, obj):
+            yield from super().get_formsets_with_inlines(request, obj)
+            return
+        if request.method != 'POST':
+            return
+        for prefix, FormSet, inline in self._inline_prefixes(request, obj):
+            if f'{prefix}-TOTAL_FORMS' in request.POST:
+                yield FormSet, inline
+
+    def get_formset_kwargs(self, request, obj, inline, prefix):
+        """Formset envoyé depuis un fragment : seules les lignes de la page reçue sont lues."""
+        kwargs = super().get_formset_kwargs(request, obj, inline, prefix)
+        if request.method == 'POST' and self._lazy_inlines(request, obj):
+            pk_field = inline.model._meta.pk
+            try:
+                initial = int(request.POST.get(f'{prefix}-INITIAL_FORMS', 0))
+                pks = [
+                    pk_field.to_python(request.POST[key])
+                    for key in (f'{prefix}-{index}-{pk_field.name}' for index in range(initial))
+                    if request.POST.get(key)
+                ]
+            except (ValueError, ValidationError):
+                pks = None  # Données invalides : le formset les signalera
+            if pks is not None:
+                kwargs['queryset'] = kwargs['queryset'].filter(pk__in=pks)
+        return kwargs
+
+    def _lazy_inline_placeholders(self, request, obj, context):
+        """
+        Inlines non rendus sur la page : titre et URL de leur fragment. Leurs
+        fichiers JS/CSS sont ajoutés au media de la page.
+        """
+        opts = self.model._meta
+        rendered = {formset.formset.prefix for formset in context.get('inline_admin_formsets', ())}
+        placeholders = []
+        for index, (prefix, FormSet, inline) in enumerate(self._inline_prefixes(request, obj)):
+            if prefix in rendered:
+                continue
+            formset = FormSet(instance=obj, prefix=prefix, queryset=inline.get_queryset(request).none())
+            context['media'] = context['media'] + inline.media + formset.media
+            placeholders.append({
+                'title': inline.verbose_name_plural,
+                'url': reverse(
+                    'admin:%s_%s_inline' % (opts.app_label, opts.model_name),
+                    args=[admin_quote(obj.pk), index], current_app=self.admin_site.name,
+                ),
+            })
+        return placeholders
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                '<path:object_id>/inline/<int:index>/',
+                self.admin_site.admin_view(self.inline_view),
+                name='%s_%s_inline' % (opts.app_label, opts.model_name),
+            ),
+        ] + super().get_urls()
+
+    def inline_view(self, request, object_id, index):
+        """
+        Fragment HTML d'un inline du formulaire moderne : une page de
+        PAGE_SIZE objets liés (?page=), prête à être insérée dans le formulaire.
+        """
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None:
+            raise Http404
+        if not self.has_view_or_change_permission(request, obj):
+            raise PermissionDenied
+        inlines = self._inline_prefixes(request, obj)
+        if index >= len(inlines):
+            raise Http404
+        prefix, FormSet, inline = inlines[index]
+
+        kwargs = self.get_formset_kwargs(request, obj, inline, prefix)
+        queryset = kwargs['queryset']
+        page = None
+        fk = getattr(FormSet, 'fk', None)
+        if fk is not None:
+            queryset = queryset.filter(**{fk.name: obj})
+            if not queryset.ordered:
+                queryset = queryset.order_by('pk')
+            page_size = get_inline_config().get('PAGE_SIZE', DEFAULT_INLINE_PAGE_SIZE)
+            page = Paginator(queryset.values_list('pk', flat=True), page_size).get_page(request.GET.get('page'))
+            queryset = queryset.filter(pk__in=list(page.object_list))
+        formset = FormSet(**{**kwargs, 'queryset': queryset})
+
+        inline_admin_formsets = self.get_inline_formsets(request, [formset], [inline], obj)
+        return TemplateResponse(request, self.modern_inline_fragment_template, {
+            'inline_admin_formset': inline_admin_formsets[0],
+            'inline_admin_formsets': inline_admin_formsets,
+            'page': page,
+            'fragment_url': request.path,
+            'opts': self.model._meta,
+        })
@@ -41,33 +41,9 @@ def modern_dashboard(request):
     if redirect_check:
         return redirect_check
 
-    # Stats - même logique que l'API stats
-    from .views import get_model_class
-    order_model = get_model_class('Order')
-    invoice_model = get_model_class('Invoice')
-    payment_model = get_model_class('Payment')
-    product_model = get_model_class('Product')
-
-    stats = {
-        'orders': order_model.objects.count() if order_model else 0,
-        'invoices': invoice_model.objects.count() if invoice_model else 0,
-        'payments': payment_model.objects.count() if payment_model else 0,
-        'products': product_model.objects.count() if product_model else 0,
-        'revenue': 0,
-    }
-
-    total_revenue = 0
-    for app_config in apps.get_app_configs():
-        if app_config.name.startswith('django.contrib'):
-            continue
-        for model in app_config.get_models():
-            if model._meta.abstract or model._meta.proxy:
-                continue
-            if hasattr(model, 'total_amount'):
-                total_revenue += float(model.objects.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-            elif hasattr(model, 'amount'):
-                total_revenue += float(model.objects.aggregate(Sum('amount'))['amount__sum'] or 0)
-    stats['revenue'] = total_revenue
+    # Stats - même service que l'API stats
+    from .stats import collect_stats
+    stats = collect_stats().legacy()
 
     context = _get_modern_context(request, {
         'title': 'Tableau de bord',
@@ -0,0 +1,542 @@
+"""
+Rollups : agrégats journaliers pré-calculés pour les tableaux de bord
+
+Pour chaque modèle configuré, une ligne MetricRollup par jour et par champ
+numérique (nombre de valeurs, somme, min, max), plus une ligne de comptage
+(field_name vide). Les graphiques (fréquence jour ou plus large) et les
+cartes de statistiques lisent ces quelques centaines de lignes au lieu de
+parcourir toute la table source.
+
+Les rollups sont maintenus par les signaux post_save/post_delete et peuvent
+être (re)construits avec la commande `rollup_metrics`.
+
+Configuration :
+
+    # settings.py
+    ADMIN_CUSTOM = {
+        'ROLLUPS': {
+            'sales.Order': {'date_field': 'created_at'},
+            'sales.Payment': {},  # date_field par défaut : created_at
+        },
+    }
+
+Une simple liste de labels (['sales.Order', ...]) est aussi acceptée.
+"""
+import logging
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import (
+    Count, DateTimeField, DecimalField, F, Max, Min, Q, Sum, Value,
+)
+from django.db.models.functions import Coalesce, Greatest, Least, TruncDate
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.utils import timezone
+
+from .aggregation import (
+    TRUNC_FUNCTIONS, aggregate_by_bucket, bucket_label, bucket_window,
+)
+from .cache import result_cache
+from .model_catalog import model_catalog
+from .models import MetricRollup, RollupState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATE_FIELD = 'created_at'
+COUNT_FIELD = ''  # field_name des lignes de comptage
+
+_config = None
+_local = threading.local()
+# {(label, date_field): (génération de RollupState, prêts)} : état lu une fois par processus
+_ready = {}
+
+
+def get_rollup_config():
+    """
+    Retourne la configuration des rollups normalisée :
+    {label_lower: {'model', 'label', 'date_field', 'fields'}}
+    """
+    global _config
+    if _config is not None:
+        return _config
+
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    raw = admin_custom_config.get('ROLLUPS', {})
+    if isinstance(raw, (list, tuple)):
+        raw = {label: {} for label in raw}
+
+    config = {}
+    for label, options in raw.items():
+        options = options or {}
+        try:
+            model = apps.get_model(label)
+        except (LookupError, ValueError):
+            logger.warning(f"Rollups : modèle inconnu '{label}', ignoré")
+            continue
+        date_field = options.get('date_field', DEFAULT_DATE_FIELD)
+        try:
+            model._meta.get_field(date_field)
+        except Exception:
+            logger.warning(f"Rollups : champ '{date_field}' absent de {label}, ignoré")
+            continue
+        config[model._meta.label_lower] = {
+            'model': model,
+            'label': model._meta.label_lower,
+            'date_field': date_field,
+            'fields': list(options.get('fields') or model_catalog.get_info(model).numeric_fields),
+        }
+    _config = config
+    return config
+
+
+def reset_rollup_config():
+    """Force la relecture de settings.ADMIN_CUSTOM['ROLLUPS'] et de l'état des rollups (tests)."""
+    global _config
+    _config = None
+    _ready.clear()
+
+
+def get_rollup_options(model):
+    return get_rollup_config().get(model._meta.label_lower)
+
+
+# ---------------------------------------------------------------------------
+# Calcul depuis la table source
+# ---------------------------------------------------------------------------
+
+def _local_day(value):
+    """Jour local (fuseau courant) d'une valeur date/datetime."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
+
+
+def _to_decimal(value):
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def _day_filter(model, date_field, start_day=None, end_day=None):
+    """Filtre [start_day, end_day[ exprimé sur le champ source (index utilisable)."""
+    is_datetime = isinstance(model._meta.get_field(date_field), DateTimeField)
+    filters = {}
+    for lookup, day in (('gte', start_day), ('lt', end_day)):
+        if day is None:
+            continue
+        bound = day
+        if is_datetime:
+            bound = datetime.combine(day, time.min)
+            if settings.USE_TZ:
+                bound = timezone.make_aware(bound)
+        filters[f'{date_field}__{lookup}'] = bound
+    return filters
+
+
+def compute_rollups(model, options, start_day=None, end_day=None):
+    """
+    Calcule les lignes MetricRollup (non sauvegardées) de [start_day, end_day[
+    en une seule requête groupée par jour sur la table source.
+    """
+    date_field = options['date_field']
+    fields = options['fields']
+
+    aggregates = {'n': Count('pk')}
+    for index, field_name in enumerate(fields):
+        aggregates[f'f{index}_n'] = Count(field_name)
+        aggregates[f'f{index}_s'] = Sum(field_name)
+        aggregates[f'f{index}_min'] = Min(field_name)
+        aggregates[f'f{index}_max'] = Max(field_name)
+
+    if isinstance(model._meta.get_field(date_field), DateTimeField):
+        day_expression = TruncDate(date_field)
+    else:
+        day_expression = F(date_field)
+
+    rows = (
+        model._base_manager
+        .filter(**_day_filter(model, date_field, start_day, end_day))
+        .exclude(**{f'{date_field}__isnull': True})
+        .annotate(_day=day_expression)
+        .order_by()
+        .values('_day')
+        .annotate(**aggregates)
+    )
+
+    label = options['label']
+    rollups = []
+    for row in rows:
+        day = row['_day']
+        rollups.append(MetricRollup(
+            model_label=label, field_name=COUNT_FIELD, day=day, row_count=row['n'],
+        ))
+        for index, field_name in enumerate(fields):
+            if not row[f'f{index}_n']:
+                continue
+            rollups.append(MetricRollup(
+                model_label=label,
+                field_name=field_name,
+                day=day,
+                row_count=row[f'f{index}_n'],
+                total=_to_decimal(row[f'f{index}_s']),
+                minimum=_to_decimal(row[f'f{index}_min']),
+                maximum=_to_decimal(row[f'f{index}_max']),
+            ))
+    return rollups
+
+
+def rebuild_rollups(model, start_day=None, end_day=None, batch_size=1000):
+    """
+    Reconstruit les rollups de [start_day, end_day[ (toute la table si aucune borne).
+    Une reconstruction complète marque les rollups du modèle comme prêts.
+
+    Returns:
+        Nombre de jours reconstruits
+    """
+    options = get_rollup_options(model)
+    if options is None:
+        raise ValueError(f"{model._meta.label} n'est pas configuré dans ADMIN_CUSTOM['ROLLUPS']")
+
+    existing = MetricRollup.objects.filter(model_label=options['label'])
+    if start_day is not None:
+        existing = existing.filter(day__gte=start_day)
+    if end_day is not None:
+        existing = existing.filter(day__lt=end_day)
+
+    with transaction.atomic():
+        rollups = compute_rollups(model, options, start_day, end_day)
+        existing.delete()
+        MetricRollup.objects.bulk_create(rollups, batch_size=batch_size)
+        if start_day is None and end_day is None:
+            RollupState.objects.update_or_create(
+                model_label=options['label'],
+                defaults={
+                    'date_field': options['date_field'],
+                    'is_ready': True,
+                    'last_backfill_at': timezone.now(),
+                },
+            )
+            # État relu par ce processus tout de suite, par les autres après le commit
+            _ready.pop((options['label'], options['date_field']), None)
+            transaction.on_commit(partial(result_cache.bump, RollupState))
+    return len({rollup.day for rollup in rollups})
+
+
+def rebuild_ready_rollups(models):
+    """
+    Reconstruit les rollups déjà construits des modèles donnés, après des
+    écritures qui n'émettent pas de signaux (bulk_create, DELETE directs).
+
+    Returns:
+        {modèle: nombre de jours reconstruits}
+    """
+    rebuilt = {}
+    for model in models:
+        options = get_rollup_options(model)
+        if options and RollupState.objects.filter(model_label=options['label'], is_ready=True).exists():
+            rebuilt[model] = rebuild_rollups(model)
+    return rebuilt
+
+
+def refresh_days(model, days):
+    """Recalcule entièrement les jours donnés depuis la table source."""
+    options = get_rollup_options(model)
+    if options is None:
+        return
+    label = options['label']
+    with transaction.atomic():
+        for day in sorted(set(days)):
+            rollups = compute_rollups(model, options, day, day + timedelta(days=1))
+            MetricRollup.objects.filter(model_label=label, day=day).delete()
+            MetricRollup.objects.bulk_create(rollups)
+
+
+# ---------------------------------------------------------------------------
+# Maintenance incrémentale (signaux)
+# ---------------------------------------------------------------------------
+
+def _flush_pending(pending):
+    if getattr(_local, 'pending', None) is pending:
+        # Les écritures suivantes planifient un nouveau recalcul
+        _local.flush = None
+    by_model = {}
+    for model, day in pending:
+        by_model.setdefault(model, set()).add(day)
+    pending.clear()
+    for model, days in by_model.items():
+        refresh_days(model, days)
+
+
+def schedule_refresh(model, day, using='default'):
+    """
+    Planifie le recalcul d'un jour. Dans une transaction, les jours touchés
+    sont regroupés et recalculés une seule fois au commit (suppressions en
+    cascade, imports...).
+    """
+    if day is None:
+        return
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        refresh_days(model, [day])
+        return
+
+    flush = getattr(_local, 'flush', None)
+    registered = flush is not None and any(entry[1] is flush for entry in connection.run_on_commit)
+    if not registered:
+        _local.pending = set()
+        _local.flush = flush = partial(_flush_pending, _local.pending)
+        transaction.on_commit(flush, using=using)
+    _local.pending.add((model, day))
+
+
+def _apply_creation(model, options, instance, day, using):
+    """Ajoute une nouvelle ligne aux rollups de son jour par incréments atomiques."""
+    rows = MetricRollup.objects.filter(model_label=options['label'], day=day)
+    if not rows.filter(field_name=COUNT_FIELD).update(row_count=F('row_count') + 1):
+        # Premier enregistrement du jour : recalcul complet du jour
+        schedule_refresh(model, day, using)
+        return
+
+    for field_name in options['fields']:
+        value = _to_decimal(getattr(instance, field_name, None))
+        if value is None:
+            continue
+        value = Value(value, output_field=DecimalField())
+        updated = rows.filter(field_name=field_name).update(
+            row_count=F('row_count') + 1,
+            total=Coalesce(F('total'), Value(Decimal('0'), output_field=DecimalField())) + value,
+            minimum=Least(Coalesce(F('minimum'), value), value),
+            maximum=Greatest(Coalesce(F('maximum'), value), value),
+        )
+        if not updated:
+            schedule_refresh(model, day, using)
+            return
+
+
+def _tracked_values(instance, options):
+    """{champ: valeur} du champ date et des champs agrégés, ou None si l'un est différé."""
+    names = (options['date_field'], *options['fields'])
+    values = instance.__dict__
+    if not all(name in values for name in names):
+        return None
+    return {'pk': instance.pk, **{name: values[name] for name in names}}
+
+
+def _on_post_init(sender, instance, **kwargs):
+    # Valeurs chargées : anciennes valeurs du prochain save sans relire la ligne
+    options = get_rollup_options(sender)
+    if options is not None and instance.pk is not None:
+        instance._admin_custom_rollup_loaded = _tracked_values(instance, options)
+
+
+def _on_pre_save(sender, instance, raw=False, using='default', **kwargs):
+    options = get_rollup_options(sender)
+    if raw or options is None or instance._state.adding or instance.pk is None:
+        return
+    # Anciennes valeurs pour détecter un changement de jour ou de montant : celles
+    # chargées ou sauvegardées en dernier, sinon (champs différés) relues en base
+    old = instance.__dict__.get('_admin_custom_rollup_loaded')
+    if old is None or old['pk'] != instance.pk:
+        old = (
+            sender._base_manager.using(using)
+            .filter(pk=instance.pk)
+            .values(options['date_field'], *options['fields'])
+            .first()
+        )
+    instance._admin_custom_rollup_old = old
+
+
+def _on_post_save(sender, instance, created=False, raw=False, using='default', **kwargs):
+    options = get_rollup_options(sender)
+    if raw or options is None:
+        return
+
+    day = _local_day(getattr(instance, options['date_field'], None))
+    instance._admin_custom_rollup_loaded = _tracked_values(instance, options)
+    if created:
+        if day is not None:
+            _apply_creation(sender, options, instance, day, using)
+        return
+
+    old = instance.__dict__.pop('_admin_custom_rollup_old', None)
+    if old is None:
+        schedule_refresh(sender, day, using)
+        return
+
+    old_day = _local_day(old[options['date_field']])
+    unchanged = old_day == day and all(
+        _to_decimal(old[field_name]) == _to_decimal(getattr(instance, field_name, None))
+        for field_name in options['fields']
+    )
+    if not unchanged:
+        schedule_refresh(sender, old_day, using)
+        schedule_refresh(sender, day, using)
+
+
+def _on_post_delete(sender, instance, using='default', **kwargs):
+    options = get_rollup_options(sender)
+    if options is None:
+        return
+    schedule_refresh(sender, _local_day(getattr(instance, options['date_field'], None)), using)
+
+
+def connect_signals():
+    """Branche la maintenance incrémentale sur chaque modèle configuré."""
+    for options in get_rollup_config().values():
+        model = options['model']
+        uid = f"admin_custom_rollup_{options['label']}"
+        post_init.connect(_on_post_init, sender=model, dispatch_uid=f'{uid}_post_init')
+        pre_save.connect(_on_pre_save, sender=model, dispatch_uid=f'{uid}_pre_save')
+        post_save.connect(_on_post_save, sender=model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(_on_post_delete, sender=model, dispatch_uid=f'{uid}_post_delete')
+
+
+# ---------------------------------------------------------------------------
+# Lecture
+# ---------------------------------------------------------------------------
+
+def get_ready_options(model, date_field=None):
+    """
+    Options des rollups du modèle s'ils sont construits et correspondent à
+    l'axe temporel demandé, sinon None (lecture directe de la table source).
+    """
+    options = get_rollup_options(model)
+    if options is None:
+        return None
+    if date_field is not None and date_field != options['date_field']:
+        return None
+    return options if _is_ready(options) else None
+
+
+def _is_ready(options):
+    """
+    Rollups construits ? RollupState est lu une fois par processus, puis relu
+    quand rebuild_rollups incrémente sa génération dans le cache des APIs.
+    Cache désactivé : seul l'état « prêts » est conservé (il ne revient pas
+    en arrière), l'état « en attente » est relu à chaque appel.
+    """
+    key = (options['label'], options['date_field'])
+    generation = (
+        result_cache.get_generations([RollupState])[RollupState._meta.label_lower]
+        if result_cache.enabled else None
+    )
+    cached = _ready.get(key)
+    if cached is not None and cached[0] == generation and (cached[1] or generation is not None):
+        return cached[1]
+    is_ready = RollupState.objects.filter(
+        model_label=options['label'],
+        date_field=options['date_field'],
+        is_ready=True,
+    ).exists()
+    _ready[key] = (generation, is_ready)
+    return is_ready
+
+
+def rollup_chart_series_many(model, metrics, frequency='month', date_field='created_at',
+                             periods=None, now=None, start=None, end=None):
+    """
+    Équivalent de aggregation.chart_series_many lu depuis les rollups, en une
+    seule requête pour toutes les métriques du modèle.
+
+    Returns:
+        Liste alignée sur `metrics` : une série, ou None pour les métriques
+        auxquelles les rollups ne peuvent pas répondre.
+    """
+    if frequency not in TRUNC_FUNCTIONS:
+        return [None] * len(metrics)
+    options = get_ready_options(model, date_field)
+    if options is None:
+        return [None] * len(metrics)
+
+    rollup_fields = []
+    for field_name, operation in metrics:
+        if operation not in ('sum', 'avg'):
+            rollup_fields.append(COUNT_FIELD)
+        elif field_name in options['fields']:
+            rollup_fields.append(field_name)
+        else:
+            rollup_fields.append(None)
+    wanted = sorted({field for field in rollup_fields if field is not None})
+    if not wanted:
+        return [None] * len(metrics)
+
+    aggregates = {}
+    for index, rollup_field in enumerate(wanted):
+        condition = Q(field_name=rollup_field)
+        aggregates[f'n_{index}'] = Sum('row_count', filter=condition)
+        aggregates[f's_{index}'] = Sum('total', filter=condition)
+    starts, lower, upper = bucket_window(frequency, periods, now, start, end)
+    buckets = aggregate_by_bucket(
+        MetricRollup.objects.filter(model_label=options['label'], field_name__in=wanted),
+        'day', frequency, aggregates, lower, upper,
+    )
+
+    labels = [bucket_label(start, frequency) for start in starts]
+    results = []
+    for (field_name, operation), rollup_field in zip(metrics, rollup_fields):
+        if rollup_field is None:
+            results.append(None)
+            continue
+        index = wanted.index(rollup_field)
+        data = []
+        for start in starts:
+            bucket = buckets.get(start) or {}
+            count = bucket.get(f'n_{index}') or 0
+            total = float(bucket.get(f's_{index}') or 0)
+            if operation == 'sum':
+                data.append(total)
+            elif operation == 'avg':
+                data.append(total / count if count else 0.0)
+            else:
+                data.append(int(count))
+        results.append({'labels': list(labels), 'data': data})
+    return results
+
+
+def rollup_chart_series(model, field_name, frequency='month', operation='sum',
+                        date_field='created_at', periods=None, now=None, start=None, end=None):
+    """
+    Équivalent de aggregation.chart_series lu depuis les rollups.
+    Retourne None si les rollups ne peuvent pas répondre à la demande.
+    """
+    return rollup_chart_series_many(
+        model, [(field_name, operation)], frequency, date_field, periods, now, start, end,
+    )[0]
+
+
+def rollup_totals(model, field_name=None):
+    """
+    Retourne (nombre de lignes, somme de field_name) depuis les rollups,
+    ou None si les rollups ne couvrent pas le modèle/champ.
+    """
+    options = get_ready_options(model)
+    if options is None:
+        return None
+    if model._meta.get_field(options['date_field']).null:
+        # Les lignes sans date ne sont pas agrégées : le total serait faux
+        return None
+    if field_name and field_name not in options['fields']:
+        return None
+
+    rows = (
+        MetricRollup.objects
+        .filter(model_label=options['label'], field_name__in={COUNT_FIELD, field_name or COUNT_FIELD})
+        .values('field_name')
+        .annotate(n=Sum('row_count'), s=Sum('total'))
+    )
+    totals = {row['field_name']: row for row in rows}
+    count = int((totals.get(COUNT_FIELD) or {}).get('n') or 0)
+    total = float((totals.get(field_name) or {}).get('s') or 0) if field_name else 0.0
+    return count, total
+
@@ -0,0 +1,474 @@
+"""
+Recherche plein texte des listes admin (search_fields)
+
+La recherche par défaut de Django enchaîne des icontains reliés par OR sur
+chaque champ (jointures comprises) : un parcours complet de la table à
+chaque recherche. Pour les modèles configurés, un index inversé est
+maintenu par les signaux post_save/post_delete et interrogé par
+ModernTemplateMixin.get_search_results ; sans tri demandé, les résultats
+sont classés par pertinence.
+
+    - SQLite : table virtuelle FTS5, tokenizer trigram (sous-chaînes, comme icontains)
+    - PostgreSQL : table tsvector + index GIN (préfixes de mots)
+    - autres bases, ou BACKEND = 'trigram' : trigrammes calculés en Python
+      (table SearchTrigram) ; les candidats sont vérifiés par la recherche
+      de Django
+
+Configuration :
+
+    # settings.py
+    ADMIN_CUSTOM = {
+        'SEARCH': {
+            'BACKEND': 'auto',  # défaut ; 'trigram' force le moteur générique
+            'MODELS': {
+                'sales.Order': {},  # champs indexés : search_fields de l'admin
+                'catalog.Product': {'fields': ['name', 'sku', 'description']},
+            },
+        },
+    }
+
+Une simple liste de labels (['sales.Order', ...]) est aussi acceptée.
+L'index est construit par la commande `search_index` et n'est utilisé
+qu'ensuite. Les termes de moins de 3 caractères passent par la recherche
+de Django.
+
+Limite : modifier un objet lié (l'e-mail d'un client) ne met pas à jour les
+documents qui l'incluent (user__email des commandes), pas plus que les
+écritures en masse sans signaux ; reconstruire l'index avec search_index.
+"""
+import logging
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.text import smart_split, unescape_string_literal
+
+from .models import SearchIndexState, SearchTrigram
+
+logger = logging.getLogger(__name__)
+
+MIN_TERM_LENGTH = 3
+DEFAULT_BATCH_SIZE = 2000
+INTEGER_KEYS = {'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField'}
+
+_config = None
+
+
+def get_search_config():
+    """
+    Retourne la configuration de la recherche normalisée :
+    {label_lower: {'model', 'label', 'fields'}} (fields None : search_fields de l'admin)
+    """
+    global _config
+    if _config is not None:
+        return _config
+
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    raw = admin_custom_config.get('SEARCH', {}).get('MODELS', {})
+    if isinstance(raw, (list, tuple)):
+        raw = {label: {} for label in raw}
+
+    config = {}
+    for label, options in raw.items():
+        options = options or {}
+        try:
+            model = apps.get_model(label)
+        except (LookupError, ValueError):
+            logger.warning(f"Recherche : modèle inconnu '{label}', ignoré")
+            continue
+        if model._meta.pk.get_internal_type() not in INTEGER_KEYS:
+            logger.warning(f"Recherche : {label} n'a pas de clé primaire entière, ignoré")
+            continue
+        config[model._meta.label_lower] = {
+            'model': model,
+            'label': model._meta.label_lower,
+            'fields': list(options.get('fields') or []) or None,
+        }
+    _config = config
+    return config
+
+
+def reset_search_config():
+    """Force la relecture de settings.ADMIN_CUSTOM['SEARCH'] (tests)."""
+    global _config
+    _config = None
+
+
+def get_search_options(model):
+    return get_search_config().get(model._meta.label_lower)
+
+
+def search_fields(model):
+    """Chemins indexés : champs configurés, sinon search_fields de l'admin (sans préfixe ^ = @)."""
+    options = get_search_options(model)
+    if options is None:
+        return []
+    if options['fields']:
+        return options['fields']
+
+    from django.urls import get_resolver
+    from .admin_views import get_custom_admin_site
+
+    registry = get_custom_admin_site()._registry
+    if model not in registry:
+        get_resolver().url_patterns  # les admins sont enregistrés à l'import des URLs
+    return [name.lstrip('^=@') for name in getattr(registry.get(model), 'search_fields', ())]
+
+
+def document(instance, fields):
+    """Texte indexé d'un objet : valeurs des chemins `fields`, relations suivies."""
+    values = []
+    for path in fields:
+        value = instance
+        for part in path.split('__'):
+            value = getattr(value, part, None)
+            if value is None:
+                break
+        if value is not None and value != '':
+            values.append(str(value))
+    return ' '.join(values)
+
+
+def search_terms(search_term):
+    """Termes de la recherche, découpés comme par l'admin de Django (guillemets compris)."""
+    terms = []
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        bit = bit.strip()
+        if bit:
+            terms.append(bit)
+    return terms
+
+
+def trigrams(text):
+    """Trigrammes distincts d'un texte (minuscules, espaces normalisés)."""
+    text = ' '.join(text.lower().split())
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+# ---------------------------------------------------------------------------
+# Moteurs
+# ---------------------------------------------------------------------------
+
+class SearchBackend:
+    """
+    Interface d'un moteur d'index : une table par modèle, les documents
+    identifiés par la clé primaire de l'objet.
+    """
+    name = None
+    key_column = 'object_id'  # colonne de la table d'index portant la clé primaire
+    # Faux : filter() retourne des candidats à vérifier par la recherche de Django
+    exact = True
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def table_name(self, model):
+        return f'admin_custom_fts_{model._meta.db_table}'
+
+    def table(self, model):
+        return self.connection.ops.quote_name(self.table_name(model))
+
+    def pk_column(self, model):
+        quote_name = self.connection.ops.quote_name
+        return f'{quote_name(model._meta.db_table)}.{quote_name(model._meta.pk.column)}'
+
+    def create_table(self, model):
+        """Crée la table d'index si elle n'existe pas."""
+
+    def clear(self, model):
+        raise NotImplementedError
+
+    def index(self, model, documents, replace=True):
+        """Indexe [(pk, texte)] ; replace=False quand l'index vient d'être vidé."""
+        raise NotImplementedError
+
+    def remove(self, model, pks):
+        raise NotImplementedError
+
+    def filter(self, queryset, terms):
+        """QuerySet restreint aux objets trouvés, avec search_rank (plus grand = plus pertinent)."""
+        raise NotImplementedError
+
+    def join(self, queryset, match, params, rank, rank_params=()):
+        """
+        Jointure avec la table d'index (extra() : table hors ORM). Le score est
+        lu sur la ligne jointe : une sous-requête corrélée réévaluerait la
+        recherche pour chaque résultat.
+        """
+        model = queryset.model
+        return queryset.extra(
+            select={'search_rank': rank},
+            select_params=list(rank_params),
+            tables=[self.table_name(model)],
+            where=[f'{self.table(model)}.{self.key_column} = {self.pk_column(model)}', match],
+            params=params,
+        )
+
+
+class SQLiteBackend(SearchBackend):
+    """Table virtuelle FTS5 (tokenizer trigram), rowid = clé primaire."""
+    name = 'fts5'
+    key_column = 'rowid'
+
+    def create_table(self, model):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table(model)} USING fts5(body, tokenize='trigram')"
+            )
+
+    def clear(self, model):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table(model)}')
+
+    def index(self, model, documents, replace=True):
+        table = self.table(model)
+        with self.connection.cursor() as cursor:
+            if replace:
+                cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [(pk,) for pk, _ in documents])
+            cursor.executemany(f'INSERT INTO {table} (rowid, body) VALUES (%s, %s)', documents)
+
+    def remove(self, model, pks):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table(model)} WHERE rowid = %s', [(pk,) for pk in pks])
+
+    def filter(self, queryset, terms):
+        # Chaque terme est une phrase : sous-chaîne exacte, insensible à la casse
+        query = ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+        table = self.table(queryset.model)
+        # rank (bm25) : plus petit = plus pertinent
+        return self.join(queryset, f'{table} MATCH %s', [query], f'-{table}.rank')
+
+
+class PostgreSQLBackend(SearchBackend):
+    """
+    Table (object_id, document tsvector) avec index GIN, configuration 'simple'.
+    Recherche par préfixes de mots : un terme au milieu d'un mot (« 0123 » dans
+    « CMD-0000123 ») n'est pas trouvé, contrairement à icontains ; utiliser le
+    moteur 'trigram' pour ces recherches. Les candidats sont vérifiés par la
+    recherche de Django : jamais plus de résultats que search_fields.
+    """
+    name = 'tsvector'
+    exact = False
+
+    def create_table(self, model):
+        table = self.table(model)
+        index = self.connection.ops.quote_name(f'{self.table_name(model)}_gin')
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} (object_id bigint PRIMARY KEY, document tsvector NOT NULL)'
+            )
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {index} ON {table} USING GIN (document)')
+
+    def clear(self, model):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table(model)}')
+
+    def index(self, model, documents, replace=True):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table(model)} (object_id, document) VALUES (%s, to_tsvector('simple', %s)) "
+                'ON CONFLICT (object_id) DO UPDATE SET document = EXCLUDED.document',
+                documents,
+            )
+
+    def remove(self, model, pks):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table(model)} WHERE object_id = ANY(%s)', [list(pks)])
+
+    def filter(self, queryset, terms):
+        # Préfixes des mots de chaque terme, tous requis
+        words = [word for term in terms for word in re.findall(r'\w+', term.lower())]
+        if not words:
+            return None
+        query = ' & '.join(f'{word}:*' for word in words)
+        table = self.table(queryset.model)
+        return self.join(
+            queryset,
+            f"{table}.document @@ to_tsquery('simple', %s)", [query],
+            f"ts_rank({table}.document, to_tsquery('simple', %s))", [query],
+        )
+
+
+class TrigramBackend(SearchBackend):
+    """Trigrammes calculés en Python dans SearchTrigram (toutes bases)."""
+    name = 'trigram'
+    exact = False
+
+    def clear(self, model):
+        rows = SearchTrigram.objects.filter(model_label=model._meta.label_lower)
+        rows._raw_delete(rows.db)
+
+    def index(self, model, documents, replace=True):
+        label = model._meta.label_lower
+        if replace:
+            self.remove(model, [pk for pk, _ in documents])
+        SearchTrigram.objects.bulk_create(
+            [
+                SearchTrigram(model_label=label, object_id=pk, trigram=trigram)
+                for pk, text in documents
+                for trigram in trigrams(text)
+            ],
+            batch_size=5000,
+        )
+
+    def remove(self, model, pks):
+        rows = SearchTrigram.objects.filter(model_label=model._meta.label_lower, object_id__in=list(pks))
+        rows._raw_delete(rows.db)
+
+    def filter(self, queryset, terms):
+        label = queryset.model._meta.label_lower
+        searched = set()
+        for term in terms:
+            wanted = trigrams(term)
+            searched |= wanted
+            matching = (
+                SearchTrigram.objects.filter(model_label=label, trigram__in=wanted)
+                .values('object_id').annotate(found=Count('trigram'))
+                .filter(found=len(wanted)).values('object_id')
+            )
+            queryset = queryset.filter(pk__in=matching)
+        # Part des trigrammes du document couverte par la recherche : les documents courts d'abord
+        rank = (
+            SearchTrigram.objects.filter(model_label=label, object_id=OuterRef('pk'))
+            .values('object_id')
+            .annotate(rank=Cast(Count('pk', filter=Q(trigram__in=searched)), FloatField()) / Count('pk'))
+            .values('rank')
+        )
+        return queryset.annotate(search_rank=Subquery(rank, output_field=FloatField()))
+
+
+def get_backend(model):
+    """Moteur d'index du modèle selon sa base et ADMIN_CUSTOM['SEARCH']['BACKEND']."""
+    connection = connections[router.db_for_write(model)]
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    if admin_custom_config.get('SEARCH', {}).get('BACKEND', 'auto') == 'auto':
+        if connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 34, 0):
+            return SQLiteBackend(connection)
+        if connection.vendor == 'postgresql':
+            return PostgreSQLBackend(connection)
+    return TrigramBackend(connection)
+
+
+# ---------------------------------------------------------------------------
+# Construction et maintenance
+# ---------------------------------------------------------------------------
+
+def rebuild_index(model, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    (Re)construit l'index du modèle par lots de clés primaires, puis
+    l'active. Retourne le nombre d'objets indexés.
+    """
+    label = model._meta.label_lower
+    backend = get_backend(model)
+    fields = search_fields(model)
+    backend.create_table(model)
+    # Les écritures sont indexées dès maintenant (signaux), l'index n'est lu qu'à la fin
+    SearchIndexState.objects.update_or_create(
+        model_label=label, defaults={'backend': backend.name, 'is_ready': False},
+    )
+    backend.clear(model)
+
+    relations = sorted({path.rsplit('__', 1)[0] for path in fields if '__' in path})
+    queryset = model._base_manager.select_related(*relations).order_by('pk')
+    total = 0
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        objects = list(batch[:batch_size])
+        if not objects:
+            break
+        with transaction.atomic(using=backend.connection.alias):
+            backend.index(model, [(obj.pk, document(obj, fields)) for obj in objects], replace=False)
+        total += len(objects)
+        last_pk = objects[-1].pk
+        if progress:
+            progress(total)
+
+    SearchIndexState.objects.filter(model_label=label).update(
+        backend=backend.name, is_ready=True, last_build_at=timezone.now(),
+    )
+    return total
+
+
+def rebuild_ready_indexes(models):
+    """
+    Reconstruit les index déjà actifs des modèles donnés (après des écritures
+    en masse sans signaux). Retourne {modèle: objets indexés}.
+    """
+    rebuilt = {}
+    for model in models:
+        if get_search_options(model) is None:
+            continue
+        if SearchIndexState.objects.filter(model_label=model._meta.label_lower, is_ready=True).exists():
+            rebuilt[model] = rebuild_index(model)
+    return rebuilt
+
+
+def _maintained_backend(model):
+    """Moteur de l'index du modèle s'il a été construit (ou est en construction), sinon None."""
+    if get_search_options(model) is None:
+        return None
+    backend = get_backend(model)
+    exists = SearchIndexState.objects.filter(model_label=model._meta.label_lower, backend=backend.name).exists()
+    return backend if exists else None
+
+
+def _on_post_save(sender, instance, raw=False, **kwargs):
+    backend = None if raw else _maintained_backend(sender)
+    if backend is not None:
+        backend.index(sender, [(instance.pk, document(instance, search_fields(sender)))])
+
+
+def _on_post_delete(sender, instance, **kwargs):
+    backend = _maintained_backend(sender)
+    if backend is not None:
+        backend.remove(sender, [instance.pk])
+
+
+def connect_signals():
+    """Branche la maintenance de l'index sur chaque modèle configuré."""
+    for options in get_search_config().values():
+        model = options['model']
+        uid = f"admin_custom_search_{options['label']}"
+        post_save.connect(_on_post_save, sender=model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(_on_post_delete, sender=model, dispatch_uid=f'{uid}_post_delete')
+
+
+# ---------------------------------------------------------------------------
+# Lecture
+# ---------------------------------------------------------------------------
+
+def get_ready_backend(model):
+    """Moteur de l'index du modèle s'il est construit (avec ce moteur), sinon None."""
+    if get_search_options(model) is None:
+        return None
+    backend = get_backend(model)
+    is_ready = SearchIndexState.objects.filter(
+        model_label=model._meta.label_lower, backend=backend.name, is_ready=True,
+    ).exists()
+    return backend if is_ready else None
+
+
+def search(queryset, search_term):
+    """
+    Filtre `queryset` par l'index : retourne (queryset annoté de search_rank,
+    exact), ou None si l'index ne peut pas répondre (modèle non indexé, index
+    pas prêt, terme trop court). exact faux : candidats à vérifier.
+    """
+    terms = search_terms(search_term)
+    if not terms or any(len(term) < MIN_TERM_LENGTH for term in terms):
+        return None
+    backend = get_ready_backend(queryset.model)
+    if backend is None:
+        return None
+    filtered = backend.filter(queryset, terms)
+    if filtered is None:
+        return None
+    return filtered, backend.exact
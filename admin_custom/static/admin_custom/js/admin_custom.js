@@ -104,7 +104,15 @@ function generateChart() {
         return;
     }
     
-    const url = `/admin_custom/api/chart-data/?model=${model}&field=${field}&type=${chartType}&frequency=${frequency}&operation=${operation}`;
+    let url = `/admin_custom/api/chart-data/?model=${model}&field=${field}&type=${chartType}&frequency=${frequency}&operation=${operation}`;
+    
+    // Axe temporel et période facultatifs
+    ['date-field', 'start', 'end'].forEach(name => {
+        const input = document.getElementById(`chart-${name}`);
+        if (input && input.value) {
+            url += `&${name.replace('-', '_')}=${encodeURIComponent(input.value)}`;
+        }
+    });
     
     // Afficher un loader
     const loadingAlert = document.getElementById('chart-loading');
@@ -356,6 +364,30 @@ function getThemeColors(type, border = false) {
 // Grid Management
 let gridCounter = 0;
 
+// Pagination par curseur : ajoute les pages suivantes à la table DataTables
+function setupGridLoadMore(gridItem, tableId, baseUrl, firstPage) {
+    const button = gridItem.querySelector('.grid-load-more');
+    if (!button) return;
+    let cursor = firstPage.next_cursor;
+    button.style.display = cursor ? 'inline-block' : 'none';
+    button.addEventListener('click', function() {
+        button.disabled = true;
+        fetch(`${baseUrl}&cursor=${encodeURIComponent(cursor)}`)
+            .then(response => response.json())
+            .then(page => {
+                const rows = page.data.map(row => page.columns.map(col => row[col] || '-'));
+                $(`#${tableId}`).DataTable().rows.add(rows).draw(false);
+                cursor = page.next_cursor;
+                button.disabled = false;
+                button.style.display = cursor ? 'inline-block' : 'none';
+            })
+            .catch(error => {
+                console.error('Erreur lors du chargement de la page suivante:', error);
+                button.disabled = false;
+            });
+    });
+}
+
 function generateGrid() {
     const model = document.getElementById('grid-model').value;
     const columnsInput = document.getElementById('grid-columns').value;
@@ -400,6 +432,12 @@ function generateGrid() {
                         <i class="fas fa-table"></i> ${description}
                     </h3>
                     <div class="card-tools">
+                        <a class="btn btn-tool" href="${url.replace('grid-data', 'grid-export')}&format=csv" title="Exporter en CSV">
+                            <i class="fas fa-file-csv"></i>
+                        </a>
+                        <a class="btn btn-tool" href="${url.replace('grid-data', 'grid-export')}&format=ndjson" title="Exporter en NDJSON">
+                            <i class="fas fa-file-code"></i>
+                        </a>
                         <button type="button" class="btn btn-tool" onclick="this.closest('.card').remove()">
                             <i class="fas fa-times"></i>
                         </button>
@@ -432,9 +470,15 @@ function generateGrid() {
             html += `</tbody>
                         </table>
                     </div>
+                    <div class="text-center mt-2">
+                        <button type="button" class="btn btn-outline-primary btn-sm grid-load-more" style="display: none;">
+                            <i class="fas fa-chevron-down"></i> Charger plus
+                        </button>
+                    </div>
                 </div>
             `;
             gridItem.innerHTML = html;
+            setupGridLoadMore(gridItem, `${gridId}-table`, url, data);
             
             gridsContainer.appendChild(gridItem);
             
@@ -503,6 +547,25 @@ function generateGrid() {
         });
 }
 
+// Champs date proposés comme axe temporel (celui par défaut présélectionné)
+function updateChartDateFields(dateFields, defaultDateField) {
+    const dateFieldSelect = document.getElementById('chart-date-field');
+    if (!dateFieldSelect) return;
+    
+    dateFieldSelect.innerHTML = '';
+    if (!dateFields.length) {
+        dateFieldSelect.innerHTML = '<option value="">Aucun champ date</option>';
+        return;
+    }
+    dateFields.forEach(name => {
+        const option = document.createElement('option');
+        option.value = name;
+        option.textContent = name;
+        option.selected = name === defaultDateField;
+        dateFieldSelect.appendChild(option);
+    });
+}
+
 // Mise à jour dynamique des champs selon le modèle - utilise l'auto-découverte
 function updateChartFields() {
     const modelSelect = document.getElementById('chart-model');
@@ -534,6 +597,7 @@ function updateChartFields() {
         .then(data => {
             fieldSelect.innerHTML = '';
             fieldSelect.disabled = false;
+            updateChartDateFields(data.date_fields || [], data.default_date_field);
             
             if (data.fields && data.fields.length > 0) {
                 // Ajouter l'option par défaut
@@ -0,0 +1,62 @@
+// Autocomplétion des clés étrangères (AutocompleteWidget, API admin_custom:autocomplete)
+(function() {
+    'use strict';
+
+    const DELAY = 200;
+    let counter = 0;
+
+    // Suggestions rattachées à chaque champ texte (lignes d'inline ajoutées comprises)
+    function datalistFor(input) {
+        if (!input.list) {
+            const datalist = document.createElement('datalist');
+            datalist.id = 'admin-autocomplete-' + (++counter);
+            input.after(datalist);
+            input.setAttribute('list', datalist.id);
+        }
+        return input.list;
+    }
+
+    function hiddenFor(input) {
+        return input.closest('.admin-autocomplete').querySelector('input[type="hidden"]');
+    }
+
+    function select(input) {
+        const datalist = datalistFor(input);
+        const option = Array.from(datalist.options).find(item => item.value === input.value);
+        const hidden = hiddenFor(input);
+        const value = option ? option.dataset.id : '';
+        if (hidden.value !== value) {
+            hidden.value = value;
+            hidden.dispatchEvent(new Event('change', {bubbles: true}));
+        }
+    }
+
+    function suggest(input) {
+        const widget = input.closest('.admin-autocomplete');
+        const params = new URLSearchParams({model: widget.dataset.model, q: input.value});
+        fetch(widget.dataset.url + '?' + params, {credentials: 'same-origin'})
+            .then(response => response.ok ? response.json() : {results: []})
+            .then(payload => {
+                const datalist = datalistFor(input);
+                datalist.replaceChildren(...payload.results.map(result => {
+                    const option = document.createElement('option');
+                    option.value = result.text;
+                    option.dataset.id = result.id;
+                    return option;
+                }));
+                select(input);
+            });
+    }
+
+    document.addEventListener('input', function(event) {
+        const input = event.target;
+        if (!input.classList || !input.classList.contains('admin-autocomplete-input')) {
+            return;
+        }
+        select(input);
+        clearTimeout(input._autocompleteTimer);
+        if (input.value) {
+            input._autocompleteTimer = setTimeout(() => suggest(input), DELAY);
+        }
+    });
+})();
@@ -0,0 +1,93 @@
+// Inlines du formulaire moderne chargés à la demande (ModernTemplateMixin.inline_view)
+(function() {
+    'use strict';
+
+    const $ = window.django && window.django.jQuery;
+
+    // Même initialisation que admin/js/inlines.js au chargement de la page
+    function initFormset(container) {
+        if (!$) {
+            return;
+        }
+        $(container).find('.js-inline-admin-formset').each(function() {
+            const data = $(this).data(),
+                inlineOptions = data.inlineFormset;
+            let selector;
+            switch(data.inlineType) {
+            case 'stacked':
+                selector = inlineOptions.name + '-group .inline-related';
+                $(selector).stackedFormset(selector, inlineOptions.options);
+                break;
+            case 'tabular':
+                selector = inlineOptions.name + '-group .tabular.inline-related tbody:first > tr.form-row';
+                $(selector).tabularFormset(selector, inlineOptions.options);
+                break;
+            }
+        });
+        const constants = container.querySelector('#django-admin-prepopulated-fields-constants');
+        if (constants && $.fn.prepopulate) {
+            JSON.parse(constants.dataset.prepopulatedFields).forEach(function(field) {
+                $(field.id).data('dependency_list', field.dependency_list)
+                    .prepopulate(field.dependency_ids, field.maxLength, field.allowUnicode);
+            });
+        }
+    }
+
+    function load(placeholder, url) {
+        fetch(url, {credentials: 'same-origin'})
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.text();
+            })
+            .then(html => {
+                placeholder.innerHTML = html;
+                delete placeholder.dataset.changed;
+                initFormset(placeholder);
+            })
+            .catch(() => {
+                const status = placeholder.querySelector('.lazy-inline-status');
+                if (status) {
+                    status.textContent = 'Chargement impossible, rechargez la page.';
+                }
+            });
+    }
+
+    // Pagination : la page affichée est remplacée (ses modifications non enregistrées sont perdues)
+    document.addEventListener('click', function(event) {
+        const link = event.target.closest && event.target.closest('.lazy-inline-pager a');
+        if (!link) {
+            return;
+        }
+        event.preventDefault();
+        const placeholder = link.closest('.lazy-inline');
+        if (placeholder.dataset.changed && !window.confirm('Les modifications de cette page seront perdues. Continuer ?')) {
+            return;
+        }
+        load(placeholder, link.href);
+    });
+
+    document.addEventListener('change', function(event) {
+        const placeholder = event.target.closest && event.target.closest('.lazy-inline');
+        if (placeholder) {
+            placeholder.dataset.changed = '1';
+        }
+    });
+
+    // Chargement quand l'inline approche de la zone visible
+    const placeholders = document.querySelectorAll('.lazy-inline[data-url]');
+    if (!('IntersectionObserver' in window)) {
+        placeholders.forEach(placeholder => load(placeholder, placeholder.dataset.url));
+        return;
+    }
+    const observer = new IntersectionObserver(function(entries) {
+        entries.forEach(function(entry) {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target);
+                load(entry.target, entry.target.dataset.url);
+            }
+        });
+    }, {rootMargin: '200px'});
+    placeholders.forEach(placeholder => observer.observe(placeholder));
+})();
@@ -0,0 +1,182 @@
+"""
+Service de statistiques du dashboard (API stats, dashboard classique et moderne)
+
+Une seule requête par modèle : aggregate(Count, Sum) sur le champ montant
+(total_amount ou amount) quand il existe, ou lecture des rollups s'ils sont
+construits. Les clés historiques orders/invoices/payments/products réutilisent
+ces résultats au lieu de recompter. Les modèles sans montant configurés dans
+ADMIN_CUSTOM['APPROXIMATE_COUNTS'] sont comptés à partir des statistiques de la
+base (voir counts.py) et signalés dans la clé `approximate`.
+
+Les requêtes des différents modèles peuvent s'exécuter en parallèle sur un
+pool de threads (une connexion base par thread) :
+
+    # settings.py
+    ADMIN_CUSTOM = {
+        'STATS': {
+            'PARALLEL': True,   # désactivé par défaut
+            'MAX_WORKERS': 4,
+        },
+    }
+
+Le mode parallèle n'a d'intérêt qu'avec un serveur de base de données
+(PostgreSQL, MySQL) : SQLite sérialise les lectures d'un même fichier.
+
+acollect_stats() est la variante asynchrone (vues ASGI) : les modèles sont
+toujours interrogés en parallèle, au plus MAX_WORKERS à la fois.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db.models import Count, Sum
+
+from .counts import approximate_count
+from .model_catalog import model_catalog
+from .rollups import rollup_totals
+from .workers import close_connections_after, gather_in_workers
+
+
+# Champs montant reconnus, par ordre de priorité
+AMOUNT_FIELDS = ('total_amount', 'amount')
+
+# Clés historiques de l'API stats → nom du modèle
+LEGACY_KEYS = {
+    'orders': 'Order',
+    'invoices': 'Invoice',
+    'payments': 'Payment',
+    'products': 'Product',
+}
+
+DEFAULT_MAX_WORKERS = 4
+
+ModelStats = namedtuple('ModelStats', ['count', 'revenue', 'amount_field', 'approximate'])
+
+
+def get_stats_config():
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    return admin_custom_config.get('STATS', {})
+
+
+def amount_field(model):
+    """Champ montant numérique du modèle (total_amount puis amount), sinon None."""
+    numeric_fields = model_catalog.get_info(model).numeric_fields
+    for name in AMOUNT_FIELDS:
+        if name in numeric_fields:
+            return name
+    return None
+
+
+def count_and_sum(model, field_name=None):
+    """
+    Retourne (nombre de lignes, somme de field_name) pour un modèle en une requête.
+    Lit les agrégats journaliers (rollups) quand ils sont disponibles.
+    """
+    totals = rollup_totals(model, field_name)
+    if totals is not None:
+        return totals
+    if not field_name:
+        return model.objects.count(), 0.0
+    result = model.objects.aggregate(count=Count('pk'), total=Sum(field_name))
+    return result['count'], float(result['total'] or 0)
+
+
+def model_stats(model):
+    """Statistiques d'un modèle : nombre de lignes et somme de son champ montant."""
+    field_name = amount_field(model)
+    if field_name is None:
+        totals = rollup_totals(model)
+        if totals is not None:
+            return ModelStats(totals[0], 0.0, None, False)
+        count, approximate = approximate_count(model)
+        return ModelStats(count, 0.0, None, approximate)
+    count, revenue = count_and_sum(model, field_name)
+    return ModelStats(count, revenue, field_name, False)
+
+
+
+class DashboardStats:
+    """Résultats de collect_stats(), déclinés aux formats des différentes vues."""
+    def __init__(self, results):
+        self.results = results  # {modèle: ModelStats}, dans l'ordre du catalogue
+
+    @property
+    def total_revenue(self):
+        return sum(stats.revenue for stats in self.results.values())
+
+    def count_for(self, model_name):
+        model = model_catalog.get_model(model_name)
+        stats = self.results.get(model)
+        return stats.count if stats else 0
+
+    def is_approximate(self, model_name):
+        model = model_catalog.get_model(model_name)
+        stats = self.results.get(model)
+        return bool(stats and stats.approximate)
+
+    def per_model(self, prefix=''):
+        """
+        {préfixe + nom du modèle: nombre}. Les modèles sans montant
+        n'apparaissent que s'ils contiennent des données.
+        """
+        return {
+            f'{prefix}{model.__name__.lower()}': stats.count
+            for model, stats in self.results.items()
+            if stats.amount_field or stats.count > 0
+        }
+
+    def approximate_models(self, prefix=''):
+        """Clés de per_model() dont le nombre est une estimation."""
+        return [
+            f'{prefix}{model.__name__.lower()}'
+            for model, stats in self.results.items()
+            if stats.approximate
+        ]
+
+    def legacy(self):
+        """
+        Format historique de l'API stats : orders, invoices, payments, products,
+        revenue, plus `approximate` (clés dont le nombre est estimé).
+        """
+        data = {key: self.count_for(model_name) for key, model_name in LEGACY_KEYS.items()}
+        data['revenue'] = self.total_revenue
+        data['approximate'] = [
+            key for key, model_name in LEGACY_KEYS.items() if self.is_approximate(model_name)
+        ]
+        return data
+
+
+def collect_stats(models=None, parallel=None):
+    """
+    Calcule les statistiques de tous les modèles du projet (catalogue).
+
+    Args:
+        models: Modèles à parcourir (défaut : modèles du projet)
+        parallel: Force ou désactive le pool de threads (défaut : ADMIN_CUSTOM['STATS'])
+    """
+    config = get_stats_config()
+    if models is None:
+        models = model_catalog.project_models()
+    if parallel is None:
+        parallel = config.get('PARALLEL', False)
+
+    if parallel and len(models) > 1:
+        max_workers = min(config.get('MAX_WORKERS', DEFAULT_MAX_WORKERS), len(models))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='admin_custom_stats') as pool:
+            results = list(pool.map(close_connections_after(model_stats), models))
+    else:
+        results = [model_stats(model) for model in models]
+    return DashboardStats(dict(zip(models, results)))
+
+
+async def acollect_stats(models=None):
+    """
+    Version asynchrone de collect_stats() : une requête par modèle, lancées
+    en parallèle dans des threads de travail (une connexion chacun).
+    """
+    config = get_stats_config()
+    if models is None:
+        models = model_catalog.project_models()
+    max_workers = config.get('MAX_WORKERS', DEFAULT_MAX_WORKERS)
+    results = await gather_in_workers(model_stats, models, max_workers)
+    return DashboardStats(dict(zip(models, results)))
@@ -1,3 +1,1118 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import re
+import warnings
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils.html import escape
+
+from catalog.models import Category, Product
+from sales import synthetic
+from sales.models import Invoice, Order, OrderItem, Payment
+
+from . import async_views, autocomplete, downsampling, rollups, search as search_index, views
+from .aggregation import bucket_queryset, build_aggregate, chart_series
+from .auth_views import INTERFACE_CLASSIC, INTERFACE_MODERN, SESSION_INTERFACE_KEY
+from .cache import result_cache
+from .counts import ApproximateCountPaginator, approximate_count
+from .admin_views import get_custom_admin_site
+from .grid_query import GridPlan, display_relations, str_relations
+from .index_advisor import chart_paths, grid_paths, suggest_indexes
+from .instrumentation import PANEL_MARKER, UNRESOLVED_ROUTE, RequestMetrics, performance_log
+from .model_catalog import ModelInfo
+from .models import DashboardChart, DashboardGrid, MetricRollup, RollupState
+from .stats import collect_stats
+
+
+NO_CACHE = {'CACHE': {'ENABLED': False}}
+
+
+def create_orders(user, count, items_per_order=1):
+    """Crée `count` commandes avec leurs articles, chacune sur un produit distinct."""
+    category = Category.objects.create(name='Catégorie', slug='categorie')
+    for index in range(count):
+        product = Product.objects.create(
+            name=f'Produit {index}', slug=f'produit-{index}', sku=f'SKU-{index}',
+            category=category, price=Decimal('10.00'),
+        )
+        order = Order.objects.create(
+            user=user, order_number=f'CMD-{index:04d}', total_amount=Decimal(index),
+            shipping_address='1 rue', shipping_city='Dakar',
+            shipping_postal_code='10000', shipping_country='Sénégal',
+        )
+        for _ in range(items_per_order):
+            OrderItem.objects.create(
+                order=order, product=product, quantity=2,
+                unit_price=Decimal('10.00'), subtotal=Decimal('20.00'),
+            )
+
+
+class GridPlanTests(TestCase):
+    def test_str_relations_follow_str_dependencies(self):
+        # OrderItem.__str__ lit self.product.name et self.order.order_number
+        self.assertEqual(str_relations(OrderItem), ('order', 'product'))
+        # Order.__str__ lit self.user.username
+        self.assertEqual(str_relations(Order), ('user',))
+
+    def test_value_columns_use_values(self):
+        plan = GridPlan(OrderItem, ['quantity', 'order__order_number', 'password'])
+        self.assertTrue(plan.use_values)
+        self.assertEqual(plan.render_row({'pk': 1, 'quantity': 2, 'order__order_number': 'A'}), {
+            'quantity': '2', 'order__order_number': 'A', 'password': '-',
+        })
+
+    def test_object_columns_select_str_relations(self):
+        plan = GridPlan(OrderItem, ['order', 'product', 'quantity'])
+        self.assertFalse(plan.use_values)
+        self.assertEqual(plan.select_related, ['order', 'order__user', 'product'])
+        self.assertEqual(plan.only_fields(), ['order', 'pk', 'product', 'quantity'])
+
+
+class ChangelistQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        synthetic.generate(40, users=3, products=12, seed=1, days=90)
+        Product.objects.filter(pk__in=Product.objects.order_by('pk')[:4].values('pk')).update(category=None)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[SESSION_INTERFACE_KEY] = INTERFACE_MODERN
+        session.save()
+
+    def test_display_relations_follow_str_and_display_functions(self):
+        def customer(obj):
+            return obj.order.user.email
+
+        self.assertEqual(display_relations(Payment, ['invoice', 'amount']), ['invoice', 'invoice__order'])
+        self.assertEqual(display_relations(Invoice, [customer, 'status']), ['order', 'order__user'])
+
+    def test_modern_actions_links_match_reverse(self):
+        model_admin = get_custom_admin_site()._registry[Order]
+        order = Order.objects.order_by('pk').first()
+        response = self.client.get(reverse('admin:sales_order_changelist'))
+        url = reverse('admin:sales_order_change', args=[order.pk])
+        self.assertContains(response, f'href="{url}" title="Voir"', count=1)
+        self.assertContains(response, f'href="{url}" title="Modifier"', count=1)
+        for pk in (order.pk, 'a b/<c>'):
+            url = reverse('admin:sales_order_change', args=[pk])
+            self.assertEqual(model_admin.modern_actions(Order(pk=pk)).count(f'href="{escape(url)}"'), 2)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        site = get_custom_admin_site()
+        for model in (Order, OrderItem, Invoice, Payment, Product):
+            model_admin = site._registry[model]
+            url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            counts = []
+            for per_page in (2, 10):
+                with mock.patch.object(model_admin, 'list_per_page', per_page):
+                    with CaptureQueriesContext(connection) as queries:
+                        self.assertEqual(self.client.get(url).status_code, 200)
+                counts.append(len(queries))
+            self.assertEqual(counts[0], counts[1], model.__name__)
+
+
+@override_settings(ADMIN_CUSTOM=NO_CACHE)
+class GridDataQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(cls.user, 100)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def fetch(self, columns, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin_custom:grid_data'), {
+                'model': 'OrderItem', 'columns': columns, 'page_size': 100, **params,
+            })
+        self.assertEqual(response.status_code, 200)
+        grid_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'sales_orderitem' in query['sql']
+        ]
+        return response.json(), queries, grid_queries
+
+    def test_foreign_key_columns_use_one_query(self):
+        columns = ['order', 'product', 'quantity', 'order__user__email']
+        data, queries, grid_queries = self.fetch(columns, sort='-order__total_amount')
+
+        self.assertEqual(len(data['data']), 100)
+        self.assertEqual(len(grid_queries), 1)
+        # Pas de requête N+1 : seules les requêtes d'authentification s'ajoutent
+        self.assertEqual(len(queries) - len(grid_queries), 2)
+        first = data['data'][0]
+        self.assertEqual(first['order'], 'Commande CMD-0099 - admin')
+        self.assertEqual(first['product'], 'Produit 99 (SKU-99)')
+        self.assertEqual(first['quantity'], '2')
+        self.assertEqual(first['order__user__email'], 'admin@example.com')
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        columns = ['order', 'product', 'quantity']
+        _, small, _ = self.fetch(columns, page_size=10)
+        _, large, _ = self.fetch(columns, page_size=100)
+        self.assertEqual(len(small), len(large))
+
+    def test_value_columns_skip_unused_columns(self):
+        data, _, grid_queries = self.fetch(['quantity', 'order__order_number'])
+        self.assertEqual(len(grid_queries), 1)
+        self.assertNotIn('unit_price', grid_queries[0])
+        self.assertEqual(data['data'][0], {'quantity': '2', 'order__order_number': 'CMD-0000'})
+
+    def test_invalid_filter_values_return_400(self):
+        url = reverse('admin_custom:grid_data')
+        for name, value in (('filter__order__total_amount__gt', 'abc'), ('filter__created_at__gte', 'notadate'),
+                            ('filter__created_at__year', 'x'), ('filter__quantity__in', '1,deux')):
+            response = self.client.get(url, {'model': 'OrderItem', 'columns': ['quantity'], name: value})
+            self.assertEqual(response.status_code, 400, name)
+        data, _, _ = self.fetch(['quantity'], filter__order__total_amount__gte='98', filter__quantity__in='1,2')
+        self.assertEqual(len(data['data']), 2)
+
+
+@override_settings(ADMIN_CUSTOM=NO_CACHE)
+class GridCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(cls.user, 7)
+        for index, order in enumerate(Order.objects.order_by('pk')):
+            order.status = ('pending', 'shipped')[index % 2]  # Valeurs de tri à égalité
+            order.notes = None if index % 3 == 0 else f'note {index % 2}'
+            order.save()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def walk(self, sort, page_size=2):
+        """Numéros de commande de toutes les pages, en suivant next_cursor."""
+        numbers, cursor = [], None
+        while True:
+            params = {'model': 'Order', 'columns': ['order_number'], 'sort': sort, 'page_size': page_size}
+            payload = self.client.get(reverse('admin_custom:grid_data'), {**params, 'cursor': cursor or ''}).json()
+            numbers.extend(row['order_number'] for row in payload['data'])
+            cursor = payload['next_cursor']
+            if not cursor:
+                return numbers
+
+    def expected(self, field, descending=False):
+        """Ordre attendu : valeur puis pk (même sens), NULLs en dernier."""
+        orders = list(Order.objects.all())
+        present = sorted((order for order in orders if getattr(order, field) is not None),
+                         key=lambda order: (getattr(order, field), order.pk), reverse=descending)
+        missing = sorted((order for order in orders if getattr(order, field) is None),
+                         key=lambda order: order.pk, reverse=descending)
+        return [order.order_number for order in present + missing]
+
+    def test_pages_follow_sort_with_ties_nulls_and_descending(self):
+        for sort in ('status', '-status', 'notes', '-notes', '-total_amount', 'total_amount', '-pk'):
+            field, descending = sort.lstrip('-'), sort.startswith('-')
+            expected = self.expected('pk' if field == 'pk' else field, descending)
+            self.assertEqual(self.walk(sort), expected, sort)
+            self.assertEqual(self.walk(sort, page_size=3), expected, sort)
+
+    def test_tampered_cursor_returns_400(self):
+        url = reverse('admin_custom:grid_data')
+        cursor = self.client.get(url, {'model': 'Order', 'sort': 'status', 'page_size': 2}).json()['next_cursor']
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        for tampered in ({**payload, 'pk': 'x'}, {**payload, 's': '-status'}, {'v': payload['v']}):
+            encoded = base64.urlsafe_b64encode(json.dumps(tampered).encode()).decode()
+            response = self.client.get(url, {'model': 'Order', 'sort': 'status', 'cursor': encoded})
+            self.assertEqual(response.status_code, 400, tampered)
+        for cursor in ('pas-un-curseur', cursor):
+            response = self.client.get(url, {'model': 'Order', 'sort': 'total_amount', 'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+
+class GridExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(cls.user, 5)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_invalid_filters_return_400(self):
+        url = reverse('admin_custom:grid_export')
+        for params in ({'filter__total_amount__gt': 'abc'}, {'filter__created_at__gte': 'notadate'},
+                       {'sort': 'inconnu'}):
+            response = self.client.get(url, {'model': 'Order', **params})
+            self.assertEqual(response.status_code, 400, params)
+            self.assertFalse(response.streaming)
+
+    def export(self, export_format, **params):
+        response = self.client.get(reverse('admin_custom:grid_export'), {
+            'model': 'Order', 'columns': ['order_number', 'notes', 'total_amount'],
+            'sort': 'order_number', 'format': export_format, **params,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_stream_has_header_and_escapes_values(self):
+        Order.objects.filter(order_number='CMD-0001').update(notes='Livrer, sonner "deux fois"\nétage 2')
+        content = self.export('csv')
+        self.assertTrue(content.startswith('\ufeff'))
+        rows = list(csv.reader(io.StringIO(content[1:])))
+        self.assertEqual(rows[0], ['order_number', 'notes', 'total_amount'])
+        self.assertEqual(rows[1:3], [['CMD-0000', '', '0.00'], ['CMD-0001', 'Livrer, sonner "deux fois"\nétage 2', '1.00']])
+        self.assertIn('"Livrer, sonner ""deux fois""\nétage 2"', content)
+        self.assertEqual(len(rows), 6)
+
+    def test_streams_respect_active_filters(self):
+        content = self.export('ndjson', filter__total_amount__gte='3')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['order_number'] for row in rows], ['CMD-0003', 'CMD-0004'])
+        self.assertEqual(rows[0], {'order_number': 'CMD-0003', 'notes': None, 'total_amount': '3.00'})
+
+        rows = list(csv.reader(io.StringIO(self.export('csv', filter__order_number='CMD-0002')[1:])))
+        self.assertEqual([row[0] for row in rows], ['order_number', 'CMD-0002'])
+
+    async def test_asgi_export_streams_without_buffering(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        params = {'model': 'Order', 'columns': ['order_number'], 'sort': 'order_number', 'format': 'csv'}
+        with override_settings(ADMIN_CUSTOM={'EXPORT_CHUNK_SIZE': 2}), warnings.catch_warnings():
+            # Itérateur synchrone sous ASGI : avertissement de Django, réponse lue en entier
+            warnings.simplefilter('error')
+            response = await self.async_client.get(reverse('admin_custom:grid_export'), params)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 4)  # BOM et en-tête, puis les 5 lignes 2 par 2
+        rows = list(csv.reader(io.StringIO(b''.join(chunks).decode()[1:])))
+        self.assertEqual(rows, [['order_number'], *([f'CMD-{index:04d}'] for index in range(5))])
+
+    def test_requires_staff_and_model_permission(self):
+        url = reverse('admin_custom:grid_export')
+        staff = User.objects.create_user('staff', password='password', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url, {'model': 'Order'})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.streaming)
+
+        staff.user_permissions.add(Permission.objects.get(codename='view_order'))
+        self.client.force_login(User.objects.get(pk=staff.pk))
+        self.assertEqual(self.client.get(url, {'model': 'Order'}).status_code, 200)
+
+        self.client.force_login(User.objects.create_user('client', password='password'))
+        self.assertEqual(self.client.get(url, {'model': 'Order'}).status_code, 302)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('client')
+        with self.captureOnCommitCallbacks(execute=True):
+            create_orders(self.user, 3)
+        rollups.rebuild_rollups(Order)
+
+    def tearDown(self):
+        rollups.reset_rollup_config()
+
+    def assertRollupsMatch(self):
+        for operation in ('sum', 'count', 'avg'):
+            expected = chart_series(Order.objects.all(), 'total_amount', frequency='day', operation=operation)
+            actual = rollups.rollup_chart_series(Order, 'total_amount', frequency='day', operation=operation)
+            self.assertEqual([round(value, 6) for value in actual['data']],
+                             [round(value, 6) for value in expected['data']], operation)
+
+    def test_signals_keep_rollups_in_step(self):
+        self.assertRollupsMatch()
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                user=self.user, order_number='CMD-NEW', total_amount=Decimal('12.50'),
+                shipping_address='1 rue', shipping_city='Dakar',
+                shipping_postal_code='10000', shipping_country='Sénégal',
+            )
+        self.assertRollupsMatch()
+        with self.captureOnCommitCallbacks(execute=True):
+            order.total_amount = Decimal('99.99')
+            order.save()
+        self.assertRollupsMatch()
+        with self.captureOnCommitCallbacks(execute=True):
+            order.created_at -= timedelta(days=3)  # Changement de jour
+            order.save()
+        self.assertRollupsMatch()
+        self.assertEqual(sum(rollups.rollup_chart_series(Order, 'total_amount', 'day', 'count')['data']), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        self.assertRollupsMatch()
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(order_number__in=['CMD-0000', 'CMD-0001']).delete()
+        self.assertRollupsMatch()
+        self.assertEqual(rollups.rollup_totals(Order, 'total_amount'), (1, 2.0))
+
+    def test_readiness_read_once_per_generation(self):
+        self.assertIsNotNone(rollups.get_ready_options(Order))
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(rollups.get_ready_options(Order))
+        # Changement d'état par un autre processus : relu après l'incrément de génération
+        RollupState.objects.filter(model_label='sales.order').update(is_ready=False)
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(rollups.get_ready_options(Order))
+        result_cache.bump(RollupState)
+        with self.assertNumQueries(1):
+            self.assertIsNone(rollups.get_ready_options(Order))
+        with self.captureOnCommitCallbacks(execute=True):
+            rollups.rebuild_rollups(Order)
+        self.assertIsNotNone(rollups.get_ready_options(Order))
+
+        with override_settings(ADMIN_CUSTOM=NO_CACHE):
+            for expected in (1, 0):  # Prêts : lu une fois, puis conservé
+                with self.assertNumQueries(expected):
+                    self.assertIsNotNone(rollups.get_ready_options(Order))
+            for _ in range(2):  # En attente : relu à chaque appel
+                with self.assertNumQueries(1):
+                    self.assertIsNone(rollups.get_ready_options(Payment))
+
+    def test_saves_reuse_loaded_values(self):
+        order = Order.objects.get(order_number='CMD-0001')
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                order.total_amount = Decimal('40.00')
+                order.save()
+                order.created_at -= timedelta(days=2)
+                order.save()
+        selects = [query for query in queries.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertFalse([query for query in selects if '"sales_order"' in query['sql']])
+        self.assertRollupsMatch()
+        # Champs différés : anciennes valeurs relues en base
+        order = Order.objects.defer('total_amount', 'created_at').get(order_number='CMD-0002')
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(pk=order.pk).update(total_amount=Decimal('7.00'))
+            rollups.rebuild_rollups(Order)
+            order.total_amount = Decimal('70.00')
+            order.save()
+        self.assertRollupsMatch()
+
+    def test_totals_refuse_nullable_date_field(self):
+        with override_settings(ADMIN_CUSTOM={'ROLLUPS': {'sales.Payment': {'date_field': 'payment_date'}}}):
+            rollups.reset_rollup_config()
+            rollups.rebuild_rollups(Payment)
+            self.assertIsNotNone(rollups.get_ready_options(Payment))
+            self.assertIsNone(rollups.rollup_totals(Payment, 'amount'))
+
+
+@override_settings(ADMIN_CUSTOM=NO_CACHE)
+class StatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(cls.user, 10)
+
+    def test_one_query_per_model(self):
+        models = [Order, Product]
+        with CaptureQueriesContext(connection) as queries:
+            stats = collect_stats(models)
+        # Une seule requête sur chaque table (hors lecture de l'état des rollups)
+        for model in models:
+            table = model._meta.db_table
+            model_queries = [q for q in queries.captured_queries if f'"{table}"' in q['sql']]
+            self.assertEqual(len(model_queries), 1, table)
+        self.assertEqual(stats.legacy(), {
+            'orders': 10, 'invoices': 0, 'payments': 0, 'products': 10, 'revenue': 45.0,
+            'approximate': [],
+        })
+
+
+class ResultCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        result_cache.reset_stats()
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        create_orders(self.user, 3)
+
+    def get(self, name, params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Admin-Custom-Cache'], response.json()
+
+    def test_hit_after_miss_and_invalidated_by_writes(self):
+        params = {'model': 'Order', 'field': 'total_amount', 'frequency': 'day'}
+        self.assertEqual(self.get('admin_custom:chart_data', params)[0], 'MISS')
+        outcome, payload = self.get('admin_custom:chart_data', params)
+        self.assertEqual(outcome, 'HIT')
+        self.assertEqual(payload['data'][-1], 3.0)
+        # Même requête : nom court ou label, valeurs par défaut explicites ou non
+        for variant in ({**params, 'model': 'sales.order'}, {**params, 'model': 'sales.Order', 'type': 'line'}):
+            self.assertEqual(self.get('admin_custom:chart_data', variant)[0], 'HIT')
+
+        generation = result_cache.get_generations([Order])['sales.order']
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(order_number='CMD-0002').first().save()
+        self.assertGreater(result_cache.get_generations([Order])['sales.order'], generation)
+        outcome, payload = self.get('admin_custom:chart_data', params)
+        self.assertEqual(outcome, 'MISS')
+        # Un modèle non lu par la requête ne l'invalide pas
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.first().save()
+        self.assertEqual(self.get('admin_custom:chart_data', params)[0], 'HIT')
+        self.assertEqual(result_cache.stats()['chart_data']['misses'], 2)
+
+    def test_entry_cached_during_a_write_is_invalidated_at_commit(self):
+        params = {'model': 'Order', 'field': 'total_amount', 'frequency': 'day', 'operation': 'count'}
+        generation = result_cache.get_generations([Order])['sales.order']
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(order_number='CMD-0002').delete()
+            # Pas encore commitée : la génération n'a pas bougé, l'entrée mise en cache
+            # (lue ici dans la transaction, ailleurs avant le commit) vise l'ancienne
+            self.assertEqual(result_cache.get_generations([Order])['sales.order'], generation)
+            self.assertEqual(self.get('admin_custom:chart_data', params)[0], 'MISS')
+            self.assertEqual(self.get('admin_custom:chart_data', params)[0], 'HIT')
+        self.assertGreater(result_cache.get_generations([Order])['sales.order'], generation)
+        outcome, payload = self.get('admin_custom:chart_data', params)
+        self.assertEqual(outcome, 'MISS')
+        self.assertEqual(payload['data'][-1], 2)
+
+    def test_grid_access_checked_before_cache(self):
+        url = reverse('admin_custom:grid_data')
+        params = {'model': 'User', 'columns': ['username', 'email', 'is_superuser'], 'filter__is_superuser': 'True'}
+        self.assertEqual(self.get('admin_custom:grid_data', params)[0], 'MISS')  # en cache
+
+        staff = User.objects.create_user('staff', password='password', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 403)
+        self.assertNotContains(response, 'admin@example.com', status_code=403)
+        with self.captureOnCommitCallbacks(execute=True):
+            staff.user_permissions.add(Permission.objects.get(codename='view_user'))
+        self.client.force_login(User.objects.get(pk=staff.pk))
+        self.assertEqual(self.client.get(url, params).status_code, 200)
+
+        self.client.logout()
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith(reverse('admin:login')))
+
+    def test_grid_paths_need_view_permission_on_joined_models(self):
+        staff = User.objects.create_user('staff', password='password', is_staff=True)
+        staff.user_permissions.add(Permission.objects.get(codename='view_orderitem'))
+        self.client.force_login(staff)
+        url = reverse('admin_custom:grid_data')
+        base = {'model': 'OrderItem', 'columns': ['quantity']}
+        self.assertEqual(self.client.get(url, base).status_code, 200)
+        # Colonne, filtre ou tri traversant Order puis User
+        for extra in ({'columns': ['quantity', 'order__user__email']},
+                      {'filter__order__user__email__startswith': 'admin'},
+                      {'filter__order__user__is_superuser': 'True'},
+                      {'filters': json.dumps({'order__user__username': 'admin'})},
+                      {'sort': '-order__user__email'}):
+            for granted in ([], ['view_order']):
+                with self.subTest(extra=extra, granted=granted):
+                    staff.user_permissions.set(Permission.objects.filter(codename__in=['view_orderitem', *granted]))
+                    self.client.force_login(User.objects.get(pk=staff.pk))
+                    self.assertEqual(self.client.get(url, {**base, **extra}).status_code, 403)
+        staff.user_permissions.add(Permission.objects.get(codename='change_user'))  # view_order déjà accordée
+        self.client.force_login(User.objects.get(pk=staff.pk))
+        response = self.client.get(url, {**base, 'columns': ['quantity', 'order__user__email']})
+        self.assertEqual(response.status_code, 200)
+        grid = DashboardGrid.objects.create(name='Articles', model_name='OrderItem', columns=['order__user__email'])
+        staff.user_permissions.remove(Permission.objects.get(codename='change_user'))
+        self.client.force_login(User.objects.get(pk=staff.pk))
+        self.assertEqual(self.client.get(url, {'grid_id': grid.pk}).status_code, 403)
+
+    def test_permission_m2m_changes_bump_generation(self):
+        group = Group.objects.create(name='Ventes')
+        for change in (lambda: group.permissions.add(Permission.objects.get(codename='view_order')),
+                       lambda: self.user.groups.add(group),
+                       lambda: self.user.user_permissions.add(Permission.objects.get(codename='view_product')),
+                       lambda: self.user.groups.clear()):
+            generation = result_cache.get_generations([Permission])['auth.permission']
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertGreater(result_cache.get_generations([Permission])['auth.permission'], generation)
+
+    def test_grid_depends_on_models_reached_by_columns(self):
+        params = {'model': 'OrderItem', 'columns': ['quantity', 'order__user__email']}
+        self.assertEqual(self.get('admin_custom:grid_data', params)[0], 'MISS')
+        self.assertEqual(self.get('admin_custom:grid_data', params)[0], 'HIT')
+        self.user.email = 'nouveau@example.com'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        outcome, payload = self.get('admin_custom:grid_data', params)
+        self.assertEqual(outcome, 'MISS')
+        self.assertEqual(payload['data'][0]['order__user__email'], 'nouveau@example.com')
+        self.assertEqual(
+            views._requested_model_and_relations(RequestFactory().get('/', params)),
+            [OrderItem, Order, User],
+        )
+
+
+class AppListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+        self.user.user_permissions.add(Permission.objects.get(codename='view_order'))
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[SESSION_INTERFACE_KEY] = INTERFACE_MODERN
+        session.save()
+        self.site = get_custom_admin_site()
+
+    def models_in_sidebar(self):
+        response = self.client.get(reverse('admin:modern_dashboard'))
+        return {model['object_name'] for app in response.context['app_list'] for model in app['models']}
+
+    def test_built_once_per_request_then_cached(self):
+        with mock.patch.object(self.site, '_build_app_list', wraps=self.site._build_app_list) as build:
+            self.assertEqual(self.models_in_sidebar(), {'Order'})
+            self.assertEqual(build.call_count, 1)
+            self.assertEqual(self.models_in_sidebar(), {'Order'})
+            self.assertEqual(build.call_count, 1)
+
+    def test_permission_changes_invalidate(self):
+        self.assertEqual(self.models_in_sidebar(), {'Order'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(Permission.objects.get(codename='view_product'))
+        self.assertEqual(self.models_in_sidebar(), {'Order', 'Product'})
+        group = Group.objects.create(name='Facturation')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(group)
+            group.permissions.add(Permission.objects.get(codename='view_invoice'))
+        self.assertEqual(self.models_in_sidebar(), {'Order', 'Product', 'Invoice'})
+
+
+@override_settings(ADMIN_CUSTOM={'APPROXIMATE_COUNTS': {'THRESHOLD': 5, 'MODELS': ['sales.Order']}})
+class ApproximateCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(cls.user, 10)
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_uses_estimate_above_threshold(self):
+        self.assertEqual(approximate_count(Product), (10, False))  # modèle non configuré
+        self.analyze()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(approximate_count(Order), (10, True))
+        self.assertNotIn('COUNT(', queries[0]['sql'])
+
+    def test_paginator_counts_filtered_lists_exactly(self):
+        self.analyze()
+        paginator = ApproximateCountPaginator(Order.objects.order_by('pk'), 3)
+        self.assertEqual(paginator.count, 10)
+        self.assertTrue(paginator.approximate)
+
+        filtered = ApproximateCountPaginator(Order.objects.filter(total_amount__lt=4).order_by('pk'), 3)
+        self.assertEqual(filtered.count, 4)
+        self.assertFalse(filtered.approximate)
+
+
+class IndexAdvisorTests(TestCase):
+    def test_sample_admins_are_indexed(self):
+        suggestions = suggest_indexes()
+        self.assertEqual([s for s in suggestions if s.model._meta.app_label == 'sales'], [])
+
+    def test_grid_filters_suggest_composite_index(self):
+        DashboardGrid.objects.create(
+            name='Commandes Dakar', model_name='Order', columns=['order_number'],
+            filters={'shipping_city': 'Dakar', 'created_at__gte': '2026-01-01', 'user__email': 'x'},
+        )
+        suggestions = suggest_indexes(grid_paths())
+        self.assertEqual([(s.model, s.fields) for s in suggestions], [(Order, ('shipping_city', 'created_at'))])
+
+
+class SearchIndexTests(TestCase):
+    backend = 'fts5'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(cls.user, 12)
+        Order.objects.filter(order_number='CMD-0003').update(shipping_address='7 avenue Léopold Sédar Senghor')
+        Order.objects.filter(order_number='CMD-0007').update(shipping_city='Saint-Louis')
+
+    def setUp(self):
+        search_index.reset_search_config()
+        self.addCleanup(search_index.reset_search_config)
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[SESSION_INTERFACE_KEY] = INTERFACE_MODERN
+        session.save()
+
+    def changelist(self, term):
+        response = self.client.get(reverse('admin:sales_order_changelist'), {'q': term})
+        return [order.order_number for order in response.context['cl'].result_list]
+
+    def test_index_matches_default_search(self):
+        terms = ['CMD-0003', 'senghor', 'saint-louis', 'admin@example', 'CMD-000 dakar', 'introuvable']
+        expected = {term: sorted(self.changelist(term)) for term in terms}
+        self.assertIsNone(search_index.search(Order.objects.all(), 'senghor'))  # index pas encore construit
+
+        self.assertEqual(search_index.rebuild_index(Order), 12)
+        self.assertEqual(search_index.get_ready_backend(Order).name, self.backend)
+        for term in terms:
+            self.assertEqual(sorted(self.changelist(term)), expected[term], term)
+        self.assertEqual(expected['senghor'], ['CMD-0003'])
+        self.assertIsNone(search_index.search(Order.objects.all(), 'CM'))  # trop court : recherche de Django
+
+    def test_ranked_and_maintained_by_signals(self):
+        search_index.rebuild_index(Order)
+        order = Order.objects.get(order_number='CMD-0005')
+        order.shipping_address = ''
+        order.save()
+        ranked, _ = search_index.search(Order.objects.all(), 'dakar')
+        self.assertEqual(ranked.order_by('-search_rank').first(), order)
+        self.assertEqual(self.changelist('dakar')[0], 'CMD-0005')
+        self.assertEqual(self.client.get(
+            reverse('admin:sales_order_changelist'), {'q': 'dakar', 'o': '1'},
+        ).context['cl'].result_list[0].order_number, 'CMD-0000')  # tri choisi : conservé
+
+        order.shipping_city = 'Plateau'
+        order.save()
+        self.assertEqual(self.changelist('plateau'), ['CMD-0005'])
+        order.delete()
+        self.assertEqual(self.changelist('plateau'), [])
+
+
+@override_settings(ADMIN_CUSTOM={'SEARCH': {'BACKEND': 'trigram', 'MODELS': ['sales.Order']}})
+class TrigramSearchIndexTests(SearchIndexTests):
+    backend = 'trigram'
+
+
+@override_settings(ADMIN_CUSTOM={'AUTOCOMPLETE': {'THRESHOLD': 5, 'MODELS': {
+    'sales.Order': 'order_number', 'catalog.Product': 'sku',
+}}})
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(cls.user, 12)
+        cls.item = OrderItem.objects.select_related('order', 'product').first()
+
+    def setUp(self):
+        autocomplete.reset_autocomplete_config()
+        self.addCleanup(autocomplete.reset_autocomplete_config)
+        self.client.force_login(self.user)
+
+    def lookup(self, q, **params):
+        response = self.client.get(reverse('admin_custom:autocomplete'), {'model': 'sales.Order', 'q': q, **params})
+        return [result['text'] for result in response.json()['results']]
+
+    def test_change_form_embeds_no_options(self):
+        url = reverse('admin:sales_orderitem_change', args=[self.item.pk])
+        content = self.client.get(url).content.decode()
+        self.assertNotIn('<option value="%s"' % self.item.order.pk, content)
+        self.assertIn('data-model="sales.order"', content)
+        self.assertIn('value="%s"' % self.item.order.order_number, content)
+        self.assertIn('admin_custom/js/autocomplete.js', content)
+        self.assertIn('data-model="catalog.product"', self.client.get(
+            reverse('admin:sales_order_change', args=[self.item.order.pk]),
+        ).content.decode())  # inline OrderItem
+
+        other = Order.objects.exclude(pk=self.item.order.pk).first()
+        response = self.client.post(url, {
+            'order': other.pk, 'product': self.item.product.pk, 'quantity': 3,
+            'unit_price': '10.00', 'subtotal': '30.00',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.order, other)
+
+        with override_settings(ADMIN_CUSTOM={'AUTOCOMPLETE': {'THRESHOLD': 100, 'MODELS': {'sales.Order': 'order_number'}}}):
+            autocomplete.reset_autocomplete_config()
+            self.assertIn('<option value="%s"' % other.pk, self.client.get(url).content.decode())
+
+    def test_change_form_does_not_build_index(self):
+        index = autocomplete.get_index(Order)
+        url = reverse('admin:sales_orderitem_change', args=[self.item.pk])
+        content = self.client.get(url).content.decode()
+        self.assertIn('data-model="sales.order"', content)
+        self.assertIn('value="%s"' % self.item.order.order_number, content)
+        self.assertIsNone(index._keys)  # seuil : compte borné, libellé : une ligne
+
+        self.assertEqual(self.lookup('cmd-0001'), ['CMD-0001'])
+        self.assertIsNotNone(index._keys)
+        with self.assertNumQueries(0):
+            self.assertEqual(index.label(self.item.order.pk, build=False), self.item.order.order_number)
+
+    def test_prefix_lookup_maintained_by_signals(self):
+        self.assertEqual(self.lookup('cmd-000'), [f'CMD-{index:04d}' for index in range(10)])
+        self.assertEqual(self.lookup('CMD-001', limit=1), ['CMD-0010'])
+        self.assertEqual(self.lookup('SKU'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                user=self.user, order_number='CMD-0011-B', shipping_address='1 rue',
+                shipping_city='Dakar', shipping_postal_code='10000', shipping_country='Sénégal',
+            )
+        self.assertEqual(self.lookup('cmd-0011'), ['CMD-0011', 'CMD-0011-B'])
+        with self.captureOnCommitCallbacks(execute=True):
+            order.order_number = 'ZZ-1'
+            order.save()
+        self.assertEqual(self.lookup('cmd-0011'), ['CMD-0011'])
+        self.assertEqual(self.lookup('zz'), ['ZZ-1'])
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        self.assertEqual(self.lookup('zz'), [])
+
+        # Écriture hors signaux (autre processus) : génération changée, index reconstruit
+        Order.objects.filter(order_number='CMD-0000').update(order_number='AA-0')
+        autocomplete.result_cache.bump(Order)
+        self.assertEqual(self.lookup('aa'), ['AA-0'])
+
+        response = self.client.get(reverse('admin_custom:autocomplete'), {'model': 'sales.Payment', 'q': 'x'})
+        self.assertEqual(response.status_code, 404)
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        self.assertEqual(self.client.get(reverse('admin_custom:autocomplete'), {'model': 'sales.Order', 'q': 'c'}).status_code, 403)
+
+
+@override_settings(ADMIN_CUSTOM={'LAZY_INLINES': {'PAGE_SIZE': 5}})
+class LazyInlineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(cls.user, 12)
+        cls.category = Category.objects.get()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[SESSION_INTERFACE_KEY] = INTERFACE_MODERN
+        session.save()
+        self.change_url = reverse('admin:catalog_category_change', args=[self.category.pk])
+        self.fragment_url = reverse('admin:catalog_category_inline', args=[self.category.pk, 0])
+
+    def category_data(self, **extra):
+        return {'name': 'Catégorie', 'slug': 'categorie', 'is_active': 'on', **extra}
+
+    def test_change_form_renders_placeholders_and_pages(self):
+        content = self.client.get(self.change_url).content.decode()
+        self.assertIn(f'data-url="{self.fragment_url}"', content)
+        self.assertNotIn('products-TOTAL_FORMS', content)
+        self.assertIn('admin/js/prepopulate.js', content)  # media de l'inline
+
+        with self.assertNumQueries(6):  # session, utilisateur, catégorie, comptage, page, objets
+            response = self.client.get(self.fragment_url, {'page': 3})
+        content = response.content.decode()
+        self.assertEqual(len(response.context['inline_admin_formset'].formset.initial_forms), 2)
+        self.assertIn('11–12 sur 12', content)
+        self.assertIn('name="products-INITIAL_FORMS" value="2"', content)
+        self.assertEqual(self.client.get(
+            reverse('admin:catalog_category_inline', args=[self.category.pk, 1]),
+        ).status_code, 404)
+
+        session = self.client.session
+        session[SESSION_INTERFACE_KEY] = INTERFACE_CLASSIC
+        session.save()
+        self.assertIn('products-TOTAL_FORMS', self.client.get(self.change_url).content.decode())
+
+    def test_save_with_and_without_loaded_inline(self):
+        response = self.client.post(self.change_url, self.category_data(name='Sans inline'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Category.objects.get().name, 'Sans inline')
+
+        page = self.client.get(self.fragment_url, {'page': 2}).context['inline_admin_formset'].formset
+        data = self.category_data(**{
+            'products-TOTAL_FORMS': len(page.initial_forms), 'products-INITIAL_FORMS': len(page.initial_forms),
+        })
+        for index, form in enumerate(page.initial_forms):
+            product = form.instance
+            data.update({
+                f'products-{index}-id': product.pk, f'products-{index}-category': self.category.pk,
+                f'products-{index}-name': product.name.upper(), f'products-{index}-slug': product.slug,
+                f'products-{index}-sku': product.sku, f'products-{index}-price': product.price,
+                f'products-{index}-stock_quantity': product.stock_quantity, f'products-{index}-is_active': 'on',
+            })
+        response = self.client.post(self.change_url, data)
+        self.assertEqual(response.status_code, 302)
+        renamed = {product.pk for product in Product.objects.all() if product.name.isupper()}
+        self.assertEqual(renamed, {form.instance.pk for form in page.initial_forms})
+        self.assertEqual(Product.objects.count(), 12)
+
+
+class DownsamplingTests(TestCase):
+    # Série journalière : bruit faible, un pic et un creux isolés
+    values = [10 + (index * 7) % 5 for index in range(1000)]
+    values[321], values[777] = 500, -200
+
+    def test_lttb_and_minmax_keep_extremes(self):
+        for patched in (mock.patch.object(downsampling, 'numpy', None), nullcontext()):
+            with patched:
+                lttb = downsampling.lttb_indices(self.values, 50)
+                minmax = downsampling.minmax_indices(self.values, 50)
+            self.assertEqual(len(lttb), 50)
+            self.assertEqual((lttb[0], lttb[-1]), (0, 999))
+            self.assertEqual(lttb, sorted(set(lttb)))
+            self.assertLessEqual(len(minmax), 50)
+            for indices in (lttb, minmax):
+                self.assertIn(321, indices)
+                self.assertIn(777, indices)
+            self.assertEqual(downsampling.lttb_indices(self.values[:40], 50), list(range(40)))
+        if downsampling.numpy is not None:
+            with mock.patch.object(downsampling, 'numpy', None):
+                expected = (downsampling.lttb_indices(self.values, 64), downsampling.minmax_indices(self.values, 64))
+            self.assertEqual((downsampling.lttb_indices(self.values, 64), downsampling.minmax_indices(self.values, 64)), expected)
+
+    @override_settings(ADMIN_CUSTOM=NO_CACHE)
+    def test_chart_data_max_points(self):
+        create_orders(User.objects.create_user('client'), 3)
+        url = reverse('admin_custom:chart_data')
+        params = {'model': 'Order', 'field': 'total_amount', 'frequency': 'day', 'operation': 'count'}
+
+        payload = self.client.get(url, {**params, 'max_points': 10}).json()
+        self.assertEqual(len(payload['data']), 10)
+        self.assertEqual(payload['positions'][-1], 29)
+        self.assertEqual(payload['data'][-1], 3)  # commandes du jour conservées
+        self.assertEqual(len(payload['labels']), 10)
+        self.assertEqual(len(self.client.get(url, {**params, 'type': 'bar', 'max_points': 10}).json()['data']), 30)
+        self.assertNotIn('positions', self.client.get(url, {**params, 'max_points': 100}).json())
+        for invalid in ({'max_points': 2}, {'max_points': 'x'}, {'max_points': 10, 'downsample': 'avg'}):
+            self.assertEqual(self.client.get(url, {**params, **invalid}).status_code, 400)
+
+        charts = [{'id': 'jour', 'model': 'Order', 'field': 'total_amount', 'frequency': 'day',
+                   'operation': 'count', 'max_points': 6, 'downsample': 'minmax'}]
+        payload = self.client.get(reverse('admin_custom:chart_batch'), {'charts': json.dumps(charts)}).json()
+        self.assertLessEqual(len(payload['charts']['jour']['data']), 6)
+        self.assertEqual(payload['charts']['jour']['data'][-1], 3)
+
+
+class ChartDateFieldTests(TestCase):
+    def setUp(self):
+        create_orders(User.objects.create_user('client'), 3)
+        for index, order in enumerate(Order.objects.order_by('pk')):
+            issued = date(2024, 1, 15) + timedelta(days=40 * index)  # 15/01, 24/02, 04/04
+            Invoice.objects.create(
+                order=order, invoice_number=f'FAC-{index}', subtotal=Decimal(10 * (index + 1)),
+                total_amount=Decimal(10 * (index + 1)), issued_date=issued, due_date=issued + timedelta(days=30),
+            )
+
+    def test_default_date_field_and_day_buckets(self):
+        self.assertEqual(ModelInfo(Invoice).default_date_field, 'created_at')
+        self.assertEqual(ModelInfo(MetricRollup).default_date_field, 'day')  # pas de created_at
+        window = ({'value': build_aggregate('count', None)}, datetime(2024, 1, 1), datetime(2024, 2, 1))
+        day = str(bucket_queryset(Invoice.objects.all(), 'issued_date', 'day', *window).query)
+        month = str(bucket_queryset(Invoice.objects.all(), 'issued_date', 'month', *window).query)
+        self.assertNotIn('TRUNC', day.upper())
+        self.assertIn('TRUNC', month.upper())
+
+    @override_settings(ADMIN_CUSTOM=NO_CACHE)
+    def test_chart_data_date_field_and_range(self):
+        url = reverse('admin_custom:chart_data')
+        params = {'model': 'Invoice', 'field': 'total_amount', 'date_field': 'issued_date'}
+
+        payload = self.client.get(url, {**params, 'start': '2024-01-01', 'end': '2024-03-31'}).json()
+        self.assertEqual(payload['labels'], ['01/2024', '02/2024', '03/2024'])
+        self.assertEqual(payload['data'], [10.0, 20.0, 0.0])
+        # Bornes incluses, au jour près
+        payload = self.client.get(url, {**params, 'frequency': 'day', 'start': '2024-02-20', 'end': '2024-02-24'}).json()
+        self.assertEqual(payload['data'], [0.0, 0.0, 0.0, 0.0, 20.0])
+        payload = self.client.get(url, {**params, 'operation': 'count', 'end': '2024-04-04'}).json()
+        self.assertEqual((len(payload['data']), payload['labels'][-1], sum(payload['data'])), (12, '04/2024', 3))
+
+        response = self.client.get(url, {**params, 'date_field': 'subtotal'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('issued_date', response.json()['available_date_fields'])
+        for invalid in ({'start': '2024-13-01'}, {'start': '2024-03-01', 'end': '2024-02-01'},
+                        {'frequency': 'day', 'start': '2000-01-01', 'end': '2024-01-01'}):
+            self.assertEqual(self.client.get(url, {**params, **invalid}).status_code, 400)
+
+    @override_settings(ADMIN_CUSTOM=NO_CACHE)
+    def test_batch_groups_by_date_field(self):
+        chart = DashboardChart.objects.create(
+            name='Factures émises', model_name='Invoice', field_name='total_amount',
+            operation='count', frequency='month', date_field='issued_date',
+        )
+        charts = [{'id': 'echeances', 'model': 'Invoice', 'field': 'total_amount', 'date_field': 'due_date',
+                   'start': '2024-02-01', 'end': '2024-03-31'},
+                  {'id': 'invalide', 'model': 'Invoice', 'field': 'total_amount', 'date_field': 'notes'}]
+        payload = self.client.get(reverse('admin_custom:chart_batch'), {
+            'charts': json.dumps(charts), 'chart_id': chart.pk,
+        }).json()['charts']
+        self.assertEqual(payload['echeances']['data'], [10.0, 20.0])  # échéances du 14/02 et du 25/03
+        self.assertIn('error', payload['invalide'])
+        self.assertEqual(len(payload[str(chart.pk)]['data']), 12)
+        self.assertIn((Invoice, ('issued_date',)), [(path.model, path.fields) for path in chart_paths()])
+
+
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(cls.user, 3)
+
+    def setUp(self):
+        performance_log.reset()
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[SESSION_INTERFACE_KEY] = INTERFACE_MODERN
+        session.save()
+
+    def test_repeated_queries_are_reported(self):
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics.execute_wrapper):
+            for order in Order.objects.order_by('pk'):
+                order.user.username
+        self.assertEqual(metrics.queries, 4)
+        self.assertEqual(metrics.duplicate_queries, 2)
+        self.assertIn('WHERE "auth_user"."id" = ?', metrics.duplicates[0][0])
+
+    def test_admin_page_is_measured(self):
+        response = self.client.get(reverse('admin:sales_order_changelist'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertContains(response, 'class="perf-panel"')
+        self.assertNotContains(response, PANEL_MARKER)
+
+        report = {row['route']: row for row in performance_log.report()}
+        self.assertEqual(report['admin:sales_order_changelist']['count'], 1)
+        self.assertGreater(report['admin:sales_order_changelist']['template_ms'], 0)
+        self.assertContains(self.client.get(reverse('admin:admin_perf')), 'admin:sales_order_changelist')
+
+    def test_unresolved_paths_share_one_route(self):
+        for index in range(20):
+            self.client.get(f'/admin_custom/x{index}/')
+        report = performance_log.report()
+        self.assertEqual([row['route'] for row in report], [UNRESOLVED_ROUTE])
+        self.assertEqual(report[0]['count'], 20)
+
+
+@override_settings(ADMIN_CUSTOM=NO_CACHE)
+class AsyncViewsTests(TransactionTestCase):
+    def test_sync_views_outside_event_loop(self):
+        self.assertIs(resolve(reverse('admin_custom:stats_data')).func, views.stats_data)
+
+    async def test_worker_queries_are_measured(self):
+        user = await sync_to_async(User.objects.create_superuser)('admin', 'admin@example.com', 'password')
+        await sync_to_async(create_orders)(user, 3)
+        for client in (self.client, self.async_client):
+            await sync_to_async(client.force_login)(user)
+        charts = json.dumps([
+            {'id': 'revenue', 'model': 'Order', 'field': 'total_amount'},
+            {'id': 'products', 'model': 'Product', 'field': 'price', 'operation': 'avg'},
+        ])
+        for name, params in (('admin_custom:stats_data', {}), ('admin_custom:chart_batch', {'charts': charts})):
+            await sync_to_async(performance_log.reset)()
+            async_response = await self.async_client.get(reverse(name), params)
+            sync_response = await sync_to_async(self.client.get)(reverse(name), params)
+            # Requêtes des threads de travail comprises, comme sous WSGI
+            queries = [
+                int(re.search(r'desc="(\d+) requêtes SQL"', response['Server-Timing']).group(1))
+                for response in (async_response, sync_response)
+            ]
+            self.assertGreater(queries[0], 2, name)
+            self.assertEqual(queries[0], queries[1], name)
+            report = {row['route']: row for row in await sync_to_async(performance_log.report)()}
+            self.assertEqual(report[name]['max_queries'], queries[0], name)
+
+    async def test_async_views_match_sync_views(self):
+        self.assertIs(resolve(reverse('admin_custom:stats_data')).func, async_views.stats_data)
+
+        user = await sync_to_async(User.objects.create_superuser)('admin', 'admin@example.com', 'password')
+        await sync_to_async(create_orders)(user, 20)
+        grid_url = reverse('admin_custom:grid_data')
+        # Grille : staff avec permission sur le modèle, vérifié avant le cache
+        response = await self.async_client.get(grid_url, {'model': 'User', 'columns': ['email']})
+        self.assertEqual(response.status_code, 302)
+        staff = await sync_to_async(User.objects.create_user)('staff', password='password', is_staff=True)
+        await sync_to_async(self.async_client.force_login)(staff)
+        response = await self.async_client.get(grid_url, {'model': 'User', 'columns': ['email']})
+        self.assertEqual(response.status_code, 403)
+
+        for client in (self.client, self.async_client):
+            await sync_to_async(client.force_login)(user)
+        self.assertEqual((await self.async_client.post(reverse('admin_custom:stats_data'))).status_code, 405)
+        charts = json.dumps([
+            {'id': 'revenue', 'model': 'Order', 'field': 'total_amount'},
+            {'id': 'orders', 'model': 'Order', 'field': 'total_amount', 'operation': 'count'},
+            {'id': 'products', 'model': 'Product', 'field': 'price', 'operation': 'avg'},
+        ])
+        requests = [
+            ('admin_custom:stats_data', {}),
+            ('admin_custom:chart_batch', {'stats': 1, 'charts': charts}),
+            ('admin_custom:chart_data', {'model': 'Order', 'field': 'total_amount', 'frequency': 'day'}),
+            ('admin_custom:grid_data', {'model': 'OrderItem', 'columns': ['order', 'quantity'], 'page_size': 5}),
+        ]
+        for name, params in requests:
+            async_response = await self.async_client.get(reverse(name), params)
+            sync_response = await sync_to_async(self.client.get)(reverse(name), params)
+            self.assertEqual(async_response.status_code, 200, name)
+            self.assertEqual(async_response.json(), sync_response.json(), name)
+
+        for params in ({'filter__total_amount__gt': 'abc'}, {'filter__created_at__gte': 'notadate'},
+                       {'cursor': 'eyJzIjoicGsiLCJwayI6IngifQ'}):
+            response = await self.async_client.get(reverse('admin_custom:grid_data'), {'model': 'Order', **params})
+            self.assertEqual(response.status_code, 400, params)
+
+
+class TemplateSelectionConcurrencyTests(TransactionTestCase):
+    """Interfaces classique et moderne en parallèle : chaque réponse garde son template."""
+
+    def client_for(self, user, interface):
+        client = Client()
+        client.force_login(user)
+        session = client.session
+        session[SESSION_INTERFACE_KEY] = interface
+        session.save()
+        return client
+
+    def test_parallel_classic_and_modern_requests(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(user, 3)
+        order = Order.objects.order_by('pk').first()
+        site = get_custom_admin_site()
+        order_admin, user_admin = site._registry[Order], site._registry[User]
+        pages = {
+            'changelist': (reverse('admin:sales_order_changelist'),
+                           order_admin.change_list_template, order_admin.modern_change_list_template),
+            'change': (reverse('admin:sales_order_change', args=[order.pk]),
+                       order_admin.change_form_template, order_admin.modern_change_form_template),
+            'add': (reverse('admin:auth_user_add'),
+                    user_admin.add_form_template, user_admin.modern_add_form_template),
+            'history': (reverse('admin:sales_order_history', args=[order.pk]),
+                        order_admin.object_history_template, order_admin.modern_object_history_template),
+            'delete': (reverse('admin:sales_order_delete', args=[order.pk]),
+                       None, order_admin.modern_delete_confirmation_template),
+        }
+        clients = {
+            interface: self.client_for(user, interface) for interface in (INTERFACE_CLASSIC, INTERFACE_MODERN)
+        }
+        jobs = [(interface, page) for _ in range(8) for page in pages for interface in clients]
+
+        def fetch(job):
+            interface, page = job
+            try:
+                response = clients[interface].get(pages[page][0])
+                return job, response.status_code, response.template_name
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(fetch, jobs))
+
+        for (interface, page), status, template in results:
+            _, classic, modern = pages[page]
+            self.assertEqual(status, 200, (interface, page))
+            if interface == INTERFACE_MODERN:
+                self.assertEqual(template, modern, page)
+            else:
+                self.assertNotIn('/modern/', str(template), page)
+                if classic:
+                    self.assertEqual(template, classic, page)
+        self.assertEqual(order_admin.change_list_template, pages['changelist'][1])
+
+    def test_delete_selected_uses_modern_template(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        create_orders(user, 2)
+        data = {'action': 'delete_selected', '_selected_action': list(Order.objects.values_list('pk', flat=True))}
+        url = reverse('admin:sales_order_changelist')
+        modern = self.client_for(user, INTERFACE_MODERN).post(url, data)
+        classic = self.client_for(user, INTERFACE_CLASSIC).post(url, data)
+        self.assertEqual(modern.template_name, 'admin_custom/modern/delete_selected_confirmation.html')
+        self.assertNotIn('/modern/', str(classic.template_name))
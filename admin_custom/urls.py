@@ -1,11 +1,17 @@
 from django.urls import path
-from . import views
+from . import async_views, views
+from .async_views import dual_path
 
 app_name = 'admin_custom'
 
 urlpatterns = [
-    path('api/chart-data/', views.chart_data, name='chart_data'),
-    path('api/grid-data/', views.grid_data, name='grid_data'),
-    path('api/stats/', views.stats_data, name='stats_data'),
+    # Vues asynchrones sous ASGI (voir async_views.py)
+    dual_path('api/chart-data/', views.chart_data, async_views.chart_data, name='chart_data'),
+    dual_path('api/chart-batch/', views.chart_batch, async_views.chart_batch, name='chart_batch'),
+    dual_path('api/grid-data/', views.grid_data, async_views.grid_data, name='grid_data'),
+    path('api/grid-export/', views.grid_export, name='grid_export'),
+    dual_path('api/stats/', views.stats_data, async_views.stats_data, name='stats_data'),
     path('api/model-fields/', views.model_fields, name='model_fields'),  # Nouvelle API pour les champs
+    path('api/autocomplete/', views.autocomplete, name='autocomplete'),
+    path('api/cache-stats/', views.cache_stats, name='cache_stats'),
 ]
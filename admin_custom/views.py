@@ -1,268 +1,584 @@
-from django.http import JsonResponse
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
-from django.db.models import Sum, Avg, Count
-from django.apps import apps
-from datetime import timedelta, datetime
-from decimal import Decimal
+from django.utils.dateparse import parse_date
+from django.db import DatabaseError
+from django.core.exceptions import FieldError
+from functools import wraps
 import json
 
+from . import autocomplete as prefix_index
+from .aggregation import bucket_window, chart_series, chart_series_many, empty_series
+from .cache import cache_response, result_cache
+from .downsampling import DOWNSAMPLED_CHART_TYPES, downsample, downsample_options
+from .export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, aiter_rows, default_columns, prepare_export
+from .grid_query import (
+    DEFAULT_PAGE_SIZE, GridPlan, GridQueryError, build_filters, display_relations, paginate,
+    path_models,
+)
+from .model_catalog import model_catalog
+from .models import DashboardChart, DashboardGrid
+from .rollups import rollup_chart_series, rollup_chart_series_many
+from .stats import collect_stats
+
 
 def get_model_class(model_name):
     """
-    Retourne la classe du modèle à partir de son nom.
-    Utilise l'auto-découverte Django pour trouver le modèle.
+    Retourne la classe du modèle à partir de son nom ('Order' ou 'sales.Order').
+    Utilise l'index du catalogue de modèles construit au démarrage.
     """
-    # Parcourir toutes les apps pour trouver le modèle
-    for app_config in apps.get_app_configs():
-        try:
-            model = app_config.get_model(model_name)
-            if model:
-                return model
-        except LookupError:
-            # Le modèle n'existe pas dans cette app, continuer
-            continue
-    
-    # Si le modèle n'est pas trouvé, essayer avec le nom complet app.ModelName
-    if '.' in model_name:
-        try:
-            app_label, model_name_only = model_name.split('.', 1)
-            app_config = apps.get_app_config(app_label)
-            return app_config.get_model(model_name_only)
-        except (LookupError, ValueError):
-            pass
-    
+    return model_catalog.get_model(model_name)
+
+
+def _requested_model(request):
+    """Dépendances de cache : le modèle demandé (?model=...)."""
+    model_class = get_model_class(request.GET.get('model') or '')
+    return [model_class] if model_class else []
+
+
+def _requested_grid(request):
+    """Modèle (ou None) et DashboardGrid (ou None) demandés par ?model= / ?grid_id=."""
+    grid_id = request.GET.get('grid_id', '')
+    grid = DashboardGrid.objects.filter(pk=grid_id).first() if grid_id.isdigit() else None
+    return get_model_class(request.GET.get('model') or (grid.model_name if grid else '')), grid
+
+
+def _grid_paths(request, grid):
+    """Colonnes demandées (ou celles du DashboardGrid), et clés des filtres et tri."""
+    columns = request.GET.getlist('columns') or (list(grid.columns or []) if grid else [])
+    try:
+        filters = list(_grid_filters(request, grid))
+    except GridQueryError:
+        filters = []  # Refusés ensuite par la vue (400)
+    return columns, filters + [request.GET.get('sort', '')]
+
+
+def _requested_model_and_relations(request):
+    """
+    Dépendances de cache d'une grille : le modèle et tous les modèles atteints
+    par ses colonnes (relations traversées, __str__ des objets affichés),
+    ses filtres et son tri.
+    """
+    grid_id = request.GET.get('grid_id', '')
+    model_class, grid = _requested_grid(request)
+    models = [model_class] if model_class else []
+    if model_class:
+        columns, paths = _grid_paths(request, grid)
+        paths = display_relations(model_class, columns) + paths
+        models.extend(model for model in path_models(model_class, paths) if model not in models)
+    if grid_id:
+        # Les colonnes et filtres peuvent venir du DashboardGrid enregistré
+        models.append(DashboardGrid)
+    return models
+
+
+def has_view_permission(user, model):
+    """Permission view ou change sur le modèle (comme ModelAdmin.has_view_permission)."""
+    opts = model._meta
+    return any(user.has_perm(f'{opts.app_label}.{action}_{opts.model_name}') for action in ('view', 'change'))
+
+
+def _grid_access_error(request):
+    """
+    Refus d'une API de grille, ou None : staff requis (redirection vers la
+    connexion de l'admin), puis permission view ou change sur le modèle et
+    sur chaque modèle joint par les colonnes, filtres et tri demandés
+    (`order__user__email` : Order et User). Un modèle introuvable est laissé
+    à la vue (400 / 404).
+    """
+    user = request.user
+    if not (user.is_active and user.is_staff):
+        return redirect_to_login(request.get_full_path(), reverse('admin:login'))
+    model_class, grid = _requested_grid(request)
+    if model_class is None:
+        return None
+    columns, paths = _grid_paths(request, grid)
+    for model in [model_class, *path_models(model_class, columns + paths)]:
+        if not has_view_permission(user, model):
+            return JsonResponse({'error': f'Permission refusée : {model._meta.verbose_name}'}, status=403)
     return None
 
 
-@require_http_methods(["GET"])
-def chart_data(request):
-    """API pour récupérer les données de graphique"""
+def grid_access_required(view):
+    """
+    Contrôle d'accès des APIs de grille, avant la lecture du cache (les
+    réponses en cache ne dépendent pas de l'utilisateur). Accepte aussi les
+    vues asynchrones, que staff_member_required ne gère pas sous Django 4.2.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            error = await sync_to_async(_grid_access_error)(request)
+            if error is not None:
+                return error
+            return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        error = _grid_access_error(request)
+        if error is not None:
+            return error
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _stats_models(request=None):
+    """Modèles parcourus par les statistiques (hors apps Django internes)."""
+    return model_catalog.project_models()
+
+
+def _parse_day(value, name):
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError(f'Paramètre {name} : date AAAA-MM-JJ attendue')
+    return day
+
+
+def _chart_window(model_info, frequency, date_field=None, start=None, end=None):
+    """
+    Valide l'axe temporel d'un graphique : champ date du modèle (défaut :
+    created_at ou le premier champ date) et plage [start, end] facultative.
+
+    Returns:
+        Tuple (champ date, date de début ou None, date de fin ou None)
+
+    Raises:
+        ValueError: champ ou dates invalides, plage trop longue
+    """
+    date_field = date_field or model_info.default_date_field
+    if not date_field:
+        raise ValueError(f'Le modèle {model_info.name} n\'a aucun champ date')
+    if date_field not in model_info.date_fields:
+        raise ValueError(
+            f'Le champ "{date_field}" n\'est pas un champ date du modèle {model_info.name} '
+            f'(disponibles : {", ".join(model_info.date_fields)})'
+        )
+    start, end = _parse_day(start, 'start'), _parse_day(end, 'end')
+    bucket_window(frequency, start=start, end=end)  # start <= end, nombre de tranches borné
+    return date_field, start, end
+
+
+def _chart_request(request):
+    """
+    Valide les paramètres de chart_data.
+
+    Returns:
+        Tuple (dict des paramètres, réponse d'erreur ou None)
+    """
     model_name = request.GET.get('model')
     field_name = request.GET.get('field')
-    chart_type = request.GET.get('type', 'line')
-    frequency = request.GET.get('frequency', 'month')
-    operation = request.GET.get('operation', 'sum')
+    params = {
+        'field_name': field_name,
+        'chart_type': request.GET.get('type', 'line'),
+        'frequency': request.GET.get('frequency', 'month'),
+        'operation': request.GET.get('operation', 'sum'),
+    }
     
     if not model_name or not field_name:
-        return JsonResponse({'error': 'Model and field are required'}, status=400)
+        return params, JsonResponse({'error': 'Model and field are required'}, status=400)
     
     model_class = get_model_class(model_name)
     if not model_class:
-        return JsonResponse({'error': 'Invalid model'}, status=400)
+        return params, JsonResponse({'error': 'Invalid model'}, status=400)
+    params['model_class'] = model_class
+    try:
+        params['max_points'], params['downsample'] = downsample_options(
+            request.GET.get('max_points'), request.GET.get('downsample'),
+        )
+    except ValueError as e:
+        return params, JsonResponse({'error': str(e)}, status=400)
     
     # Vérifier que le champ existe
+    model_info = model_catalog.get_info(model_class)
+    if not model_info.has_attribute(field_name):
+        numeric_fields = model_info.numeric_fields
+        return params, JsonResponse({
+            'error': f'Le champ "{field_name}" n\'existe pas sur le modèle {model_name}',
+            'available_fields': numeric_fields,
+            'suggestion': numeric_fields[0] if numeric_fields else None
+        }, status=400)
     try:
-        # Créer une instance pour vérifier les champs
-        instance = model_class()
-        if not hasattr(instance, field_name):
-            # Liste des champs disponibles
-            available_fields = [f.name for f in model_class._meta.get_fields() if hasattr(f, 'name')]
-            numeric_fields = []
-            for field in model_class._meta.get_fields():
-                if hasattr(field, 'name'):
-                    field_obj = model_class._meta.get_field(field.name)
-                    if hasattr(field_obj, 'get_internal_type'):
-                        field_type = field_obj.get_internal_type()
-                        if field_type in ['DecimalField', 'FloatField', 'IntegerField', 'PositiveIntegerField', 'BigIntegerField']:
-                            numeric_fields.append(field.name)
-            
-            return JsonResponse({
-                'error': f'Le champ "{field_name}" n\'existe pas sur le modèle {model_name}',
-                'available_fields': numeric_fields,
-                'suggestion': numeric_fields[0] if numeric_fields else None
-            }, status=400)
-    except Exception as e:
-        return JsonResponse({'error': f'Erreur lors de la vérification du champ: {str(e)}'}, status=400)
-    
-    # Calculer la période selon la fréquence
-    now = timezone.now()
-    periods_map = {
-        'day': 30,
-        'week': 12,
-        'month': 12,
-        'quarter': 8,
-        'year': 5,
+        params['date_field'], params['start'], params['end'] = _chart_window(
+            model_info, params['frequency'],
+            request.GET.get('date_field'), request.GET.get('start'), request.GET.get('end'),
+        )
+    except ValueError as e:
+        return params, JsonResponse({
+            'error': str(e),
+            'available_date_fields': model_info.date_fields,
+        }, status=400)
+    return params, None
+
+
+def _downsampled(series, chart_type, max_points, method):
+    """Série réduite à max_points points pour les courbes (voir downsampling.py)."""
+    if chart_type not in DOWNSAMPLED_CHART_TYPES:
+        return series
+    return downsample(series, max_points, method)
+
+
+def _chart_response(params, series):
+    series = _downsampled(series, params['chart_type'], params.get('max_points'), params.get('downsample'))
+    payload = {
+        'labels': series['labels'],
+        'data': series['data'],
+        'chart_type': params['chart_type'],
     }
-    periods = periods_map.get(frequency, 12)
+    if 'positions' in series:
+        payload['positions'] = series['positions']
+    return JsonResponse(payload)
+
+
+@require_http_methods(["GET"])
+@cache_response('chart_data', _requested_model)
+def chart_data(request):
+    """API pour récupérer les données de graphique"""
+    params, error = _chart_request(request)
+    if error:
+        return error
+    model_class = params['model_class']
+    frequency = params['frequency']
+    window = {'date_field': params['date_field'], 'start': params['start'], 'end': params['end']}
     
-    # Récupérer les données
-    data = []
-    labels = []
+    # Une seule requête groupée pour toutes les tranches de la période
+    try:
+        # Les rollups répondent en lisant quelques centaines de lignes pré-agrégées
+        series = rollup_chart_series(
+            model_class, params['field_name'], frequency=frequency, operation=params['operation'], **window,
+        ) or chart_series(
+            model_class.objects.all(), params['field_name'],
+            frequency=frequency, operation=params['operation'], **window,
+        )
+    except (FieldError, DatabaseError, TypeError, ValueError):
+        # Champ non agrégeable : série à zéro comme auparavant
+        series = empty_series(frequency, start=params['start'], end=params['end'])
     
-    for i in range(periods - 1, -1, -1):
-        if frequency == 'day':
-            start = now - timedelta(days=i+1)
-            end = now - timedelta(days=i)
-            label = start.strftime('%d/%m')
-        elif frequency == 'week':
-            start = now - timedelta(weeks=i+1)
-            end = now - timedelta(weeks=i)
-            label = f"Sem {start.isocalendar()[1]}"
-        elif frequency == 'month':
-            # Calculer le début du mois
-            month_start = now.month - i - 1
-            year = now.year
-            while month_start < 1:
-                month_start += 12
-                year -= 1
-            start = timezone.make_aware(datetime(year, month_start, 1))
-            month_end = now.month - i
-            year_end = now.year
-            while month_end < 1:
-                month_end += 12
-                year_end -= 1
-            end = timezone.make_aware(datetime(year_end, month_end, 1))
-            label = start.strftime('%m/%Y')
-        elif frequency == 'quarter':
-            quarter = ((now.month - 1) // 3) - i
-            year = now.year
-            while quarter < 0:
-                quarter += 4
-                year -= 1
-            month_start = (quarter * 3) + 1
-            start = timezone.make_aware(datetime(year, month_start, 1))
-            label = f"T{quarter + 1} {year}"
-            end = start + timedelta(days=90)
-        else:  # year
-            year = now.year - i
-            start = timezone.make_aware(datetime(year, 1, 1))
-            end = timezone.make_aware(datetime(year + 1, 1, 1))
-            label = str(year)
-        
-        # Filtrer les données pour cette période
-        queryset = model_class.objects.filter(created_at__gte=start, created_at__lt=end)
-        
-        # Appliquer l'opération
-        if operation == 'sum':
-            try:
-                from django.db.models import Sum
-                result = queryset.aggregate(sum=Sum(field_name))
-                value = float(result['sum'] or 0)
-            except:
-                value = 0
-        elif operation == 'avg':
-            try:
-                from django.db.models import Avg
-                result = queryset.aggregate(avg=Avg(field_name))
-                value = float(result['avg'] or 0)
-            except:
-                value = 0
-        elif operation == 'count':
-            value = queryset.count()
+    return _chart_response(params, series)
+
+
+def _batch_specs(request):
+    """
+    Graphiques demandés au batch : ?charts=[{"id", "model", "field", "operation",
+    "frequency", "type", "max_points", "downsample", "date_field", "start",
+    "end"}, ...] (JSON) et/ou ?chart_id=<DashboardChart> (répétable).
+    """
+    raw = request.GET.get('charts')
+    specs = []
+    if raw:
+        try:
+            items = json.loads(raw)
+        except ValueError:
+            raise ValueError('Paramètre charts : JSON invalide')
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise ValueError('Paramètre charts : liste d\'objets attendue')
+        for index, item in enumerate(items):
+            max_points, method = downsample_options(item.get('max_points'), item.get('downsample'))
+            specs.append({
+                'id': str(item.get('id', index)),
+                'model': item.get('model'),
+                'field': item.get('field'),
+                'operation': item.get('operation', 'sum'),
+                'frequency': item.get('frequency', 'month'),
+                'chart_type': item.get('type', 'line'),
+                'max_points': max_points,
+                'downsample': method,
+                'date_field': item.get('date_field'),
+                'start': item.get('start'),
+                'end': item.get('end'),
+            })
+    chart_ids = [value for value in request.GET.getlist('chart_id') if value.isdigit()]
+    if chart_ids:
+        for chart in DashboardChart.objects.filter(pk__in=chart_ids):
+            specs.append({
+                'id': str(chart.pk),
+                'model': chart.model_name,
+                'field': chart.field_name,
+                'operation': chart.operation or 'sum',
+                'frequency': chart.frequency,
+                'chart_type': chart.chart_type,
+                'date_field': chart.date_field,
+            })
+    return specs
+
+
+def _batch_models(request):
+    """Dépendances de cache du batch : modèles des graphiques (+ statistiques)."""
+    models = _stats_models() if request.GET.get('stats') else []
+    try:
+        specs = _batch_specs(request)
+    except ValueError:
+        return models
+    for spec in specs:
+        model = get_model_class(spec['model'])
+        if model and model not in models:
+            models.append(model)
+    if request.GET.get('chart_id'):
+        models.append(DashboardChart)
+    return models
+
+
+def _batch_series(model_class, frequency, date_field, start, end, specs):
+    """
+    Séries d'un groupe de graphiques (même modèle, même fenêtre) : rollups
+    d'abord, puis un seul GROUP BY partagé pour le reste.
+    """
+    window = {'date_field': date_field, 'start': start, 'end': end}
+    results = {}
+    pending = []
+    rollup_series = rollup_chart_series_many(
+        model_class, [(spec['field'], spec['operation']) for spec in specs], frequency=frequency, **window,
+    )
+    for spec, series in zip(specs, rollup_series):
+        if series:
+            results[spec['id']] = series
         else:
-            value = queryset.count()
-        
-        data.append(value)
-        labels.append(label)
-    
-    return JsonResponse({
-        'labels': labels,
-        'data': data,
-        'chart_type': chart_type
-    })
+            pending.append(spec)
+    if not pending:
+        return results
+
+    try:
+        shared = chart_series_many(
+            model_class.objects.all(),
+            [(spec['field'], spec['operation']) for spec in pending],
+            frequency=frequency, **window,
+        )
+        results.update({spec['id']: series for spec, series in zip(pending, shared)})
+    except (FieldError, DatabaseError, TypeError, ValueError):
+        # Un champ non agrégeable fait échouer le groupe : calcul graphique par graphique
+        for spec in pending:
+            try:
+                results[spec['id']] = chart_series(
+                    model_class.objects.all(), spec['field'],
+                    frequency=frequency, operation=spec['operation'], **window,
+                )
+            except (FieldError, DatabaseError, TypeError, ValueError):
+                results[spec['id']] = empty_series(frequency, start=start, end=end)
+    return results
 
 
 @require_http_methods(["GET"])
-def grid_data(request):
-    """API pour récupérer les données de grille"""
+@cache_response('chart_batch', _batch_models)
+def chart_batch(request):
+    """
+    API groupée : toutes les séries d'un dashboard (et les statistiques avec
+    ?stats=1) en une seule requête HTTP. Les graphiques d'un même modèle,
+    d'une même fréquence et d'un même axe temporel (champ date et plage)
+    partagent une seule requête groupée.
+    """
+    try:
+        specs = _batch_specs(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    charts, groups = _batch_groups(specs)
+    for key, group in groups.items():
+        _add_batch_series(charts, group, _batch_series(*key, group))
+
+    payload = {'charts': charts}
+    if request.GET.get('stats'):
+        payload['stats'] = collect_stats().legacy()
+    return JsonResponse(payload)
+
+
+def _batch_groups(specs):
+    """
+    Regroupe les graphiques valides par (modèle, fréquence, champ date, début, fin).
+
+    Returns:
+        Tuple ({id: erreur} des graphiques invalides, {(modèle, fréquence,
+        champ date, début, fin): [specs]})
+    """
+    charts = {}
+    groups = {}
+    for spec in specs:
+        model_class = get_model_class(spec['model'])
+        if not model_class:
+            charts[spec['id']] = {'error': 'Invalid model'}
+            continue
+        model_info = model_catalog.get_info(model_class)
+        if not spec['field'] or not model_info.has_attribute(spec['field']):
+            charts[spec['id']] = {
+                'error': f'Le champ "{spec["field"]}" n\'existe pas sur le modèle {spec["model"]}',
+            }
+            continue
+        try:
+            window = _chart_window(
+                model_info, spec['frequency'], spec.get('date_field'), spec.get('start'), spec.get('end'),
+            )
+        except ValueError as e:
+            charts[spec['id']] = {'error': str(e)}
+            continue
+        groups.setdefault((model_class, spec['frequency'], *window), []).append(spec)
+    return charts, groups
+
+
+def _add_batch_series(charts, group, series):
+    for spec in group:
+        reduced = _downsampled(
+            series[spec['id']], spec['chart_type'], spec.get('max_points'), spec.get('downsample'),
+        )
+        charts[spec['id']] = {
+            'labels': reduced['labels'],
+            'data': reduced['data'],
+            'chart_type': spec['chart_type'],
+        }
+        if 'positions' in reduced:
+            charts[spec['id']]['positions'] = reduced['positions']
+
+
+def _grid_filters(request, grid=None):
+    """
+    Filtres d'une grille : ceux enregistrés sur le DashboardGrid, complétés
+    (et surchargés) par ?filters={json} et les paramètres ?filter__<lookup>=valeur.
+    """
+    filters = dict(grid.filters or {}) if grid else {}
+    raw = request.GET.get('filters')
+    if raw:
+        try:
+            extra = json.loads(raw)
+        except ValueError:
+            raise GridQueryError('Paramètre filters : JSON invalide')
+        if not isinstance(extra, dict):
+            raise GridQueryError('Paramètre filters : objet JSON attendu')
+        filters.update(extra)
+    for name in request.GET:
+        if name.startswith('filter__'):
+            filters[name[len('filter__'):]] = request.GET.get(name)
+    return filters
+
+
+def _grid_request(request):
+    """
+    Résout les paramètres communs aux APIs de grille (grid_id, model, columns).
+
+    Returns:
+        Tuple (modèle, colonnes, DashboardGrid ou None, réponse d'erreur ou None)
+    """
     grid_id = request.GET.get('grid_id')
     model_name = request.GET.get('model')
     columns = request.GET.getlist('columns')
     
+    grid = None
+    if grid_id:
+        grid = DashboardGrid.objects.filter(pk=grid_id).first()
+        if grid is None:
+            return None, columns, None, JsonResponse({'error': 'Grid not found'}, status=404)
+        model_name = model_name or grid.model_name
+        columns = columns or list(grid.columns or [])
+    
     if not model_name:
-        return JsonResponse({'error': 'Model is required'}, status=400)
+        return None, columns, grid, JsonResponse({'error': 'Model is required'}, status=400)
     
     model_class = get_model_class(model_name)
     if not model_class:
-        return JsonResponse({'error': 'Invalid model'}, status=400)
+        return None, columns, grid, JsonResponse({'error': 'Invalid model'}, status=400)
+    return model_class, columns, grid, None
+
+
+@grid_access_required
+@require_http_methods(["GET"])
+@cache_response('grid_data', _requested_model_and_relations)
+def grid_data(request):
+    """
+    API pour récupérer les données de grille, triées et paginées côté serveur.
+    Réservée au staff ayant la permission view ou change du modèle.
     
-    # Récupérer les données
-    queryset = model_class.objects.all()
+    Paramètres : model, columns (répétable), grid_id, sort (ex: -total_amount),
+    cursor (renvoyé par la page précédente), page_size, filters / filter__<lookup>.
+    """
+    model_class, columns, grid, error = _grid_request(request)
+    if error:
+        return error
     
-    # Construire les données
-    data = []
-    for obj in queryset[:100]:  # Limiter à 100 résultats
-        row = {}
-        for col in columns:
-            if hasattr(obj, col):
-                value = getattr(obj, col)
-                # Convertir les objets en string
-                if hasattr(value, '__str__'):
-                    row[col] = str(value)
-                else:
-                    row[col] = value
-            else:
-                row[col] = '-'
-        data.append(row)
+    sort = request.GET.get('sort', '')
+    try:
+        queryset, plan = _grid_queryset(request, model_class, columns, grid)
+        rows, next_cursor = paginate(
+            queryset, sort, request.GET.get('cursor'), request.GET.get('page_size') or DEFAULT_PAGE_SIZE,
+        )
+    except (GridQueryError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
+    return _grid_response(columns, sort, [plan.render_row(row) for row in rows], next_cursor)
+
+
+def _grid_queryset(request, model_class, columns, grid):
+    """QuerySet filtré et projeté d'une grille, et son plan de colonnes."""
+    queryset = model_class.objects.filter(build_filters(model_class, _grid_filters(request, grid)))
+    # Une seule requête : projection des colonnes et jointures planifiées
+    plan = GridPlan(model_class, columns)
+    return plan.apply(queryset), plan
+
+
+def _grid_response(columns, sort, data, next_cursor):
     return JsonResponse({
         'data': data,
-        'columns': columns
+        'columns': columns,
+        'sort': sort,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
     })
 
 
+@grid_access_required
 @require_http_methods(["GET"])
-def stats_data(request):
-    """API pour récupérer les statistiques rapides - utilise l'auto-découverte"""
-    from django.db.models import Sum
-    from django.apps import apps
-    
-    stats = {}
-    total_revenue = 0
-    
-    # Parcourir tous les modèles pour détecter automatiquement ceux avec des données
-    for app_config in apps.get_app_configs():
-        # Ignorer les apps Django internes
-        if app_config.name.startswith('django.contrib'):
-            continue
-        
-        for model in app_config.get_models():
-            if model._meta.abstract or model._meta.proxy:
-                continue
-            
-            model_name = model.__name__.lower()
-            
-            # Chercher des champs de montant pour calculer les revenus
-            if hasattr(model, 'total_amount'):
-                count = model.objects.count()
-                revenue = float(model.objects.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-                stats[model_name] = count
-                total_revenue += revenue
-            elif hasattr(model, 'amount'):
-                count = model.objects.count()
-                revenue = float(model.objects.aggregate(Sum('amount'))['amount__sum'] or 0)
-                stats[model_name] = count
-                total_revenue += revenue
-            else:
-                # Compter simplement le nombre d'objets
-                count = model.objects.count()
-                if count > 0:
-                    stats[model_name] = count
+def grid_export(request):
+    """
+    Export complet d'une grille en flux continu (CSV ou NDJSON).
     
-    # Ajouter le revenu total
-    stats['revenue'] = total_revenue
+    Mêmes paramètres que grid_data (model, columns, grid_id, sort, filtres),
+    plus format=csv|ndjson. Sans colonnes, tous les champs concrets sont exportés.
+    Réservé aux utilisateurs ayant la permission view ou change du modèle.
+    Sous ASGI, le flux est un itérateur asynchrone (voir export.aiter_rows).
+    """
+    model_class, columns, grid, error = _grid_request(request)
+    if error:
+        return error
+    columns = columns or default_columns(model_class)
     
-    # Garder la compatibilité avec l'ancien format pour l'index.html
-    # On essaie de trouver les modèles courants
-    order_model = get_model_class('Order')
-    invoice_model = get_model_class('Invoice')
-    payment_model = get_model_class('Payment')
-    product_model = get_model_class('Product')
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f'Format inconnu : {export_format}'}, status=400)
     
-    result = {
-        'orders': order_model.objects.count() if order_model else 0,
-        'invoices': invoice_model.objects.count() if invoice_model else 0,
-        'payments': payment_model.objects.count() if payment_model else 0,
-        'products': product_model.objects.count() if product_model else 0,
-        'revenue': total_revenue,
-    }
+    admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
+    chunk_size = admin_custom_config.get('EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    try:
+        queryset = model_class.objects.filter(build_filters(model_class, _grid_filters(request, grid)))
+        rows = prepare_export(queryset, columns, request.GET.get('sort', ''), export_format, chunk_size)
+    except (GridQueryError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if isinstance(request, ASGIRequest):
+        rows = aiter_rows(rows, chunk_size)  # Sinon lu en entier par Django avant l'envoi
     
-    return JsonResponse(result)
+    filename = f"{model_class._meta.model_name}-{timezone.localdate().isoformat()}.{export_format}"
+    response = StreamingHttpResponse(rows, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Accel-Buffering'] = 'no'  # Pas de mise en tampon par nginx
+    return response
+
+
+@require_http_methods(["GET"])
+@cache_response('stats_data', _stats_models)
+def stats_data(request):
+    """API pour récupérer les statistiques rapides - utilise le catalogue de modèles"""
+    return JsonResponse(collect_stats().legacy())
 
 
 @require_http_methods(["GET"])
+@cache_response('model_fields', lambda request: [])
 def model_fields(request):
     """API pour récupérer les champs numériques d'un modèle - utilise l'auto-découverte"""
     model_name = request.GET.get('model')
@@ -274,22 +590,52 @@ def model_fields(request):
     if not model_class:
         return JsonResponse({'error': f'Model "{model_name}" not found'}, status=404)
     
-    # Détecter les champs numériques
-    numeric_fields = []
-    for field in model_class._meta.get_fields():
-        if hasattr(field, 'name'):
-            try:
-                field_obj = model_class._meta.get_field(field.name)
-                if hasattr(field_obj, 'get_internal_type'):
-                    field_type = field_obj.get_internal_type()
-                    if field_type in ['DecimalField', 'FloatField', 'IntegerField', 
-                                     'PositiveIntegerField', 'BigIntegerField', 'SmallIntegerField']:
-                        numeric_fields.append(field.name)
-            except Exception:
-                # Ignorer les champs qui ne peuvent pas être inspectés
-                continue
+    # Champs numériques et champs date pré-calculés par le catalogue
+    model_info = model_catalog.get_info(model_class)
     
     return JsonResponse({
         'model': model_name,
-        'fields': numeric_fields,
+        'fields': list(model_info.numeric_fields),
+        'date_fields': list(model_info.date_fields),
+        'default_date_field': model_info.default_date_field,
+    })
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def cache_stats(request):
+    """API pour consulter les compteurs de succès/échecs du cache des APIs"""
+    return JsonResponse({
+        'enabled': result_cache.enabled,
+        'endpoints': result_cache.stats(),
+    })
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def autocomplete(request):
+    """
+    API de suggestions pour les clés étrangères et les filtres : objets du
+    modèle dont le champ configuré commence par q (index en mémoire, voir
+    autocomplete.py). Paramètres : model, q, limit.
+    """
+    model_class = get_model_class(request.GET.get('model') or '')
+    index = prefix_index.get_index(model_class) if model_class else None
+    if index is None:
+        return JsonResponse({'error': 'Modèle sans autocomplétion'}, status=404)
+    opts = model_class._meta
+    if not has_view_permission(request.user, model_class):
+        return JsonResponse({'error': 'Permission refusée'}, status=403)
+    
+    config = prefix_index.get_autocomplete_config()
+    try:
+        limit = min(int(request.GET.get('limit') or config['limit']), prefix_index.MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'error': 'Paramètre limit : entier attendu'}, status=400)
+    query = request.GET.get('q', '').strip()
+    results = index.lookup(query, limit) if query else []
+    return JsonResponse({
+        'model': opts.label_lower,
+        'field': index.field_name,
+        'results': [{'id': pk, 'text': text} for pk, text in results],
     })
@@ -0,0 +1,57 @@
+"""
+Exécution concurrente de travaux ORM indépendants (une connexion par thread)
+
+Les requêtes de l'ORM asynchrone de Django passent toutes par le même thread
+par requête HTTP : lancées avec asyncio.gather, elles restent exécutées l'une
+après l'autre. Pour que des agrégations indépendantes (un modèle, un groupe
+de graphiques...) s'exécutent vraiment en parallèle, chacune tourne dans un
+thread de travail avec sa propre connexion, refermée à la fin du travail.
+
+Les requêtes de ces connexions sont comptées dans les mesures de la requête
+HTTP qui a lancé le travail (instrumentation.py) : execute_wrapper ne couvre
+que les connexions du thread où il est installé.
+"""
+import asyncio
+from contextlib import ExitStack
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+from .instrumentation import current_metrics
+
+
+def close_connections_after(func):
+    """
+    Prépare func pour un thread de travail : ses requêtes sont comptées dans
+    les mesures de la requête HTTP en cours (lues ici, à l'appel de
+    close_connections_after : ThreadPoolExecutor ne transmet pas le contexte)
+    et les connexions du thread sont refermées après l'appel.
+    """
+    metrics = current_metrics()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            with ExitStack() as stack:
+                if metrics is not None:
+                    metrics.measure_connections(stack)
+                return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return wrapper
+
+
+async def gather_in_workers(func, items, limit):
+    """
+    Appelle func(item) pour chaque élément, au plus `limit` à la fois, chacun
+    dans un thread de travail. Retourne les résultats dans l'ordre de `items`.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    worker = sync_to_async(close_connections_after(func), thread_sensitive=False)
+
+    async def run(item):
+        async with semaphore:
+            return await worker(item)
+
+    return await asyncio.gather(*(run(item) for item in items))
@@ -0,0 +1,7 @@
+"""
+Benchmarks des chemins critiques d'admin_custom sur des données synthétiques
+
+Usage:
+    python -m benchmarks --scale 10k --output resultats.json
+    python -m benchmarks --scale 1m --compare resultats-v0.json --output resultats.json
+"""
@@ -0,0 +1,92 @@
+"""
+Point d'entrée : python -m benchmarks [options]
+
+    --scale 10k|100k|1m|10m|<n>   commandes à générer (défaut : 10k)
+    --output resultats.json       écrit les résultats en JSON
+    --compare ancien.json         affiche les écarts avec une exécution précédente
+    --only chart_data             ne mesure que les cas contenant ce texte (répétable)
+    --repeat 5                    mesures par cas
+    --workers 4                   processus de génération (PostgreSQL / MySQL)
+    --reseed                      vide la base de benchmark et la régénère
+    --rollups                     met à jour les tables d'agrégats avant les mesures
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n')[1])
+    parser.add_argument('--scale', default='10k', help='Nombre de commandes : 1k, 10k, 100k, 1m, 10m ou un entier')
+    parser.add_argument('--seed', type=int, default=42, help='Graine des données synthétiques')
+    parser.add_argument('--output', help='Fichier JSON des résultats')
+    parser.add_argument('--compare', help='Fichier JSON d\'une exécution précédente')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Seuil de régression en %% (défaut : 10)')
+    parser.add_argument('--only', action='append', help='Sous-chaîne du nom des cas à mesurer, répétable')
+    parser.add_argument('--repeat', type=int, default=5, help='Mesures par cas')
+    parser.add_argument('--workers', type=int, default=1, help='Processus de génération (hors SQLite)')
+    parser.add_argument('--reseed', action='store_true', help='Régénère les données même si la base est remplie')
+    parser.add_argument('--rollups', action='store_true', help='Met à jour les agrégats (rollup_metrics)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from admin_custom.models import RollupState
+    from sales.models import Order
+
+    from .runner import build_cases, compare, run
+    from .seed import parse_scale, row_counts, seed
+
+    try:
+        orders = parse_scale(args.scale)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    call_command('migrate', verbosity=0, interactive=False)
+    if args.reseed:
+        call_command('flush', verbosity=0, interactive=False)
+    existing = Order.objects.count()
+    if existing and existing != orders:
+        sys.exit(f'La base contient {existing} commandes (échelle demandée : {orders}). '
+                 'Utilisez --reseed ou une autre base (BENCH_DB_NAME).')
+    if not existing:
+        print(f'Génération de {orders} commandes...')
+        seed(orders, seed=args.seed, workers=args.workers, stdout=sys.stdout)
+    if args.rollups:
+        call_command('rollup_metrics', verbosity=0)
+
+    print(f'Mesures ({args.repeat} par cas) :')
+    document = run(build_cases(), repeat=args.repeat, only=args.only,
+                   rows=row_counts(), scale=args.scale, stdout=sys.stdout)
+    document['meta']['rollups'] = RollupState.objects.filter(is_ready=True).exists()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(document, output, indent=2, ensure_ascii=False, default=str)
+        print(f'✓ Résultats écrits dans {args.output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as previous_file:
+            previous = json.load(previous_file)
+        regressions = 0
+        print(f'Comparaison avec {args.compare} ({previous.get("meta", {}).get("revision")}) :')
+        for name, metric, old, new, change, regression in compare(previous, document, args.threshold):
+            regressions += regression
+            marker = '✗' if regression else ' '
+            print(f' {marker} {name:<32} {metric:<16} {old:>12} -> {new:<12} {change:+7.1f} %')
+        if regressions:
+            print(f'{regressions} régression(s) au-delà de {args.threshold} %')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Micro-benchmark de la colonne Actions des listes modernes : python -m benchmarks.rows
+
+Compare, par taille de page jusqu'à list_max_show_all, le coût par ligne de
+l'ancien rendu (reverse() et trois format_html à chaque ligne) et du fragment
+précompilé une fois par page (une substitution de chaîne par ligne). Sans
+base de données : les objets ne sont pas enregistrés.
+
+    --repeat 50           pages rendues par taille (médiane retenue)
+    --output lignes.json  écrit les résultats en JSON
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+
+def legacy_modern_actions(model_admin, obj):
+    """Rendu d'origine de ModernTemplateMixin.modern_actions (référence)."""
+    from django.urls import reverse
+    from django.utils.html import format_html
+
+    opts = model_admin.model._meta
+    change_url = reverse(
+        'admin:%s_%s_change' % (opts.app_label, opts.model_name),
+        args=[obj.pk],
+        current_app=model_admin.admin_site.name
+    )
+    view_link = format_html(
+        '<a href="{}" title="Voir" class="action-icon view-icon">'
+        '<i class="fa-solid fa-eye"></i></a>',
+        change_url
+    )
+    edit_link = format_html(
+        '<a href="{}" title="Modifier" class="action-icon edit-icon">'
+        '<i class="fa-solid fa-pen"></i></a>',
+        change_url
+    )
+    return format_html('<span class="modern-row-actions">{} {}</span>', view_link, edit_link)
+
+
+def precompiled_page(model_admin, objects):
+    """Rendu d'une page comme dans changelist_view : fragment précompilé, puis une ligne par objet."""
+    from admin_custom.modern_model_admin import _row_actions
+
+    token = _row_actions.set((model_admin, model_admin.modern_actions_html()))
+    try:
+        return [model_admin.modern_actions(obj) for obj in objects]
+    finally:
+        _row_actions.reset(token)
+
+
+def legacy_page(model_admin, objects):
+    return [legacy_modern_actions(model_admin, obj) for obj in objects]
+
+
+def _median_per_row_us(render, model_admin, objects, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(model_admin, objects)
+        durations.append(time.perf_counter() - start)
+    return round(statistics.median(durations) / len(objects) * 1e6, 3)
+
+
+def run(repeat=50, stdout=None):
+    """{taille de page: {before_us, after_us, speedup}} pour la liste des commandes."""
+    from django.urls import get_resolver
+
+    from admin_custom.admin_views import get_custom_admin_site
+    from sales.models import Order
+
+    get_resolver().url_patterns  # les admins sont enregistrés à l'import des URLs
+    model_admin = get_custom_admin_site()._registry[Order]
+    sizes = sorted({10, 50, 100, model_admin.list_per_page, model_admin.list_max_show_all})
+    results = {}
+    for size in sizes:
+        objects = [Order(pk=pk) for pk in range(1, size + 1)]
+        if legacy_page(model_admin, objects) != precompiled_page(model_admin, objects):
+            raise RuntimeError('Rendus différents entre l\'ancienne et la nouvelle colonne Actions')
+        before = _median_per_row_us(legacy_page, model_admin, objects, repeat)
+        after = _median_per_row_us(precompiled_page, model_admin, objects, repeat)
+        results[size] = {'before_us': before, 'after_us': after, 'speedup': round(before / after, 1)}
+        if stdout:
+            stdout.write(f'  {size:>5} lignes  {before:8.2f} µs/ligne -> {after:6.2f} µs/ligne  (x{before / after:.1f})\n')
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.rows', description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=50, help='Pages rendues par taille (défaut : 50)')
+    parser.add_argument('--output', help='Fichier JSON des résultats')
+    args = parser.parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+    import django
+    django.setup()
+
+    print('Colonne Actions, coût par ligne (avant -> après) :')
+    results = run(repeat=args.repeat, stdout=sys.stdout)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump({'modern_actions': results}, output, indent=2)
+        print(f'✓ Résultats écrits dans {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Cas de mesure et exécution : latence, nombre de requêtes SQL et pic mémoire
+
+Chaque cas est une requête GET passée par le client de test de Django
+(middlewares, vues et templates compris, sans serveur HTTP), avec le cache
+des APIs désactivé. Une exécution de chauffe précède les mesures.
+"""
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from admin_custom.aggregation import FREQUENCY_PERIODS, OPERATIONS
+from admin_custom.auth_views import INTERFACE_MODERN, SESSION_INTERFACE_KEY
+
+Case = namedtuple('Case', 'name url params')
+
+ADMIN_USERNAME = 'bench-admin'
+
+
+def build_cases():
+    """Tous les cas mesurés, dans un ordre stable (clé des comparaisons)."""
+    chart_url = reverse('admin_custom:chart_data')
+    grid_url = reverse('admin_custom:grid_data')
+    cases = [
+        Case(f'chart_data[{frequency},{operation}]', chart_url, {
+            'model': 'Order', 'field': 'total_amount', 'frequency': frequency, 'operation': operation,
+        })
+        for frequency in FREQUENCY_PERIODS
+        for operation in OPERATIONS
+    ]
+    columns = ['order_number', 'user', 'status', 'total_amount', 'created_at']
+    cases += [
+        Case('grid_data[first_page]', grid_url, {
+            'model': 'Order', 'columns': columns, 'sort': '-created_at', 'page_size': 50,
+        }),
+        Case('grid_data[filtered]', grid_url, {
+            'model': 'Order', 'columns': columns, 'sort': 'total_amount', 'page_size': 50,
+            'filter__status': 'delivered', 'filter__total_amount__gte': 100,
+        }),
+        Case('stats_data', reverse('admin_custom:stats_data'), {}),
+        Case('model_fields', reverse('admin_custom:model_fields'), {'model': 'Order'}),
+        Case('modern_dashboard', reverse('admin:modern_dashboard'), {}),
+        Case('changelist[order]', reverse('admin:sales_order_changelist'), {}),
+        Case('changelist[order,filtered]', reverse('admin:sales_order_changelist'), {
+            'status__exact': 'delivered', 'q': 'CMD-00000', 'o': '-4',
+        }),
+        Case('changelist[payment]', reverse('admin:sales_payment_changelist'), {}),
+    ]
+    return cases
+
+
+def admin_client():
+    """Client connecté en superutilisateur, interface moderne."""
+    user = User.objects.filter(username=ADMIN_USERNAME).first()
+    if user is None:
+        user = User.objects.create_superuser(ADMIN_USERNAME, 'bench-admin@example.com', 'bench')
+    client = Client()
+    client.force_login(user)
+    session = client.session
+    session[SESSION_INTERFACE_KEY] = INTERFACE_MODERN
+    session.save()
+    return client
+
+
+def _percentile(sorted_values, percent):
+    index = max(0, int(round(len(sorted_values) * percent / 100)) - 1)
+    return sorted_values[index]
+
+
+def measure(client, case, repeat=5):
+    """Mesure un cas : latences (ms), requêtes SQL et pic mémoire (Kio)."""
+    response = client.get(case.url, case.params)
+    if response.status_code != 200:
+        raise RuntimeError(f'{case.name} : HTTP {response.status_code}')
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(case.url, case.params)
+        durations.append((time.perf_counter() - start) * 1000)
+
+    # Requêtes et mémoire sur une exécution séparée (tracemalloc ralentit tout)
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(case.url, case.params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    durations.sort()
+    return {
+        'url': case.url,
+        'params': case.params,
+        'repeat': repeat,
+        'median_ms': round(statistics.median(durations), 3),
+        'p95_ms': round(_percentile(durations, 95), 3),
+        'min_ms': round(durations[0], 3),
+        'queries': len(queries),
+        'peak_memory_kib': round(peak / 1024, 1),
+        'response_bytes': len(response.content),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases, repeat=5, only=None, rows=None, scale=None, stdout=None):
+    """Exécute les cas (filtrés par sous-chaîne `only`) et retourne le document JSON."""
+    client = admin_client()
+    results = {}
+    for case in cases:
+        if only and not any(pattern in case.name for pattern in only):
+            continue
+        results[case.name] = measure(client, case, repeat)
+        if stdout:
+            result = results[case.name]
+            stdout.write(
+                f'  {case.name:<32} {result["median_ms"]:9.2f} ms  p95 {result["p95_ms"]:9.2f} ms  '
+                f'{result["queries"]:3d} req.  {result["peak_memory_kib"]:9.1f} Kio\n'
+            )
+            stdout.flush()
+
+    return {
+        'meta': {
+            'scale': scale,
+            'rows': rows,
+            'vendor': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'revision': git_revision(),
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+
+
+def compare(previous, current, threshold=10.0):
+    """
+    Compare deux documents de résultats. Retourne [(cas, métrique, avant, après,
+    écart %, régression)] pour la latence médiane, les requêtes et la mémoire ;
+    une régression est un écart supérieur à `threshold` % (ou une requête de plus).
+    """
+    rows = []
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        if not before:
+            continue
+        for metric in ('median_ms', 'queries', 'peak_memory_kib'):
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = ((new - old) / old * 100) if old else (0.0 if new == old else float('inf'))
+            regression = new > old if metric == 'queries' else change > threshold
+            rows.append((name, metric, old, new, change, regression))
+    return rows
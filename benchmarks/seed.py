@@ -0,0 +1,51 @@
+"""
+Données synthétiques des benchmarks : échelles nommées et génération
+
+La génération elle-même est celle de la commande generate_data
+(sales.synthetic) : même graine, mêmes données.
+"""
+from django.contrib.auth.models import User
+
+from catalog.models import Category, Product
+from sales import synthetic
+from sales.models import Invoice, Order, OrderItem, Payment
+
+SCALES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+
+def parse_scale(value):
+    """'10k', '1m' ou un entier -> nombre de commandes"""
+    value = str(value).lower()
+    if value in SCALES:
+        return SCALES[value]
+    try:
+        count = int(value.replace('_', ''))
+    except ValueError:
+        raise ValueError(f'Échelle inconnue : {value} (choix : {", ".join(SCALES)} ou un entier)')
+    if count < 1:
+        raise ValueError('L\'échelle doit être positive')
+    return count
+
+
+def seed(orders, seed=42, workers=1, stdout=None):
+    """Génère `orders` commandes et retourne le nombre de lignes par modèle."""
+    def progress(done, total):
+        if stdout:
+            stdout.write(f'  {done}/{total} commandes\n')
+            stdout.flush()
+
+    synthetic.generate(orders, seed=seed, workers=workers, progress=progress)
+    return row_counts()
+
+
+def row_counts():
+    return {
+        model.__name__: model.objects.count()
+        for model in (User, Category, Product, Order, OrderItem, Invoice, Payment)
+    }
@@ -0,0 +1,29 @@
+"""
+Settings des benchmarks : ceux du sandbox, sur une base dédiée
+
+La base est choisie par variables d'environnement (défaut : SQLite bench.sqlite3) :
+
+    BENCH_DB_ENGINE=django.db.backends.postgresql BENCH_DB_NAME=bench \
+    BENCH_DB_USER=... BENCH_DB_PASSWORD=... BENCH_DB_HOST=localhost python -m benchmarks
+"""
+import os
+
+from sandbox.settings import *  # noqa: F401,F403
+from sandbox.settings import ADMIN_CUSTOM, BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': os.environ.get('BENCH_DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ.get('BENCH_DB_NAME', str(BASE_DIR / 'bench.sqlite3')),
+        'USER': os.environ.get('BENCH_DB_USER', ''),
+        'PASSWORD': os.environ.get('BENCH_DB_PASSWORD', ''),
+        'HOST': os.environ.get('BENCH_DB_HOST', ''),
+        'PORT': os.environ.get('BENCH_DB_PORT', ''),
+    }
+}
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+# Mesurer le calcul des réponses, pas le cache
+ADMIN_CUSTOM = {**ADMIN_CUSTOM, 'CACHE': {'ENABLED': False}}
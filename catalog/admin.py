@@ -1,4 +1,5 @@
 from django.contrib import admin
+from admin_custom.modern_model_admin import ModernTemplateMixin
 from .models import Category, Product
 
 # ÉTAPE 1 : La table des enfants (Produits)
@@ -11,7 +12,7 @@ class ProductInline(admin.TabularInline): # <--- "Ça doit fonctionner en tables
 
 # ÉTAPE 2 : La page du Parent (Catégorie)
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(ModernTemplateMixin, admin.ModelAdmin):
     # 1er qu'on voit : les champs principaux de la catégorie
     list_display = ['name', 'slug', 'parent', 'is_active', 'created_at']
     search_fields = ['name', 'slug', 'description']
@@ -24,7 +25,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ModernTemplateMixin, admin.ModelAdmin):
     list_display = ['name', 'sku', 'category', 'price', 'stock_quantity', 'is_active', 'is_featured', 'created_at']
     search_fields = ['name', 'sku', 'description', 'short_description']
     list_filter = ['category', 'is_active', 'is_featured', 'created_at']
@@ -24,6 +24,11 @@ class Category(models.Model):
         verbose_name = "Catégorie"
         verbose_name_plural = "Catégories"
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['is_active', 'name'], name='catalog_cat_is_acti_09f4ba_idx'),
+            models.Index(fields=['parent', 'name'], name='catalog_cat_parent__e8ed68_idx'),
+            models.Index(fields=['created_at'], name='catalog_cat_created_ab7416_idx'),
+        ]
 
 
 class Product(models.Model):
@@ -50,3 +55,9 @@ class Product(models.Model):
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='catalog_pro_created_92b554_idx'),
+            models.Index(fields=['category', 'created_at'], name='catalog_pro_categor_9950d8_idx'),
+            models.Index(fields=['is_active', 'created_at'], name='catalog_pro_is_acti_00391f_idx'),
+            models.Index(fields=['is_featured', 'created_at'], name='catalog_pro_is_feat_3f7659_idx'),
+        ]
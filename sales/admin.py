@@ -1,15 +1,15 @@
 from django.contrib import admin
-from admin_custom.modern_model_admin import ModernTemplateMixin
+from admin_custom.modern_model_admin import ModernInlineMixin, ModernTemplateMixin
 from .models import Order, OrderItem, Invoice, Payment
 
 
-class OrderItemInline(admin.TabularInline):
+class OrderItemInline(ModernInlineMixin, admin.TabularInline):
     model = OrderItem
     extra = 1
     readonly_fields = ['created_at']
 
 
-class InvoiceInline(admin.StackedInline):
+class InvoiceInline(ModernInlineMixin, admin.StackedInline):
     model = Invoice
     extra = 0
     readonly_fields = ['created_at', 'updated_at']
@@ -37,7 +37,7 @@ class OrderItemAdmin(ModernTemplateMixin, admin.ModelAdmin):
     readonly_fields = ['created_at']
 
 
-class PaymentInline(admin.TabularInline):
+class PaymentInline(ModernInlineMixin, admin.TabularInline):
     model = Payment
     extra = 0
     readonly_fields = ['created_at', 'updated_at']
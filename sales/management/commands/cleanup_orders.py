@@ -1,13 +1,23 @@
 """
 Commande pour nettoyer la base de données en supprimant des commandes
 tout en gardant une variété de dates pour les graphiques
+Usage:
+    python manage.py cleanup_orders --keep 50 --dry-run     # lignes supprimées par table
+    python manage.py cleanup_orders --keep 5000 --force
+    python manage.py cleanup_orders --keep 100000 --chunk-size 500 --pause 0.1
+
+La sélection est faite en SQL et la suppression avance par lots de commandes
+consécutives, une courte transaction par lot (voir sales/retention.py).
 """
-from django.core.management.base import BaseCommand
-from django.db.models import Count
-from django.utils import timezone
-from datetime import timedelta
-from sales.models import Order, OrderItem, Invoice, Payment
-import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_custom.cache import result_cache
+from admin_custom.rollups import rebuild_ready_rollups
+from admin_custom.search import rebuild_ready_indexes
+from sales import retention
+from sales.models import Order
 
 
 class Command(BaseCommand):
@@ -25,79 +35,80 @@ class Command(BaseCommand):
             action='store_true',
             help='Forcer la suppression sans confirmation',
         )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Affiche le nombre de lignes supprimées par table sans rien supprimer',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=retention.DEFAULT_CHUNK_SIZE,
+            help=f'Commandes supprimées par transaction (défaut: {retention.DEFAULT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Secondes d\'attente entre deux lots (défaut: 0)',
+        )
 
     def handle(self, *args, **options):
         keep_count = options['keep']
-        force = options['force']
-        
+        if keep_count < 0 or options['chunk_size'] < 1:
+            raise CommandError('--keep doit être positif et --chunk-size au moins 1')
+
         total_orders = Order.objects.count()
-        
         if total_orders <= keep_count:
             self.stdout.write(self.style.SUCCESS(f'Il n\'y a que {total_orders} commandes, aucune suppression nécessaire.'))
             return
-        
-        if not force:
-            self.stdout.write(self.style.WARNING(f'Il y a actuellement {total_orders} commandes.'))
-            self.stdout.write(self.style.WARNING(f'Cette commande va supprimer {total_orders - keep_count} commandes.'))
-            self.stdout.write(self.style.WARNING(f'Seules {keep_count} commandes seront conservées.'))
-            confirm = input('Continuer? (oui/non): ')
-            if confirm.lower() not in ['oui', 'o', 'yes', 'y']:
-                self.stdout.write(self.style.ERROR('Opération annulée.'))
+
+        with retention.keep_table() as table:
+            kept = retention.select_keepers(table, keep_count)
+
+            if options['dry_run']:
+                self.stdout.write(f'{kept} commandes conservées sur {total_orders}. Lignes à supprimer :')
+                for label, count in retention.count_doomed(table).items():
+                    self.stdout.write(f'  {label:<20} {count}')
                 return
-        
-        self.stdout.write(self.style.SUCCESS('Nettoyage de la base de données...'))
-        
-        # Calculer les périodes à garder (pour varier les dates)
-        now = timezone.now()
-        periods = [
-            (now - timedelta(days=30), now),  # Dernier mois
-            (now - timedelta(days=60), now - timedelta(days=30)),  # Mois précédent
-            (now - timedelta(days=90), now - timedelta(days=60)),  # Il y a 2 mois
-            (now - timedelta(days=120), now - timedelta(days=90)),  # Il y a 3 mois
-            (now - timedelta(days=180), now - timedelta(days=120)),  # Il y a 4-6 mois
-        ]
-        
-        orders_to_keep = []
-        orders_per_period = keep_count // len(periods)
-        remaining = keep_count % len(periods)
-        
-        # Sélectionner des commandes de chaque période
-        for i, (start_date, end_date) in enumerate(periods):
-            count = orders_per_period + (1 if i < remaining else 0)
-            
-            period_orders = Order.objects.filter(
-                created_at__gte=start_date,
-                created_at__lt=end_date
-            ).order_by('created_at')
-            
-            if period_orders.count() > count:
-                # Sélectionner aléatoirement mais en gardant une distribution
-                selected = random.sample(list(period_orders), count)
-                orders_to_keep.extend([o.id for o in selected])
-            else:
-                orders_to_keep.extend([o.id for o in period_orders])
-        
-        # Si on n'a pas assez, compléter avec les plus récentes
-        if len(orders_to_keep) < keep_count:
-            additional = Order.objects.exclude(id__in=orders_to_keep).order_by('-created_at')[:keep_count - len(orders_to_keep)]
-            orders_to_keep.extend([o.id for o in additional])
-        
-        # Supprimer les commandes non sélectionnées
-        orders_to_delete = Order.objects.exclude(id__in=orders_to_keep)
-        deleted_count = orders_to_delete.count()
-        
-        # Supprimer les Invoices associées (OrderItems et Payments en cascade)
-        invoice_ids = [inv.id for inv in Invoice.objects.filter(order__in=orders_to_delete)]
-        Payment.objects.filter(invoice_id__in=invoice_ids).delete()
-        Invoice.objects.filter(order__in=orders_to_delete).delete()
-        
-        # Supprimer les commandes (OrderItems en cascade)
-        orders_to_delete.delete()
-        
-        self.stdout.write(self.style.SUCCESS(f'\n✓ {deleted_count} commandes supprimées'))
-        self.stdout.write(self.style.SUCCESS(f'✓ {len(orders_to_keep)} commandes conservées'))
-        self.stdout.write(self.style.SUCCESS(f'✓ Dates variées conservées pour les graphiques'))
-        
+
+            if not options['force']:
+                self.stdout.write(self.style.WARNING(f'Il y a actuellement {total_orders} commandes.'))
+                self.stdout.write(self.style.WARNING(f'Cette commande va supprimer {total_orders - kept} commandes.'))
+                self.stdout.write(self.style.WARNING(f'Seules {kept} commandes seront conservées.'))
+                confirm = input('Continuer? (oui/non): ')
+                if confirm.lower() not in ['oui', 'o', 'yes', 'y']:
+                    self.stdout.write(self.style.ERROR('Opération annulée.'))
+                    return
+
+            self.stdout.write(self.style.SUCCESS('Nettoyage de la base de données...'))
+            started = time.perf_counter()
+            reported = [0.0]
+
+            def progress(done, total):
+                now = time.perf_counter()
+                if done == total or now - reported[0] >= 2:
+                    reported[0] = now
+                    self.stdout.write(f'  {done}/{total} commandes supprimées ({done / (now - started):,.0f}/s)')
+
+            deleted = retention.delete_in_chunks(
+                table, chunk_size=options['chunk_size'], pause=options['pause'], progress=progress,
+            )
+
+        paths, _ = retention.cascade_paths(Order)
+        models = [model for model, _ in paths]
+        for model in models:
+            result_cache.bump(model)
+        for model, days in rebuild_ready_rollups(models).items():
+            self.stdout.write(self.style.SUCCESS(f'✓ Rollups {model._meta.label} : {days} jour(s)'))
+        for model, count in rebuild_ready_indexes(models).items():
+            self.stdout.write(self.style.SUCCESS(f'✓ Index de recherche {model._meta.label} : {count} objet(s)'))
+
+        for label, count in deleted.items():
+            self.stdout.write(self.style.SUCCESS(f'✓ {label} : {count} lignes supprimées'))
+        self.stdout.write(self.style.SUCCESS(f'✓ {kept} commandes conservées'))
+        self.stdout.write(self.style.SUCCESS('✓ Dates variées conservées pour les graphiques'))
+
         # Statistiques finales
         final_count = Order.objects.count()
         self.stdout.write(self.style.SUCCESS(f'\nTotal final: {final_count} commandes'))
@@ -0,0 +1,76 @@
+"""
+Commande pour générer des données synthétiques en masse (bulk_create par lots)
+Usage:
+    python manage.py generate_data --orders 100000
+    python manage.py generate_data --orders 1000000 --users 50000 --products 5000 --seed 7
+    python manage.py generate_data --orders 10000000 --workers 4   # PostgreSQL / MySQL
+
+Les dates couvrent les --days derniers jours (saisonnalité, croissance).
+Les données ajoutées ne passent pas par les signaux : le cache des APIs est
+invalidé, les rollups et index de recherche actifs sont reconstruits à la fin.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from admin_custom.cache import result_cache
+from admin_custom.rollups import rebuild_ready_rollups
+from admin_custom.search import rebuild_ready_indexes
+from sales import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Génère des commandes, factures et paiements synthétiques en masse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000, help='Nombre de commandes (défaut: 10000)')
+        parser.add_argument('--users', type=int, help='Nombre de clients (défaut: commandes / 20)')
+        parser.add_argument('--products', type=int, help='Nombre de produits (défaut: commandes / 100)')
+        parser.add_argument('--days', type=int, default=730, help='Période couverte en jours (défaut: 730)')
+        parser.add_argument('--seed', type=int, default=42, help='Graine des tirages (défaut: 42)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processus parallèles pour les commandes (défaut: 1 ; ignoré sous SQLite)',
+        )
+
+    def handle(self, *args, **options):
+        orders = options['orders']
+        workers = options['workers']
+        if orders < 1 or options['days'] < 1 or workers < 1:
+            raise CommandError('--orders, --days et --workers doivent être positifs')
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite n\'accepte qu\'un écrivain à la fois : --workers ignoré'))
+            workers = 1
+        if synthetic.numpy is None:
+            self.stdout.write(self.style.WARNING('NumPy absent : tirages avec le module random (plus lent)'))
+
+        started = time.perf_counter()
+
+        def progress(done, total):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'  {done}/{total} commandes ({done / elapsed:,.0f}/s)')
+
+        created = synthetic.generate(
+            orders,
+            users=options['users'],
+            products=options['products'],
+            seed=options['seed'],
+            days=options['days'],
+            workers=workers,
+            progress=progress,
+        )
+
+        for model in synthetic.GENERATED_MODELS:
+            result_cache.bump(model)
+        for model, days in rebuild_ready_rollups(synthetic.GENERATED_MODELS).items():
+            self.stdout.write(self.style.SUCCESS(f'✓ Rollups {model._meta.label} : {days} jour(s)'))
+        for model, count in rebuild_ready_indexes(synthetic.GENERATED_MODELS).items():
+            self.stdout.write(self.style.SUCCESS(f'✓ Index de recherche {model._meta.label} : {count} objet(s)'))
+
+        for name, count in created.items():
+            self.stdout.write(self.style.SUCCESS(f'✓ {count} {name}'))
+        self.stdout.write(self.style.SUCCESS(f'✓ Terminé en {time.perf_counter() - started:.1f} s'))
+
@@ -32,6 +32,11 @@ class Order(models.Model):
         verbose_name = "Commande"
         verbose_name_plural = "Commandes"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='sales_order_created_8a4d37_idx'),
+            models.Index(fields=['status', 'created_at'], name='sales_order_status_5a79ce_idx'),
+            models.Index(fields=['shipping_country', 'created_at'], name='sales_order_shippin_cdf3e7_idx'),
+        ]
 
 
 class OrderItem(models.Model):
@@ -49,6 +54,9 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = "Article de commande"
         verbose_name_plural = "Articles de commande"
+        indexes = [
+            models.Index(fields=['created_at'], name='sales_order_created_6321b1_idx'),
+        ]
 
 
 class Invoice(models.Model):
@@ -79,6 +87,12 @@ class Invoice(models.Model):
         verbose_name = "Facture"
         verbose_name_plural = "Factures"
         ordering = ['-issued_date']
+        indexes = [
+            models.Index(fields=['issued_date'], name='sales_invoi_issued__4dd69e_idx'),
+            models.Index(fields=['status', 'issued_date'], name='sales_invoi_status_b08a0e_idx'),
+            models.Index(fields=['due_date'], name='sales_invoi_due_dat_a262a4_idx'),
+            models.Index(fields=['created_at'], name='sales_invoi_created_a99f6a_idx'),
+        ]
 
 
 class Payment(models.Model):
@@ -116,3 +130,9 @@ class Payment(models.Model):
         verbose_name = "Paiement"
         verbose_name_plural = "Paiements"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='sales_payme_created_0df64f_idx'),
+            models.Index(fields=['method', 'created_at'], name='sales_payme_method_2c731e_idx'),
+            models.Index(fields=['status', 'created_at'], name='sales_payme_status_c85029_idx'),
+            models.Index(fields=['payment_date'], name='sales_payme_payment_05f128_idx'),
+        ]
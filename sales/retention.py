@@ -0,0 +1,197 @@
+"""
+Rétention des commandes : sélection et suppression ensemblistes, par lots
+
+La sélection des commandes conservées est faite en SQL (numérotation
+aléatoire par période avec une fonction de fenêtre) et matérialisée dans
+une table temporaire ; aucune liste d'identifiants ne transite par Python.
+Les suppressions avancent ensuite par plages d'identifiants de commandes,
+une courte transaction par lot : les tables dépendantes (articles, factures,
+paiements) sont vidées avant les commandes, avec des DELETE directs
+(_raw_delete) quand toutes les relations sont en CASCADE, sinon par le
+Collector de Django, lot par lot.
+
+Les DELETE directs n'émettent pas les signaux pre/post_delete : le cache des
+APIs et les rollups sont remis à jour une fois la suppression terminée.
+"""
+import time as time_module
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import CASCADE, Case, F, IntegerField, Q, Value, When, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Random, RowNumber
+from django.utils import timezone
+
+from .models import Order
+
+KEEP_TABLE = 'sales_retention_keep'
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def retention_periods(now=None):
+    """Périodes dans lesquelles les commandes conservées sont réparties (les plus récentes d'abord)."""
+    now = now or timezone.now()
+    bounds = [0, 30, 60, 90, 120, 180]
+    return [
+        (now - timedelta(days=older), now - timedelta(days=newer))
+        for newer, older in zip(bounds, bounds[1:])
+    ]
+
+
+@contextmanager
+def keep_table():
+    """Table temporaire (propre à la connexion) des identifiants de commandes conservées."""
+    table = connection.ops.quote_name(KEEP_TABLE)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        cursor.execute(f'CREATE TEMPORARY TABLE {table} (id bigint PRIMARY KEY)')
+    try:
+        yield table
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+def kept_ids(table):
+    """Sous-requête des identifiants conservés, utilisable dans un filtre __in."""
+    return RawSQL(f'SELECT id FROM {table}', [])
+
+
+def _insert_ids(table, queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {table} (id) {sql}', params)
+
+
+def select_keepers(table, keep_count, periods=None):
+    """
+    Remplit `table` avec `keep_count` commandes : réparties au hasard entre les
+    périodes, puis complétées par les plus récentes si une période est trop
+    pauvre. Retourne le nombre de commandes conservées.
+    """
+    periods = periods or retention_periods()
+    per_period, remaining = divmod(keep_count, len(periods))
+    quotas = [per_period + (1 if index < remaining else 0) for index in range(len(periods))]
+
+    sampled = (
+        Order.objects
+        .filter(created_at__gte=periods[-1][0], created_at__lt=periods[0][1])
+        .annotate(bucket=Case(
+            *[When(created_at__gte=start, created_at__lt=end, then=Value(index))
+              for index, (start, end) in enumerate(periods)],
+            output_field=IntegerField(),
+        ))
+        .annotate(
+            quota=Case(
+                *[When(bucket=index, then=Value(quota)) for index, quota in enumerate(quotas)],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            rank=Window(RowNumber(), partition_by=F('bucket'), order_by=Random()),
+        )
+        .filter(rank__lte=F('quota'))
+        .order_by()
+        .values('id')
+    )
+    _insert_ids(table, sampled)
+
+    kept = _count(table)
+    if kept < keep_count:
+        _insert_ids(table, (
+            Order.objects.exclude(id__in=kept_ids(table))
+            .order_by('-created_at').values('id')[:keep_count - kept]
+        ))
+        kept = _count(table)
+    return kept
+
+
+def _count(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        return cursor.fetchone()[0]
+
+
+def cascade_paths(model, path='pk', seen=None):
+    """
+    Modèles supprimés avec `model` : [(modèle, chemin vers la clé de `model`)],
+    dépendants d'abord, `model` en dernier ; et un booléen vrai si toutes les
+    relations sont en CASCADE (DELETE directs possibles, dans cet ordre).
+    """
+    seen = (seen or set()) | {model}
+    paths, raw = [], True
+    for relation in model._meta.related_objects:
+        if relation.many_to_many or relation.related_model in seen:
+            raw = False
+            continue
+        if relation.on_delete is not CASCADE:
+            raw = False
+            continue
+        child_paths, child_raw = cascade_paths(
+            relation.related_model, f'{relation.field.name}__{path}', seen,
+        )
+        paths.extend(child_paths)
+        raw = raw and child_raw
+    paths.append((model, path))
+    return paths, raw
+
+
+def _doomed(path, table):
+    """Lignes dont la commande n'est pas conservée."""
+    return ~Q(**{f'{path}__in': kept_ids(table)})
+
+
+def count_doomed(table):
+    """Lignes à supprimer par modèle : {label: nombre}"""
+    paths, _ = cascade_paths(Order)
+    return {
+        model._meta.label: model._base_manager.filter(_doomed(path, table)).count()
+        for model, path in paths
+    }
+
+
+def delete_in_chunks(table, chunk_size=DEFAULT_CHUNK_SIZE, pause=0, progress=None):
+    """
+    Supprime les commandes non conservées (et leurs dépendants) par lots de
+    `chunk_size` commandes consécutives, une transaction par lot.
+
+    Args:
+        pause: Secondes d'attente entre deux lots (réplication, autres écritures)
+        progress: Appelé avec (commandes supprimées, total) après chaque lot
+
+    Returns:
+        {label: lignes supprimées}
+    """
+    paths, raw = cascade_paths(Order)
+    doomed_orders = Order._base_manager.filter(_doomed('pk', table)).order_by('pk')
+    total = doomed_orders.count()
+    deleted = {model._meta.label: 0 for model, _ in paths}
+    done = 0
+    last_id = None
+
+    while True:
+        chunk = doomed_orders if last_id is None else doomed_orders.filter(pk__gt=last_id)
+        bounds = list(chunk.values_list('pk', flat=True)[:chunk_size])
+        if not bounds:
+            break
+        low, high = bounds[0], bounds[-1]
+
+        with transaction.atomic():
+            if raw:
+                for model, path in paths:
+                    rows = model._base_manager.filter(
+                        Q(**{f'{path}__gte': low, f'{path}__lte': high}), _doomed(path, table),
+                    )
+                    deleted[model._meta.label] += rows._raw_delete(rows.db)
+            else:
+                _, counts = doomed_orders.filter(pk__gte=low, pk__lte=high).delete()
+                for label, count in counts.items():
+                    deleted[label] = deleted.get(label, 0) + count
+
+        done += len(bounds)
+        last_id = high
+        if progress:
+            progress(done, total)
+        if pause:
+            time_module.sleep(pause)
+    return deleted
@@ -0,0 +1,418 @@
+"""
+Génération de données synthétiques en masse (catalog + sales)
+
+Les lignes sont construites colonne par colonne à partir de distributions
+(saisonnalité mensuelle et hebdomadaire, croissance, répartition des
+statuts et des moyens de paiement) puis insérées avec bulk_create par lots.
+Les clés primaires sont attribuées à l'avance : les commandes sont découpées
+en partitions indépendantes, générables en parallèle par plusieurs
+processus, chacune avec sa propre graine dérivée de la graine globale
+(mêmes données quel que soit le nombre de processus).
+
+NumPy est utilisé s'il est installé (pip install numpy), sinon le module
+random de la bibliothèque standard (plus lent, autres tirages).
+"""
+import math
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from catalog.models import Category, Product
+from .models import Invoice, Order, OrderItem, Payment
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BATCH_SIZE = 5000
+PARTITION_SIZE = 50000
+DEFAULT_PASSWORD = 'password123'
+
+# Poids relatifs des mois (janvier = index 0) et des jours (lundi = 0)
+MONTH_WEIGHTS = [0.8, 0.75, 0.9, 0.95, 1.0, 0.95, 0.85, 0.8, 1.0, 1.05, 1.3, 1.6]
+WEEKDAY_WEIGHTS = [1.0, 1.05, 1.05, 1.1, 1.2, 0.9, 0.7]
+HOUR_WEIGHTS = [0.2, 0.1, 0.1, 0.1, 0.1, 0.2, 0.4, 0.7, 1.0, 1.2, 1.3, 1.4,
+                1.5, 1.4, 1.3, 1.3, 1.3, 1.4, 1.6, 1.8, 1.7, 1.3, 0.8, 0.4]
+
+ORDER_STATUSES = {'delivered': 55, 'shipped': 12, 'processing': 10, 'pending': 13, 'cancelled': 10}
+INVOICE_STATUSES = {'paid': 70, 'sent': 20, 'draft': 5, 'cancelled': 5}
+PAYMENT_METHODS = {'credit_card': 45, 'paypal': 20, 'bank_transfer': 20, 'check': 10, 'cash': 5}
+PAYMENT_STATUSES = {'completed': 80, 'pending': 7, 'processing': 4, 'failed': 6, 'refunded': 3}
+ITEMS_PER_ORDER = {1: 45, 2: 30, 3: 15, 4: 10}
+
+LOCATIONS = [
+    ('Paris', '75001', 'France'), ('Lyon', '69001', 'France'), ('Marseille', '13001', 'France'),
+    ('Toulouse', '31000', 'France'), ('Bruxelles', '1000', 'Belgique'), ('Genève', '1201', 'Suisse'),
+    ('Montréal', 'H2X 1Y4', 'Canada'), ('Dakar', '10200', 'Sénégal'), ('Abidjan', '01', 'Côte d\'Ivoire'),
+    ('Casablanca', '20000', 'Maroc'),
+]
+LOCATION_WEIGHTS = [30, 12, 10, 8, 8, 6, 8, 8, 5, 5]
+
+CATEGORIES = [
+    ('Électronique', 'electronique'), ('Vêtements', 'vetements'), ('Maison & Jardin', 'maison-jardin'),
+    ('Sports & Loisirs', 'sports-loisirs'), ('Livres', 'livres'), ('Informatique', 'informatique'),
+    ('Cuisine', 'cuisine'), ('Beauté & Santé', 'beaute-sante'),
+]
+
+GENERATED_MODELS = (User, UserProfile, Category, Product, Order, OrderItem, Invoice, Payment)
+
+Plan = namedtuple('Plan', 'seed start days count first_order first_item first_invoice first_payment '
+                          'user_ids product_ids product_prices')
+
+
+# ---------------------------------------------------------------------------
+# Tirages aléatoires (NumPy ou bibliothèque standard)
+# ---------------------------------------------------------------------------
+
+class PythonSampler:
+    """Tirages avec random.Random ; mêmes méthodes que NumpySampler."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def choice(self, options, size, weights=None):
+        cumulative = list(accumulate(weights)) if weights else None
+        return self.rng.choices(options, cum_weights=cumulative, k=size)
+
+    def integers(self, low, high, size):
+        """Entiers dans [low, high["""
+        return [self.rng.randrange(low, high) for _ in range(size)]
+
+    def random(self, size):
+        return [self.rng.random() for _ in range(size)]
+
+    def lognormal(self, mean, sigma, size):
+        return [self.rng.lognormvariate(mean, sigma) for _ in range(size)]
+
+
+class NumpySampler:
+    """Tirages vectorisés avec numpy.random.Generator ; renvoie des listes Python."""
+
+    def __init__(self, seed):
+        self.rng = numpy.random.default_rng(seed)
+
+    def choice(self, options, size, weights=None):
+        probabilities = None
+        if weights:
+            probabilities = numpy.asarray(weights, dtype=float)
+            probabilities /= probabilities.sum()
+        indexes = self.rng.choice(len(options), size=size, p=probabilities)
+        return [options[index] for index in indexes.tolist()]
+
+    def integers(self, low, high, size):
+        return self.rng.integers(low, high, size=size).tolist()
+
+    def random(self, size):
+        return self.rng.random(size).tolist()
+
+    def lognormal(self, mean, sigma, size):
+        return self.rng.lognormal(mean, sigma, size).tolist()
+
+
+def make_sampler(*seed):
+    """Sampler déterministe pour une graine composée (graine globale, table, partition)."""
+    if numpy is not None:
+        return NumpySampler(list(seed))
+    return PythonSampler(':'.join(str(part) for part in seed))
+
+
+# ---------------------------------------------------------------------------
+# Outils
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Désactive auto_now/auto_now_add le temps du chargement (dates imposées)."""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def reset_sequences(models):
+    """Recale les séquences d'auto-incrément après des insertions à clé explicite."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def _cents(value):
+    return Decimal(value) / 100
+
+
+def day_weights(start, days):
+    """Poids de chaque jour : saisonnalité mensuelle et hebdomadaire, croissance linéaire."""
+    weights = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        growth = 0.6 + 0.8 * offset / max(1, days - 1)
+        weights.append(MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] * growth)
+    return weights
+
+
+def sample_datetimes(sampler, start, days, size):
+    """`size` horodatages (UTC) répartis selon day_weights() et HOUR_WEIGHTS."""
+    offsets = sampler.choice(range(days), size, day_weights(start, days))
+    hours = sampler.choice(range(24), size, HOUR_WEIGHTS)
+    seconds = sampler.integers(0, 3600, size)
+    origin = datetime(start.year, start.month, start.day, tzinfo=dt_timezone.utc)
+    return [
+        origin + timedelta(days=offset, seconds=hour * 3600 + second)
+        for offset, hour, second in zip(offsets, hours, seconds)
+    ]
+
+
+def sample_prices(sampler, size):
+    """Prix en centimes, log-normaux (médiane ~ 40, queue vers quelques milliers)."""
+    return [max(199, int(value * 100)) for value in sampler.lognormal(math.log(40), 0.9, size)]
+
+
+# ---------------------------------------------------------------------------
+# Référentiels : utilisateurs, catégories, produits
+# ---------------------------------------------------------------------------
+
+def create_users(count, seed, start, days, password=DEFAULT_PASSWORD):
+    """Utilisateurs et profils ; un seul hachage de mot de passe pour tous."""
+    sampler = make_sampler(seed, 1)
+    first = next_id(User)
+    encoded = make_password(password)
+    joined = sample_datetimes(sampler, start, days, count)
+    locations = sampler.choice(LOCATIONS, count, LOCATION_WEIGHTS)
+    premium = sampler.random(count)
+
+    users, profiles = [], []
+    for index in range(count):
+        user_id = first + index
+        city, postal_code, country = locations[index]
+        users.append(User(
+            id=user_id, username=f'client{user_id}', email=f'client{user_id}@example.com',
+            password=encoded, first_name='Client', last_name=str(user_id), date_joined=joined[index],
+        ))
+        profiles.append(UserProfile(
+            user_id=user_id, city=city, postal_code=postal_code, country=country,
+            is_premium=premium[index] < 0.15, newsletter_subscribed=premium[index] < 0.4,
+            created_at=joined[index], updated_at=joined[index],
+        ))
+    User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    UserProfile.objects.bulk_create(profiles, batch_size=BATCH_SIZE)
+    return list(range(first, first + count))
+
+
+def ensure_categories():
+    """Catégories existantes, ou celles de populate_data si la table est vide."""
+    ids = list(Category.objects.values_list('id', flat=True))
+    if ids:
+        return ids
+    now = timezone.now()
+    Category.objects.bulk_create([
+        Category(name=name, slug=slug, created_at=now, updated_at=now) for name, slug in CATEGORIES
+    ])
+    return list(Category.objects.values_list('id', flat=True))
+
+
+def create_products(count, seed, start, days, category_ids):
+    sampler = make_sampler(seed, 2)
+    first = next_id(Product)
+    prices = sample_prices(sampler, count)
+    categories = sampler.choice(category_ids, count)
+    stock = sampler.integers(0, 500, count)
+    flags = sampler.random(count)
+    created = sample_datetimes(sampler, start, days, count)
+
+    Product.objects.bulk_create([
+        Product(
+            id=first + index, name=f'Produit {first + index}', slug=f'produit-{first + index}',
+            sku=f'SKU-{first + index:08d}', category_id=categories[index], price=_cents(prices[index]),
+            stock_quantity=stock[index], is_active=flags[index] < 0.92, is_featured=flags[index] < 0.08,
+            created_at=created[index], updated_at=created[index],
+        )
+        for index in range(count)
+    ], batch_size=BATCH_SIZE)
+    return list(range(first, first + count)), prices
+
+
+# ---------------------------------------------------------------------------
+# Commandes, articles, factures, paiements (par partition)
+# ---------------------------------------------------------------------------
+
+def plan_partitions(orders, seed, start, days, user_ids, product_ids, product_prices,
+                    partition_size=PARTITION_SIZE):
+    """
+    Découpe les commandes en partitions à plages de clés disjointes. Les bornes
+    d'identifiants sont réservées au maximum (4 articles, une facture et un
+    paiement par commande) : les trous éventuels n'ont pas d'importance.
+    """
+    first_order, first_item = next_id(Order), next_id(OrderItem)
+    first_invoice, first_payment = next_id(Invoice), next_id(Payment)
+    max_items = max(ITEMS_PER_ORDER)
+    return [
+        Plan(
+            seed=(seed, 3, offset // partition_size),
+            start=start, days=days, count=min(partition_size, orders - offset),
+            first_order=first_order + offset,
+            first_item=first_item + offset * max_items,
+            first_invoice=first_invoice + offset,
+            first_payment=first_payment + offset,
+            user_ids=user_ids, product_ids=product_ids, product_prices=product_prices,
+        )
+        for offset in range(0, orders, partition_size)
+    ]
+
+
+def generate_partition(plan):
+    """Crée les commandes d'une partition ; retourne le nombre de lignes par modèle."""
+    count = plan.count
+    sampler = make_sampler(*plan.seed)
+    created = sample_datetimes(sampler, plan.start, plan.days, count)
+    statuses = sampler.choice(list(ORDER_STATUSES), count, list(ORDER_STATUSES.values()))
+    users = sampler.choice(plan.user_ids, count)
+    locations = sampler.choice(LOCATIONS, count, LOCATION_WEIGHTS)
+    item_counts = sampler.choice(list(ITEMS_PER_ORDER), count, list(ITEMS_PER_ORDER.values()))
+    total_items = sum(item_counts)
+    products = sampler.integers(0, len(plan.product_ids), total_items)
+    quantities = sampler.choice([1, 2, 3, 4, 5], total_items, [60, 20, 10, 6, 4])
+    invoice_draws = sampler.random(count)
+    invoice_statuses = sampler.choice(list(INVOICE_STATUSES), count, list(INVOICE_STATUSES.values()))
+    methods = sampler.choice(list(PAYMENT_METHODS), count, list(PAYMENT_METHODS.values()))
+    payment_statuses = sampler.choice(list(PAYMENT_STATUSES), count, list(PAYMENT_STATUSES.values()))
+    payment_delays = sampler.integers(0, 30 * 86400, count)
+
+    orders, items, invoices, payments = [], [], [], []
+    item_index = 0
+    for index in range(count):
+        order_id = plan.first_order + index
+        when = created[index]
+        total = 0
+        for _ in range(item_counts[index]):
+            product = products[item_index]
+            price = plan.product_prices[product]
+            subtotal = price * quantities[item_index]
+            total += subtotal
+            items.append(OrderItem(
+                id=plan.first_item + item_index, order_id=order_id, product_id=plan.product_ids[product],
+                quantity=quantities[item_index], unit_price=_cents(price), subtotal=_cents(subtotal),
+                created_at=when,
+            ))
+            item_index += 1
+
+        city, postal_code, country = locations[index]
+        orders.append(Order(
+            id=order_id, user_id=users[index], order_number=f'CMD-{order_id:010d}', status=statuses[index],
+            total_amount=_cents(total), shipping_address=f'{order_id % 200 + 1} rue de la République',
+            shipping_city=city, shipping_postal_code=postal_code, shipping_country=country,
+            created_at=when, updated_at=when,
+        ))
+
+        # Factures pour ~85 % des commandes non annulées ni en attente
+        if statuses[index] in ('pending', 'cancelled') or invoice_draws[index] >= 0.85:
+            continue
+        invoice_id = plan.first_invoice + index
+        tax = total * 20 // 100
+        invoices.append(Invoice(
+            id=invoice_id, order_id=order_id, invoice_number=f'FAC-{invoice_id:010d}',
+            status=invoice_statuses[index], subtotal=_cents(total), tax_amount=_cents(tax),
+            total_amount=_cents(total + tax), issued_date=when.date(), due_date=(when + timedelta(days=30)).date(),
+            created_at=when, updated_at=when,
+        ))
+        if invoice_statuses[index] in ('paid', 'sent'):
+            paid_at = when + timedelta(seconds=payment_delays[index])
+            payments.append(Payment(
+                id=plan.first_payment + index, invoice_id=invoice_id, amount=_cents(total + tax),
+                method=methods[index], status=payment_statuses[index],
+                transaction_id=f'TXN-{plan.first_payment + index:010d}', payment_date=paid_at,
+                created_at=paid_at, updated_at=paid_at,
+            ))
+
+    with explicit_timestamps(Order, OrderItem, Invoice, Payment), transaction.atomic():
+        for model, objects in ((Order, orders), (OrderItem, items), (Invoice, invoices), (Payment, payments)):
+            model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+    return {'Order': len(orders), 'OrderItem': len(items), 'Invoice': len(invoices), 'Payment': len(payments)}
+
+
+def _init_worker():
+    """Processus de travail : Django initialisé, aucune connexion héritée."""
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _run_partition(plan):
+    try:
+        return generate_partition(plan)
+    finally:
+        connections.close_all()
+
+
+def generate(orders, users=None, products=None, seed=42, days=730, workers=1, progress=None):
+    """
+    Génère `orders` commandes (et leurs articles, factures et paiements) sur les
+    `days` derniers jours, avec `users` clients et `products` produits.
+
+    Args:
+        workers: Processus parallèles pour les commandes (1 = dans ce processus)
+        progress: Appelé avec (commandes créées, total) après chaque partition
+
+    Returns:
+        {nom du modèle: lignes créées}
+    """
+    if connection.vendor == 'sqlite':
+        workers = 1  # un seul écrivain à la fois
+    users = users or max(10, min(orders // 20, 100000))
+    products = products or max(20, min(orders // 100, 20000))
+    start = (timezone.now() - timedelta(days=days)).date()
+
+    with explicit_timestamps(*GENERATED_MODELS), transaction.atomic():
+        user_ids = create_users(users, seed, start, days)
+        category_ids = ensure_categories()
+        product_ids, product_prices = create_products(products, seed, start, days, category_ids)
+
+    created = {'User': users, 'UserProfile': users, 'Product': products}
+    plans = plan_partitions(orders, seed, start, days, user_ids, product_ids, product_prices)
+    done = 0
+
+    def collect(counts, plan):
+        nonlocal done
+        for name, value in counts.items():
+            created[name] = created.get(name, 0) + value
+        done += plan.count
+        if progress:
+            progress(done, orders)
+
+    if workers > 1 and len(plans) > 1:
+        # Les connexions ouvertes ne doivent pas être partagées avec les processus fils
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for plan, counts in zip(plans, pool.map(_run_partition, plans)):
+                collect(counts, plan)
+    else:
+        for plan in plans:
+            collect(generate_partition(plan), plan)
+
+    reset_sequences(GENERATED_MODELS)
+    return created
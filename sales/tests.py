@@ -1,3 +1,61 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+
+from admin_custom import search as search_index
+from admin_custom.models import SearchTrigram
+
+from . import retention, synthetic
+from .models import Invoice, Order, OrderItem, Payment
+
+
+class GenerateDataTests(TestCase):
+    def test_rows_are_consistent_and_reproducible(self):
+        created = synthetic.generate(120, users=5, products=8, seed=3, days=60)
+
+        self.assertEqual(Order.objects.count(), 120)
+        self.assertEqual(created['OrderItem'], OrderItem.objects.count())
+        self.assertEqual(created['Payment'], Payment.objects.count())
+        for order in Order.objects.annotate(items_total=Sum('items__subtotal'))[:20]:
+            self.assertEqual(order.total_amount, order.items_total)
+        self.assertFalse(Invoice.objects.filter(order__status__in=['pending', 'cancelled']).exists())
+        self.assertEqual(Order.objects.filter(created_at__isnull=True).count(), 0)
+
+        first_run = list(Order.objects.order_by('id').values_list('status', 'total_amount', 'shipping_city'))
+        Order.objects.all().delete()
+        synthetic.generate(120, users=5, products=8, seed=3, days=60)
+        second_run = list(Order.objects.order_by('id').values_list('status', 'total_amount', 'shipping_city'))
+        self.assertEqual(first_run, second_run)
+
+
+class RetentionTests(TestCase):
+    def test_keeps_sample_and_deletes_dependents_in_chunks(self):
+        synthetic.generate(150, users=5, products=8, seed=5, days=150)
+
+        with retention.keep_table() as table:
+            self.assertEqual(retention.select_keepers(table, 20), 20)
+            planned = retention.count_doomed(table)
+            deleted = retention.delete_in_chunks(table, chunk_size=7)
+
+        self.assertEqual(deleted, planned)
+        self.assertEqual(Order.objects.count(), 20)
+        self.assertFalse(OrderItem.objects.exclude(order__in=Order.objects.all()).exists())
+        self.assertFalse(Payment.objects.exclude(invoice__in=Invoice.objects.all()).exists())
+        self.assertEqual(Invoice.objects.count(), Invoice.objects.filter(order__in=Order.objects.all()).count())
+
+    @override_settings(ADMIN_CUSTOM={'SEARCH': {'BACKEND': 'trigram', 'MODELS': ['sales.Order']}})
+    def test_cleanup_command_rebuilds_search_index(self):
+        synthetic.generate(60, users=3, products=5, seed=2, days=60)
+        search_index.reset_search_config()
+        self.addCleanup(search_index.reset_search_config)
+        search_index.rebuild_index(Order)
+
+        out = StringIO()
+        call_command('cleanup_orders', keep=10, force=True, stdout=out)
+
+        # Suppression sans signaux : les commandes supprimées ne doivent pas rester dans l'index
+        indexed = SearchTrigram.objects.filter(model_label='sales.order').values_list('object_id', flat=True)
+        self.assertEqual(set(indexed), set(Order.objects.values_list('pk', flat=True)))
+        self.assertIn('Index de recherche sales.Order : 10 objet(s)', out.getvalue())
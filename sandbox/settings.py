@@ -33,6 +33,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'admin_custom.middleware.AdminInterfaceRedirectMiddleware',  # Redirection interface moderne
+    'admin_custom.instrumentation.InstrumentationMiddleware',  # Requêtes SQL et temps par page
 ]
 
 ROOT_URLCONF = 'sandbox.urls'
@@ -96,3 +97,32 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Configuration admin_custom
+ADMIN_CUSTOM = {
+    # Agrégats journaliers pré-calculés (python manage.py rollup_metrics pour le backfill)
+    'ROLLUPS': {
+        'sales.Order': {'date_field': 'created_at'},
+        'sales.Invoice': {'date_field': 'created_at'},
+        'sales.Payment': {'date_field': 'created_at'},
+        'catalog.Product': {'date_field': 'created_at'},
+    },
+    # Index de recherche des listes admin (python manage.py search_index pour le construire)
+    'SEARCH': {
+        'MODELS': {
+            'sales.Order': {},
+            'sales.Invoice': {},
+            'sales.Payment': {},
+            'catalog.Product': {},
+        },
+    },
+    # Autocomplétion des clés étrangères (widget au-delà de 100 objets liés)
+    'AUTOCOMPLETE': {
+        'MODELS': {
+            'auth.User': 'username',
+            'catalog.Product': 'sku',
+            'sales.Order': 'order_number',
+            'sales.Invoice': 'invoice_number',
+        },
+    },
+}
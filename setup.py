@@ -21,11 +21,14 @@ setup(
     author='Agile Custom Admin',
     author_email='',
     url='https://github.com/VOTRE_USERNAME/django-admin-custom',
-    packages=find_packages(exclude=['tests', 'tests.*', 'sandbox', 'sandbox.*']),
+    packages=find_packages(exclude=['tests', 'tests.*', 'sandbox', 'sandbox.*', 'benchmarks', 'benchmarks.*']),
     include_package_data=True,
     install_requires=[
         'Django>=4.2,<6.0',
     ],
+    extras_require={
+        'data': ['numpy>=1.24'],
+    },
     python_requires='>=3.10',
     classifiers=[
         'Development Status :: 3 - Alpha',